@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Build the shared search index at startup instead of on the first request
+        if getattr(settings, "SEARCH_INDEX_EAGER", False):
+            from . import search_index
+            search_index.get_index()
+        # Hot reload on HOT_RELOAD["SIGNAL"]; the artifact watcher starts with the first load
+        from . import reload
+        reload.install_signal_handler()
@@ -0,0 +1,89 @@
+"""Author id -> document rows, for filtering search by canonical author.
+
+The crawler's author stage (crawler/authors.py) gives every author an ``id``:
+the portal profile slug, or an ``n-...`` id shared by all spellings of a
+profile-less name. Older dumps without ids fall back to the profile slug or
+the name built like the crawler's: accents folded, "Surname, I." order
+handled, and the full first name plus surname, or "first-initial surname"
+when only initials are known. Folding an initials-only spelling into a
+full name needs the whole dataset, which only the crawler stage sees.
+"""
+import re, unicodedata
+from collections import Counter, defaultdict
+
+import numpy as np
+
+# Kept in step with crawler/authors.py
+PARENS = re.compile(r"\([^)]*\)")
+SURNAME_FIRST = re.compile(r"^\s*([^,]+?)\s*,\s*((?:[A-Z]\.?[\s-]*)+)\s*$")
+TOKEN = re.compile(r"[a-z0-9']+(?:-[a-z0-9']+)*")  # "garcia-lopez" stays one surname
+SLUG_SEP = re.compile(r"[^a-z0-9]+")
+PROFILE_SLUG = re.compile(r"/persons/([^/?#]+)")
+
+
+def fold(text):
+    """Lowercase ASCII: accents stripped, compatibility forms unified."""
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def slug(text):
+    return SLUG_SEP.sub("-", fold(text)).strip("-")
+
+
+def name_key(name):
+    """First given name (or initial) and surname, as the crawler ids profile-less names."""
+    name = PARENS.sub(" ", unicodedata.normalize("NFKC", name)).strip()
+    m = SURNAME_FIRST.match(name)
+    if m:  # "Surname, I. J." -> "I. J. Surname"
+        name = f"{m.group(2)} {m.group(1)}"
+    tokens = TOKEN.findall(fold(name).replace(".", " "))
+    return " ".join(tokens[:1] + tokens[1:][-1:])
+
+
+def author_id(author):
+    if author.get("id"):
+        return author["id"]
+    m = PROFILE_SLUG.search(author.get("profile") or "")
+    if m:
+        return m.group(1)
+    name = author.get("name", "")
+    return "n-" + (slug(name_key(name)) or slug(name) or "unknown")
+
+
+class AuthorIndex:
+    """Sorted row arrays per author id, built once per loaded index."""
+
+    def __init__(self, documents):
+        rows = defaultdict(list)
+        names = defaultdict(Counter)
+        profiles = {}
+        for doc_id, doc in documents.items():
+            for a in doc.get("authors", []):
+                aid = author_id(a)
+                rows[aid].append(doc_id - 1)
+                names[aid][a.get("name", "")] += 1
+                if a.get("profile"):
+                    profiles.setdefault(aid, a["profile"])
+        self.rows = {aid: np.unique(np.asarray(r, dtype=np.int64)) for aid, r in rows.items()}
+        self.names = {aid: max(c, key=lambda n: (c[n], len(n))) for aid, c in names.items()}
+        self.variants = {aid: sorted(c) for aid, c in names.items()}
+        self.profiles = profiles
+
+    def __len__(self):
+        return len(self.rows)
+
+    def rows_for(self, aid):
+        """Rows of the author's publications (empty for an unknown id)."""
+        return self.rows.get(aid, np.empty(0, dtype=np.int64))
+
+    def describe(self, aid):
+        if aid not in self.rows:
+            return None
+        return {
+            "id": aid,
+            "name": self.names[aid],
+            "profile": self.profiles.get(aid, ""),
+            "variants": self.variants[aid],
+            "publications": len(self.rows[aid]),
+        }
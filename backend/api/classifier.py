@@ -0,0 +1,132 @@
+import hashlib, logging, os, threading, time
+import joblib
+from django.conf import settings
+from .coalescer import MicroBatcher
+
+# Paths to the trained artifacts from classifier/text_classifier.py
+MODEL_FILE = os.path.join(settings.BASE_DIR, "..", "classifier", "logreg_model.pkl")
+VECTORIZER_FILE = os.path.join(settings.BASE_DIR, "..", "classifier", "tfidf_vectorizer.pkl")
+
+logger = logging.getLogger(__name__)
+
+
+def artifact_hash(*paths):
+    """sha256 over the model files, short form; identifies a trained model."""
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()[:12]
+
+
+class TextClassifier:
+    """Logistic-regression topic classifier, loaded once per worker process."""
+
+    def __init__(self, model_file=MODEL_FILE, vectorizer_file=VECTORIZER_FILE, mmap_mode=None):
+        started = time.perf_counter()
+        self.version = artifact_hash(model_file, vectorizer_file)
+        # mmap_mode="r" maps the numpy arrays (coef_, idf_) read-only instead of
+        # copying them; the vectorizer's vocabulary dict is always unpickled
+        self.model = joblib.load(model_file, mmap_mode=mmap_mode)
+        self.vectorizer = joblib.load(vectorizer_file, mmap_mode=mmap_mode)
+        self.classes = [str(c) for c in self.model.classes_]
+        self.load_seconds = time.perf_counter() - started
+
+    def predict(self, texts):
+        """Classify a batch with a single transform and predict_proba.
+
+        The label is the most probable class, which is what model.predict()
+        returns for logistic regression, so it costs no second pass.
+        """
+        X = self.vectorizer.transform(texts)
+        probabilities = self.model.predict_proba(X)
+        return [
+            (self.classes[row.argmax()], {cls: float(p) for cls, p in zip(self.classes, row)})
+            for row in probabilities
+        ]
+
+
+_classifier = None
+_lock = threading.Lock()
+
+
+def load():
+    return TextClassifier(mmap_mode=getattr(settings, "CLASSIFIER_MMAP_MODE", None))
+
+
+def get_classifier():
+    global _classifier
+    if _classifier is None:
+        with _lock:
+            if _classifier is None:
+                _classifier = load()
+        from .reload import ensure_watcher
+        ensure_watcher()
+    return _classifier
+
+
+def is_ready():
+    return _classifier is not None
+
+
+def watched_files():
+    return [MODEL_FILE, VECTORIZER_FILE]
+
+
+def current_version():
+    return _classifier.version if _classifier else None
+
+
+def reload(force=False):
+    """Load the model files again off to the side and swap the shared classifier."""
+    global _classifier
+    current = _classifier
+    if not force and current is not None and artifact_hash(MODEL_FILE, VECTORIZER_FILE) == current.version:
+        return current.version
+    fresh = load()
+    _classifier = fresh
+    if current is not None:
+        from .reload import retire
+        retire("classifier", current, current.version)
+    logger.info("Classifier reloaded: %s -> %s", current.version if current else None, fresh.version)
+    return fresh.version
+
+
+def predict_batch(texts):
+    """Predict with whichever classifier is current, tagging results with its version."""
+    model = get_classifier()
+    return [(label, probabilities, model.version) for label, probabilities in model.predict(texts)]
+
+
+_batcher = None
+
+
+def get_batcher():
+    """Shared request coalescer in front of the classifier, or None unless CLASSIFIER_COALESCE is enabled."""
+    global _batcher
+    config = getattr(settings, "CLASSIFIER_COALESCE", {})
+    if not config.get("ENABLED", False):
+        return None
+    if _batcher is None:
+        with _lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(
+                    # Resolve the classifier per batch so a reloaded model is picked up
+                    predict_batch,
+                    max_batch=config.get("MAX_BATCH", 64),
+                    max_wait=config.get("MAX_WAIT_MS", 5) / 1000,
+                    name="classifier-batcher",
+                )
+    return _batcher
+
+
+def status():
+    batcher = get_batcher()
+    return {
+        "ready": _classifier is not None,
+        "version": _classifier.version if _classifier else None,
+        "classes": _classifier.classes if _classifier else None,
+        "load_seconds": _classifier.load_seconds if _classifier else None,
+        "coalescer": batcher.stats() if batcher else None,
+    }
@@ -0,0 +1,113 @@
+"""Micro-batching request coalescer.
+
+Concurrent single-item calls are gathered for up to ``max_wait`` seconds (or
+until ``max_batch`` items are waiting) and handed to ``fn`` as one list, so a
+vectorised model runs one matrix operation instead of many one-row ones.
+
+A single background thread owns the batching loop. WSGI request threads block
+on the returned Future; ASGI handlers await the same Future through
+``submit_async``, so the event loop is never blocked by the model.
+"""
+import asyncio, queue, threading, time
+from collections import deque
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    def __init__(self, fn, max_batch=64, max_wait=0.005, name="batcher"):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.name = name
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        # Metrics
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self._recent_sizes = deque(maxlen=1000)
+        self._recent_delays = deque(maxlen=1000)
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._thread.start()
+
+    def submit(self, item):
+        """Queue one item; the Future resolves to fn's result for it."""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future, time.monotonic()))
+        return future
+
+    def pending(self):
+        return self._queue.qsize()
+
+    async def submit_async(self, item):
+        return await asyncio.wrap_future(self.submit(item))
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.monotonic()
+            # Skip callers that cancelled while waiting; if none are left there is nothing to flush
+            live = [(item, f, enqueued) for item, f, enqueued in batch if f.set_running_or_notify_cancel()]
+            if not live:
+                continue
+            items, futures, enqueued = zip(*live)
+            self._record(len(live), [started - t for t in enqueued])
+            try:
+                results = self.fn(list(items))
+            except Exception as e:
+                for f in futures:
+                    f.set_exception(e)
+                continue
+            for f, result in zip(futures, results):
+                f.set_result(result)
+
+    def _record(self, size, delays):
+        with self._stats_lock:
+            self.batches += 1
+            self.items += size
+            self.largest_batch = max(self.largest_batch, size)
+            self._recent_sizes.append(size)
+            self._recent_delays.extend(delays)
+
+    def stats(self):
+        with self._stats_lock:
+            sizes = sorted(self._recent_sizes)
+            delays = sorted(self._recent_delays)
+
+        def pct(values, q):
+            return values[int(q * (len(values) - 1))] if values else None
+
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else None,
+            "largest_batch": self.largest_batch,
+            "recent_batch_size_p50": pct(sizes, 0.5),
+            "recent_queue_delay_ms_p50": pct(delays, 0.5) * 1000 if delays else None,
+            "recent_queue_delay_ms_p99": pct(delays, 0.99) * 1000 if delays else None,
+            "queued": self.pending(),
+        }
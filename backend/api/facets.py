@@ -0,0 +1,95 @@
+"""Doc-value columns and filter bitmaps for faceted search.
+
+``published_date`` is free text from the portal ("17 Sept 2024", "2021");
+the year is parsed once per loaded index into a column, next to has-abstract
+and the canonical author ids (taken from the AuthorIndex). Filters become
+row masks that are intersected before scoring:
+
+* one bitmap per year, OR-ed over ``year_from``..``year_to``;
+* the author's sorted rows from the AuthorIndex;
+* the has-abstract column.
+
+Facet counts for a query are bincounts of the same columns over its matching
+rows, so they never touch the documents. Tombstoned rows are missing from
+``documents`` and therefore never live.
+"""
+import re
+import numpy as np
+
+YEAR = re.compile(r"\b(1[89]\d\d|2\d\d\d)\b")
+UNKNOWN_YEAR = 0
+
+
+def parse_year(text):
+    """Four-digit year in a published date, or UNKNOWN_YEAR."""
+    m = YEAR.search(text or "")
+    return int(m.group(1)) if m else UNKNOWN_YEAR
+
+
+class DocValues:
+    """Per-row columns over an index's documents, built once per loaded index."""
+
+    def __init__(self, documents, n_rows, authors):
+        self.n_rows = n_rows
+        self.live = np.zeros(n_rows, dtype=bool)
+        self.year = np.zeros(n_rows, dtype=np.int16)
+        self.has_abstract = np.zeros(n_rows, dtype=bool)
+        for doc_id, doc in documents.items():
+            row = doc_id - 1
+            self.live[row] = True
+            self.year[row] = parse_year(doc.get("published_date"))
+            self.has_abstract[row] = bool(doc.get("abstract", "").strip())
+
+        # One bitmap per year that occurs
+        self.years = {int(y): self.live & (self.year == y) for y in np.unique(self.year[self.live])}
+
+        # Author column as (row, author code) pairs, codes indexing author_ids
+        self.authors = authors
+        self.author_ids = sorted(authors.rows)
+        rows = [authors.rows[aid] for aid in self.author_ids]
+        self.author_rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+        self.author_codes = np.repeat(np.arange(len(rows)), [len(r) for r in rows])
+
+    def mask(self, author=None, year_from=None, year_to=None, has_abstract=None):
+        """Live rows passing every given filter, or None when no filter is set."""
+        if author is None and year_from is None and year_to is None and has_abstract is None:
+            return None
+        mask = self.live.copy()
+        if author is not None:
+            allowed = np.zeros(self.n_rows, dtype=bool)
+            allowed[self.authors.rows_for(author)] = True
+            mask &= allowed
+        if year_from is not None or year_to is not None:
+            lo = year_from if year_from is not None else UNKNOWN_YEAR + 1
+            hi = year_to if year_to is not None else np.iinfo(np.int16).max
+            in_range = np.zeros(self.n_rows, dtype=bool)
+            for year, bitmap in self.years.items():
+                if lo <= year <= hi and year != UNKNOWN_YEAR:
+                    in_range |= bitmap
+            mask &= in_range
+        if has_abstract is not None:
+            mask &= self.has_abstract if has_abstract else ~self.has_abstract
+        return mask
+
+    def facets(self, rows, top_authors=20):
+        """Counts per year, author and has-abstract over ``rows`` (sorted row ids)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        years = self.year[rows]
+        values, counts = np.unique(years[years != UNKNOWN_YEAR], return_counts=True)
+
+        selected = np.zeros(self.n_rows, dtype=bool)
+        selected[rows] = True
+        per_author = np.bincount(self.author_codes[selected[self.author_rows]], minlength=len(self.author_ids))
+        best = np.flatnonzero(per_author)
+        best = best[np.lexsort((best, -per_author[best]))][:top_authors]
+
+        with_abstract = int(self.has_abstract[rows].sum())
+        return {
+            "year": [{"value": int(y), "count": int(c)} for y, c in zip(values, counts)],
+            "year_unknown": int((years == UNKNOWN_YEAR).sum()),
+            "author": [
+                {"id": self.author_ids[c], "name": self.authors.names[self.author_ids[c]], "count": int(per_author[c])}
+                for c in best
+            ],
+            "has_abstract": {"true": with_abstract, "false": len(rows) - with_abstract},
+        }
@@ -0,0 +1,219 @@
+"""Incremental updates to the search index: segments, tombstones, running IDF.
+
+A SearchIndex keeps its raw term counts as a list of segments (CSR, one row
+per document, columns in vocabulary order; the vocabulary only ever grows, so
+older segments stay valid), each with the gap-encoded token positions of its
+entries (see positions.py), plus a tombstone bitmap over all rows. Applying a
+crawl delta
+
+* tombstones the rows of removed and updated links,
+* normalises only the added / updated documents into one new segment,
+  extending the vocabulary with their new terms,
+* moves the document frequencies by exactly those rows (no rescan), and
+* derives a new immutable snapshot: IDF from the running document
+  frequencies, the TF-IDF rows and the BM25 postings by sparse arithmetic
+  over the stored counts, the positional index by concatenation. Nothing is
+  re-tokenised or refitted.
+
+Dead rows keep their row ids (zero TF-IDF, no postings, absent from
+``documents``) until ``merge`` compacts all segments into one and drops
+them along with terms no live document uses.
+"""
+import hashlib, json
+import numpy as np
+from scipy.sparse import csr_matrix, diags, vstack
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from .positions import PositionalIndex, encode_gaps
+from .retrieval import InvertedIndex
+
+# Same token pattern and lowercasing TfidfVectorizer applies to the normalised text
+_analyze = TfidfVectorizer().build_analyzer()
+
+
+def doc_text(index, doc):
+    return " ".join(index.pre_process(doc.get("title", "") + " " + doc.get("abstract", "")))
+
+
+def count_rows(texts, vocabulary):
+    """Count matrix and position gaps for ``texts``; unseen terms are appended to ``vocabulary`` (in place)."""
+    indptr, indices, data, gaps = [0], [], [], []
+    for text in texts:
+        row = {}
+        for position, term in enumerate(_analyze(text)):
+            tid = vocabulary.get(term)
+            if tid is None:
+                tid = vocabulary[term] = len(vocabulary)
+            row.setdefault(tid, []).append(position)
+        cols = sorted(row)
+        indices.extend(cols)
+        data.extend(len(row[c]) for c in cols)
+        for c in cols:
+            gaps.extend(encode_gaps(row[c]))
+        indptr.append(len(indices))
+    counts = csr_matrix((np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int64), indptr),
+                        shape=(len(texts), len(vocabulary)))
+    return counts, np.asarray(gaps, dtype=np.int64)
+
+
+def _pad(matrix, n_terms):
+    """Widen a segment to the current vocabulary (new terms are trailing columns)."""
+    matrix = matrix.tocsr()
+    if matrix.shape[1] == n_terms:
+        return matrix
+    return csr_matrix((matrix.data, matrix.indices, matrix.indptr), shape=(matrix.shape[0], n_terms))
+
+
+def _doc_freq(matrix, n_terms):
+    return np.bincount(matrix.indices, minlength=n_terms).astype(np.int64)
+
+
+def base_segment(index):
+    """(counts, gaps) of a freshly built or loaded index, recovered from its positional index."""
+    pos = index.positions
+    counts = csr_matrix(
+        (np.diff(pos.ptr).astype(np.float64), np.asarray(pos.terms), np.asarray(pos.indptr)),
+        shape=(len(pos.indptr) - 1, len(index.vectorizer.vocabulary_)),
+    )
+    return counts, np.asarray(pos.gaps)
+
+
+def materialize(index, segments, tombstones, vocabulary, df, documents):
+    """Fill ``index`` with query structures derived from counts and document frequencies."""
+    n_terms = len(vocabulary)
+    counts = vstack([_pad(s, n_terms) for s, _ in segments], format="csr") if segments else csr_matrix((0, n_terms))
+    # Positions keep the dead rows' entries: only live rows are ever candidates
+    index.positions = PositionalIndex.from_counts(counts, np.concatenate([g for _, g in segments]))
+    live = ~tombstones
+    if not live.all():
+        counts = (diags(live.astype(np.float64)) @ counts).tocsr()
+        counts.eliminate_zeros()
+    n_live = int(live.sum())
+
+    # sklearn's smooth IDF, from the running document frequencies
+    idf = np.log((1 + n_live) / (1 + df)) + 1
+    vectorizer = TfidfVectorizer()
+    vectorizer.vocabulary_ = vocabulary
+    vectorizer.idf_ = idf
+
+    index.segments = segments
+    index.tombstones = tombstones
+    index.df = df
+    index.documents = documents
+    index.vectorizer = vectorizer
+    index.tfidf_matrix = normalize(counts.multiply(idf).tocsr())
+    index.postings = InvertedIndex.from_counts(counts, live=n_live)
+    return index
+
+
+def apply_changes(index, upserts, removals):
+    """New snapshot of ``index`` with ``upserts`` (records, matched by link) and ``removals`` (links)."""
+    from .search_index import SearchIndex
+
+    segments = list(index.segments) if index.segments is not None else [base_segment(index)]
+    n_rows = sum(s.shape[0] for s, _ in segments)
+    tombstones = index.tombstones.copy() if index.tombstones is not None else np.zeros(n_rows, dtype=bool)
+    df = index.df.copy() if index.df is not None else _doc_freq(vstack([s for s, _ in segments], format="csr"), len(index.vectorizer.vocabulary_))
+    vocabulary = dict(index.vectorizer.vocabulary_)
+    documents = dict(index.documents)
+
+    # Tombstone the current rows of every removed or replaced link
+    upserts = list({rec["link"]: rec for rec in upserts if rec.get("link")}.values())
+    row_of = index.rows_by_link
+    dead = sorted({row_of[link] for link in list(removals) + [r["link"] for r in upserts] if link in row_of})
+    if dead:
+        all_counts = vstack([_pad(s, len(vocabulary)) for s, _ in segments], format="csr")
+        df -= _doc_freq(all_counts[dead], len(vocabulary))
+        tombstones[dead] = True
+        for row in dead:
+            documents.pop(row + 1, None)
+
+    # Only the new documents go through text normalisation
+    if upserts:
+        new, gaps = count_rows([doc_text(index, rec) for rec in upserts], vocabulary)
+        df = np.concatenate([df, np.zeros(len(vocabulary) - len(df), dtype=np.int64)])
+        df += _doc_freq(new, len(vocabulary))
+        segments.append((new, gaps))
+        tombstones = np.concatenate([tombstones, np.zeros(len(upserts), dtype=bool)])
+        for i, rec in enumerate(upserts):
+            documents[n_rows + i + 1] = rec
+
+    snapshot = SearchIndex(index.data_file)
+    snapshot.source_sha256 = index.source_sha256
+    snapshot.generation = index.generation + 1
+    return materialize(snapshot, segments, tombstones, vocabulary, df, documents)
+
+
+def merge(index):
+    """Compact every segment into one, dropping tombstoned rows and unused terms."""
+    from .search_index import SearchIndex
+
+    if index.segments is None or (len(index.segments) == 1 and not index.tombstones.any()):
+        return index
+    vocabulary = index.vectorizer.vocabulary_
+    counts = vstack([_pad(s, len(vocabulary)) for s, _ in index.segments], format="csr")
+    live = np.flatnonzero(~index.tombstones)
+    keep = np.flatnonzero(index.df > 0)
+    # Whole entries of live rows keep their gaps; dropped terms only occur in dead rows
+    entry_live = np.repeat(~index.tombstones, np.diff(counts.indptr))
+    gaps = np.concatenate([g for _, g in index.segments])[np.repeat(entry_live, counts.data.astype(np.int64))]
+    counts = counts[live][:, keep].tocsr()
+    terms = sorted(vocabulary, key=vocabulary.get)
+    new_vocabulary = {terms[t]: i for i, t in enumerate(keep)}
+    documents = {i: index.documents[int(row) + 1] for i, row in enumerate(live, 1)}
+
+    merged = SearchIndex(index.data_file)
+    merged.source_sha256 = index.source_sha256
+    merged.generation = index.generation
+    return materialize(merged, [(counts, gaps)], np.zeros(len(live), dtype=bool), new_vocabulary,
+                       index.df[keep].copy(), documents)
+
+
+def needs_merge(index, max_segments, max_dead_ratio):
+    if index.segments is None:
+        return False
+    dead = int(index.tombstones.sum())
+    return len(index.segments) > max_segments or dead > max_dead_ratio * max(1, len(index.tombstones))
+
+
+def read_source(data_file):
+    """(sha256, records) of publications.json from a single read, so the two always agree."""
+    with open(data_file, "rb") as f:
+        raw = f.read()
+    return hashlib.sha256(raw).hexdigest(), json.loads(raw)
+
+
+def differences(index, records):
+    """(extra, missing, changed) links of ``index`` against ``records``.
+
+    Changed links are indexed with other content than ``records`` has for
+    them, e.g. an update the delta did not carry.
+    """
+    expected = {rec.get("link"): rec for rec in records}
+    indexed = {doc.get("link"): doc for doc in index.documents.values()}
+    changed = sum(indexed[link] != expected[link] for link in indexed.keys() & expected.keys())
+    return len(indexed.keys() - expected.keys()), len(expected.keys() - indexed.keys()), changed
+
+
+def indexes_exactly(index, data_file):
+    """Whether ``index`` holds exactly the records in ``data_file``, field for field."""
+    return not any(differences(index, read_source(data_file)[1]))
+
+
+def delta_changes(delta, data_file=None):
+    """(upserts, removals) from a crawler publications_delta.json.
+
+    Records are taken from ``data_file`` (publications.json) when it has the
+    link, so they carry the canonical author ids the crawler adds at the end
+    of a run; the raw delta record is the fallback.
+    """
+    current = {}
+    if data_file:
+        try:
+            with open(data_file, "r", encoding="utf-8") as f:
+                current = {rec.get("link"): rec for rec in json.load(f)}
+        except FileNotFoundError:
+            pass
+    upserts = [current.get(rec["link"], rec) for rec in delta.get("added", []) + delta.get("updated", [])]
+    return upserts, list(delta.get("removed", []))
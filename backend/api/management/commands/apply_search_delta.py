@@ -0,0 +1,58 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from api import incremental, search_index
+
+
+class Command(BaseCommand):
+    help = ("Bring the search index artifact up to date with a crawl delta "
+            "(publications_delta.json) instead of rebuilding it.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default=None, help="Artifact root (defaults to SEARCH_INDEX_DIR).")
+        parser.add_argument("--source", default=search_index.DATA_FILE, help="publications.json after the crawl.")
+        parser.add_argument("--delta", default=search_index.DELTA_FILE, help="Delta written by the crawl.")
+        parser.add_argument("--no-verify", action="store_true",
+                            help="Skip checking that the result indexes exactly the publications in --source.")
+
+    def handle(self, *args, **options):
+        root = options["output"] or search_index.artifact_dir()
+        if not root:
+            raise CommandError("Set SEARCH_INDEX_DIR or pass --output.")
+        try:
+            index = search_index.SearchIndex.load(str(root), data_file=options["source"], check_source=False)
+        except FileNotFoundError:
+            raise CommandError(f"No artifact in {root}; run build_search_index first.")
+        except search_index.StaleIndexError as e:
+            raise CommandError(f"Artifact cannot be updated ({e}); run build_search_index --force.")
+
+        sha, records = incremental.read_source(options["source"])
+        if index.source_sha256 == sha:
+            self.stdout.write(f"Search index {index.version} is up to date ({index.loaded_from}).")
+            return
+        try:
+            with open(options["delta"], "r", encoding="utf-8") as f:
+                delta = json.load(f)
+        except FileNotFoundError:
+            raise CommandError(f"No delta at {options['delta']}.")
+
+        upserts, removals = incremental.delta_changes(delta, options["source"])
+        index = incremental.merge(incremental.apply_changes(index, upserts, removals))
+
+        if not options["no_verify"]:
+            extra, missing, changed = incremental.differences(index, records)
+            if extra or missing or changed:
+                raise CommandError(
+                    f"Delta does not bring the artifact to {options['source']} "
+                    f"({extra} extra, {missing} missing, {changed} changed publications); "
+                    "run build_search_index --force."
+                )
+
+        # The merged index now stands for this publications.json
+        index.source_sha256 = sha
+        index.generation = 0
+        path = index.save(str(root))
+        self.stdout.write(self.style.SUCCESS(
+            f"Applied +{len(delta.get('added', []))} ~{len(delta.get('updated', []))} "
+            f"-{len(removals)} → {len(index.documents)} publications, "
+            f"{len(index.vectorizer.vocabulary_)} terms → {path}"
+        ))
@@ -0,0 +1,87 @@
+import json, os, subprocess, sys, time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Modules that must not be imported just by loading the URLconf
+HEAVY_MODULES = ("nltk", "sklearn", "scipy", "numpy", "joblib")
+
+SETUP = (
+    "import os, django; os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings'); "
+    "django.setup(); import backend.urls"
+)
+
+FIRST_RESPONSE = """
+import json, os, sys, time
+t0 = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+import django; django.setup()
+from django.test.utils import setup_test_environment; setup_test_environment()
+import backend.urls
+from django.test import Client
+out = {"startup_ms": (time.perf_counter() - t0) * 1000, "requests": []}
+client = Client()
+for method, path, body in json.loads(sys.argv[1]):
+    t = time.perf_counter()
+    if method == "POST":
+        r = client.post(path, data=json.dumps(body), content_type="application/json")
+    else:
+        r = client.get(path)
+    out["requests"].append({"path": path, "status": r.status_code, "ms": (time.perf_counter() - t) * 1000})
+print(json.dumps(out))
+"""
+
+REQUESTS = [
+    ["GET", "/api/sample/business/", None],
+    ["GET", "/api/search/?query=finance", None],
+    ["POST", "/api/classify/", {"text": "Central bank raises interest rates to curb inflation"}],
+]
+
+
+class Command(BaseCommand):
+    help = "Measure cold start: import time of the URLconf (-X importtime) and time to first response."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=10, help="Slowest imports to list.")
+        parser.add_argument("--max-import-ms", type=float, default=None,
+                            help="Fail if importing the URLconf takes longer than this.")
+
+    def run(self, *argv):
+        return subprocess.run([sys.executable, *argv], cwd=settings.BASE_DIR, env=os.environ.copy(),
+                              capture_output=True, text=True)
+
+    def handle(self, *args, **options):
+        # -------- import time
+        proc = self.run("-X", "importtime", "-c", SETUP)
+        if proc.returncode:
+            raise CommandError(proc.stderr[-2000:])
+        imports = []
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            # "import time:  self [us] | cumulative | imported package"
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            imports.append((int(cumulative_us), int(self_us), name.strip()))
+        total_ms = sum(s for _, s, _ in imports) / 1000
+        heavy = sorted({n.split(".")[0] for _, _, n in imports if n.split(".")[0] in HEAVY_MODULES})
+
+        self.stdout.write(f"Import of settings + URLconf: {total_ms:.1f} ms over {len(imports)} modules")
+        for cumulative, _, name in sorted(imports, reverse=True)[:options["top"]]:
+            self.stdout.write(f"  {cumulative / 1000:9.1f} ms  {name}")
+        if heavy:
+            self.stdout.write(self.style.WARNING(f"Heavy modules imported at startup: {', '.join(heavy)}"))
+
+        # -------- time to first response
+        started = time.perf_counter()
+        proc = self.run("-c", FIRST_RESPONSE, json.dumps(REQUESTS))
+        wall_ms = (time.perf_counter() - started) * 1000
+        if proc.returncode:
+            raise CommandError(proc.stderr[-2000:])
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        self.stdout.write(f"Process start → app ready: {result['startup_ms']:.1f} ms")
+        for r in result["requests"]:
+            self.stdout.write(f"  first {r['path']:32} {r['status']}  {r['ms']:9.1f} ms")
+        self.stdout.write(f"Total wall time (interpreter start to last response): {wall_ms:.1f} ms")
+
+        limit = options["max_import_ms"]
+        if limit is not None and total_ms > limit:
+            raise CommandError(f"URLconf import took {total_ms:.1f} ms (limit {limit} ms)")
@@ -0,0 +1,76 @@
+import json, random, time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+from api import search_index
+
+# Typed one character at a time when no recorded stream is given
+QUERIES = ["financial crisis", "credit risk", "machine learning", "corporate governance",
+           "monetary policy", "andrikopoulos", "audit quality", "supply chain resilience"]
+BUDGET_MS = 10
+
+
+def synthesize(queries, seed=0):
+    """A keystroke stream: every prefix of every query, ~80-200 ms apart."""
+    rng = random.Random(seed)
+    stream, ms = [], 0
+    for query in queries:
+        for i in range(1, len(query) + 1):
+            ms += rng.randint(80, 200)
+            stream.append({"ms": ms, "q": query[:i]})
+        ms += 1500  # pause before the next query
+    return stream
+
+
+class Command(BaseCommand):
+    help = "Replay a keystroke stream against /api/suggest/ and report per-keystroke latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stream", default=None,
+                            help='Recorded stream, one {"ms": offset, "q": "partial query"} per line.')
+        parser.add_argument("--record", default=None, help="Write the synthesized stream to this path.")
+        parser.add_argument("--rounds", type=int, default=5, help="Replays of the stream.")
+        parser.add_argument("--realtime", action="store_true", help="Keep the recorded gaps between keystrokes.")
+
+    def handle(self, *args, **options):
+        if options["stream"]:
+            with open(options["stream"], "r", encoding="utf-8") as f:
+                stream = [json.loads(line) for line in f if line.strip()]
+        else:
+            stream = synthesize(QUERIES)
+            if options["record"]:
+                with open(options["record"], "w", encoding="utf-8") as f:
+                    f.writelines(json.dumps(k) + "\n" for k in stream)
+
+        started = time.perf_counter()
+        index = search_index.get_index()
+        index.suggester
+        self.stdout.write(f"Index and suggester ready in {time.perf_counter() - started:.2f}s; "
+                          f"{len(stream)} keystrokes x {options['rounds']} rounds")
+
+        suggester = index.suggester
+        self.report("suggester", self.replay(stream, options, lambda q: suggester.suggest(q)))
+        client = Client(SERVER_NAME=(settings.ALLOWED_HOSTS or ["localhost"])[0])
+        self.report("GET /api/suggest/", self.replay(stream, options, lambda q: client.get("/api/suggest/", {"q": q})))
+
+    def replay(self, stream, options, call):
+        timings = []
+        for _ in range(options["rounds"]):
+            previous = 0
+            for key in stream:
+                if options["realtime"]:
+                    time.sleep((key["ms"] - previous) / 1000)
+                    previous = key["ms"]
+                t = time.perf_counter()
+                call(key["q"])
+                timings.append((time.perf_counter() - t) * 1000)
+        return sorted(timings)
+
+    def report(self, label, timings):
+        def pct(q):
+            return timings[int(q * (len(timings) - 1))]
+        over = sum(ms > BUDGET_MS for ms in timings)
+        self.stdout.write(
+            f"{label:18} p50={pct(0.5):6.2f}ms  p95={pct(0.95):6.2f}ms  p99={pct(0.99):6.2f}ms  "
+            f"max={timings[-1]:6.2f}ms  over {BUDGET_MS}ms: {over}/{len(timings)}"
+        )
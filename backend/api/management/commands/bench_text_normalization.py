@@ -0,0 +1,52 @@
+import json, time
+from django.core.management.base import BaseCommand
+from nltk.corpus import stopwords
+from nltk.stem import PorterStemmer
+from nltk.tokenize import word_tokenize
+from api import search_index
+from api.text import TextNormalizer
+
+
+def nltk_baseline():
+    """The pre-normaliser path: word_tokenize and an unmemoised stem per token."""
+    stemmer = PorterStemmer()
+    stop_words = set(stopwords.words('english'))
+
+    def normalize(text):
+        tokens = word_tokenize(text.lower())
+        return [stemmer.stem(t) for t in tokens if t.isalnum() and t not in stop_words]
+    return normalize
+
+
+class Command(BaseCommand):
+    help = "Compare text-normalisation throughput over the full publications corpus."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", default=search_index.DATA_FILE)
+        parser.add_argument("--rounds", type=int, default=3, help="Passes over the corpus per variant.")
+
+    def handle(self, *args, **options):
+        with open(options["source"], "r", encoding="utf-8") as f:
+            docs = [d.get("title", "") + " " + d.get("abstract", "") for d in json.load(f)]
+        rounds = options["rounds"]
+
+        variants = {
+            "nltk (baseline)": nltk_baseline(),
+            "punkt + stem memo": TextNormalizer("punkt").normalize,
+            "regex + stem memo": TextNormalizer("regex").normalize,
+        }
+        outputs = {}
+        for name, normalize in variants.items():
+            started = time.perf_counter()
+            for _ in range(rounds):
+                outputs[name] = [normalize(d) for d in docs]
+            elapsed = time.perf_counter() - started
+            tokens = sum(len(t) for t in outputs[name]) * rounds
+            self.stdout.write(
+                f"{name:20} {len(docs) * rounds / elapsed:9.0f} docs/s {tokens / elapsed:11.0f} terms/s"
+            )
+
+        baseline = outputs["nltk (baseline)"]
+        for name in list(variants)[1:]:
+            same = sum(a == b for a, b in zip(baseline, outputs[name]))
+            self.stdout.write(f"{name:20} identical to baseline for {same}/{len(docs)} documents")
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from api import search_index
+
+
+class Command(BaseCommand):
+    help = "Build the TF-IDF search index offline and write it to SEARCH_INDEX_DIR."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default=None, help="Artifact root (defaults to SEARCH_INDEX_DIR).")
+        parser.add_argument("--source", default=search_index.DATA_FILE, help="publications.json to index.")
+        parser.add_argument("--force", action="store_true", help="Rebuild even if the artifact is up to date.")
+
+    def handle(self, *args, **options):
+        root = options["output"] or search_index.artifact_dir()
+        if not root:
+            raise CommandError("Set SEARCH_INDEX_DIR or pass --output.")
+
+        if not options["force"]:
+            try:
+                current = search_index.SearchIndex.load(str(root), data_file=options["source"])
+                self.stdout.write(f"Search index {current.version} is up to date ({current.loaded_from}).")
+                return
+            except (FileNotFoundError, search_index.StaleIndexError):
+                pass
+
+        index = search_index.SearchIndex(options["source"]).build()
+        if not index.documents:
+            raise CommandError(f"No publications found in {options['source']}.")
+        path = index.save(str(root))
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(index.documents)} publications, {len(index.vectorizer.vocabulary_)} terms "
+            f"in {index.build_seconds:.2f}s → {path}"
+        ))
@@ -0,0 +1,54 @@
+import statistics, time
+from django.core.management.base import BaseCommand
+from api import search_index
+from api.retrieval import BACKENDS
+
+DEFAULT_QUERIES = [
+    "finance", "accounting", "banking", "capital structure", "monetary policy",
+    "islamic finance", "corporate governance", "stock market volatility",
+    "audit quality", "refugee crowdfunding", "economic growth", "fintech",
+]
+
+
+class Command(BaseCommand):
+    help = "A/B the search backends: per-query latency and overlap of their top-k results."
+
+    def add_arguments(self, parser):
+        parser.add_argument("queries", nargs="*", help="Queries to run (defaults to a built-in sample).")
+        parser.add_argument("--file", help="Read queries from a file, one per line.")
+        parser.add_argument("-k", type=int, default=10, help="Depth of the compared result lists.")
+        parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query and backend.")
+
+    def handle(self, *args, **options):
+        queries = options["queries"]
+        if options["file"]:
+            with open(options["file"], "r", encoding="utf-8") as f:
+                queries += [line.strip() for line in f if line.strip()]
+        queries = queries or DEFAULT_QUERIES
+        k, repeat = options["k"], options["repeat"]
+
+        index = search_index.get_index()
+        names = list(BACKENDS)
+        timings = {name: [] for name in names}
+        overlaps = []
+        for query in queries:
+            terms = index.pre_process(query)
+            tops = {}
+            for name in names:
+                backend = index.backend(name)
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    rows, _, _ = backend.rank(terms, k)
+                    timings[name].append((time.perf_counter() - started) * 1000)
+                tops[name] = set(rows.tolist())
+            a, b = (tops[n] for n in names[:2])
+            overlap = len(a & b) / max(len(a | b), 1)
+            overlaps.append(overlap)
+            self.stdout.write(f"{query!r:32} overlap@{k}={overlap:.2f}")
+
+        self.stdout.write("")
+        for name in names:
+            ms = sorted(timings[name])
+            p95 = ms[int(0.95 * (len(ms) - 1))]
+            self.stdout.write(f"{name:6} mean={statistics.mean(ms):.3f}ms p50={statistics.median(ms):.3f}ms p95={p95:.3f}ms")
+        self.stdout.write(f"mean overlap@{k} (Jaccard): {statistics.mean(overlaps):.2f}")
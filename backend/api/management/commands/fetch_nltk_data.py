@@ -0,0 +1,26 @@
+import nltk
+from django.core.management.base import BaseCommand, CommandError
+from api.text import REQUIRED_RESOURCES, missing_nltk_resources, nltk_data_dir
+
+
+class Command(BaseCommand):
+    help = "Download the NLTK data the search normaliser needs into NLTK_DATA_DIR (the only step that uses the network)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="Only report missing resources; exit non-zero if any.")
+
+    def handle(self, *args, **options):
+        missing = sorted({pkg for mode in REQUIRED_RESOURCES for pkg in missing_nltk_resources(mode)})
+        if options["check"]:
+            if missing:
+                raise CommandError(f"Missing NLTK data: {', '.join(missing)}")
+            self.stdout.write(self.style.SUCCESS("All NLTK data present."))
+            return
+
+        target = nltk_data_dir() or None
+        for package in missing:
+            if not nltk.download(package, download_dir=target, quiet=True):
+                raise CommandError(f"Could not download NLTK package {package!r}.")
+            self.stdout.write(f"Installed {package} → {target or 'default NLTK data path'}")
+        if not missing:
+            self.stdout.write("Nothing to download.")
@@ -0,0 +1,74 @@
+import json, statistics, time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from django.core.management.base import BaseCommand
+
+QUERIES = ["finance", "accounting", "banking", "capital structure", "monetary policy", "audit quality"]
+TEXTS = [
+    "Central bank raises interest rates to curb inflation",
+    "New vaccine trial shows strong results in older patients",
+    "Parliament debates electoral reform bill",
+]
+
+# endpoint label -> (method, path for the sync view, path for the async view)
+ENDPOINTS = {
+    "search": ("GET", "/api/search/", "/api/search/async/"),
+    "classify": ("POST", "/api/classify/", "/api/classify/async/"),
+}
+
+
+class Command(BaseCommand):
+    help = "Load-test a running server: p50/p99 latency and throughput of the sync vs async endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://localhost:8000", help="Base URL of the running server.")
+        parser.add_argument("--endpoint", choices=list(ENDPOINTS), default="search")
+        parser.add_argument("--mode", choices=["sync", "async", "both"], default="both")
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--unique", action="store_true",
+                            help="Make every search query unique so the result cache never hits.")
+
+    def handle(self, *args, **options):
+        method, sync_path, async_path = ENDPOINTS[options["endpoint"]]
+        modes = ["sync", "async"] if options["mode"] == "both" else [options["mode"]]
+        for mode in modes:
+            path = sync_path if mode == "sync" else async_path
+            self.report(mode, self.run(method, options["url"] + path, options))
+
+    def run(self, method, url, options):
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=options["concurrency"])
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        def one(i):
+            started = time.perf_counter()
+            if method == "GET":
+                query = QUERIES[i % len(QUERIES)] + (f" {i}" if options["unique"] else "")
+                r = session.get(url, params={"query": query})
+            else:
+                r = session.post(url, data=json.dumps({"text": TEXTS[i % len(TEXTS)]}),
+                                 headers={"Content-Type": "application/json"})
+            return r.status_code, (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as ex:
+            results = list(ex.map(one, range(options["requests"])))
+        return results, time.perf_counter() - started
+
+    def report(self, mode, run):
+        results, elapsed = run
+        ok = sorted(ms for code, ms in results if code == 200)
+        codes = {}
+        for code, _ in results:
+            codes[code] = codes.get(code, 0) + 1
+
+        def pct(q):
+            return ok[int(q * (len(ok) - 1))] if ok else float("nan")
+
+        self.stdout.write(
+            f"{mode:5} {len(results) / elapsed:8.1f} req/s  "
+            f"p50={pct(0.5):8.1f}ms  p99={pct(0.99):8.1f}ms  "
+            f"mean={statistics.mean(ok) if ok else float('nan'):8.1f}ms  status={codes}"
+        )
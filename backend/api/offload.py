@@ -0,0 +1,77 @@
+"""Bounded worker pool for CPU work started from async views.
+
+Scoring and prediction run on a thread pool (numpy/scipy/sklearn release the
+GIL for most of it, and the shared index and model stay in one copy). The pool
+admits at most ``max_workers + max_queue`` jobs; beyond that callers get
+``Overloaded`` straight away and the view answers 503 with Retry-After rather
+than letting latency grow without bound.
+"""
+import asyncio, threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+
+
+class Overloaded(Exception):
+    def __init__(self, retry_after):
+        super().__init__("worker pool is full")
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    def __init__(self, max_workers=4, max_queue=64, retry_after=1):
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_queue
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="offload")
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    def _admit(self):
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                raise Overloaded(self.retry_after)
+            self.in_flight += 1
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    async def run(self, fn, *args):
+        self._admit()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # The slot is held by the job, not by the caller: a cancelled request
+        # frees it only once its job has finished (or never started)
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(future)
+
+    def stats(self):
+        return {
+            "max_workers": self.max_workers,
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+        }
+
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                config = getattr(settings, "ASYNC_OFFLOAD", {})
+                _executor = BoundedExecutor(
+                    max_workers=config.get("MAX_WORKERS", 4),
+                    max_queue=config.get("MAX_QUEUE", 64),
+                    retry_after=config.get("RETRY_AFTER", 1),
+                )
+    return _executor
@@ -0,0 +1,98 @@
+"""Positional index for phrase queries and the proximity boost.
+
+Token positions are counted in the normalised token stream the vectorizer
+sees (stopwords already removed), so "return on equity" is the adjacent
+pair ``return equiti``. They are stored per (document, term) entry in the
+row-major order of the documents x terms count matrix: entry ``e`` owns
+``count[e]`` gaps starting at ``ptr[e]`` (first gap absolute, then
+differences), in uint16 when every gap fits. A document's positions for a
+term are one searchsorted in its row plus a cumsum.
+
+Positions are only decoded for candidate rows that already contain every
+term (an intersection of postings lists), never by scanning abstracts.
+"""
+import re
+import numpy as np
+
+PHRASE = re.compile(r'"([^"]+)"')
+
+
+def encode_gaps(positions):
+    """Gap-encode one entry's ascending positions."""
+    return np.diff(positions, prepend=0)
+
+
+def compact(gaps):
+    gaps = np.asarray(gaps, dtype=np.int64)
+    return gaps.astype(np.uint16 if not len(gaps) or gaps.max() < 1 << 16 else np.uint32)
+
+
+def split_phrases(query):
+    """Quoted parts of a raw query (``"capital structure" banks`` -> ["capital structure"])."""
+    return [p.strip() for p in PHRASE.findall(query) if p.strip()]
+
+
+class PositionalIndex:
+    def __init__(self, indptr, terms, ptr, gaps):
+        self.indptr = indptr  # row -> its entries, as in a CSR matrix
+        self.terms = terms  # entry -> term id, ascending within a row
+        self.ptr = ptr  # entry -> its first gap
+        self.gaps = gaps
+
+    @classmethod
+    def from_counts(cls, counts, gaps):
+        """``counts``: documents x terms CSR with sorted columns; ``gaps`` in its entry order."""
+        counts = counts.tocsr()
+        ptr = np.concatenate([[0], np.cumsum(counts.data.astype(np.int64))])
+        return cls(counts.indptr, counts.indices, ptr, compact(gaps))
+
+    def positions(self, row, term_id):
+        """Ascending positions of ``term_id`` in document ``row`` (empty if absent)."""
+        lo, hi = self.indptr[row], self.indptr[row + 1]
+        e = lo + np.searchsorted(self.terms[lo:hi], term_id)
+        if e == hi or self.terms[e] != term_id:
+            return np.empty(0, dtype=np.int64)
+        return np.cumsum(self.gaps[self.ptr[e]:self.ptr[e + 1]], dtype=np.int64)
+
+    def phrase_rows(self, candidates, term_ids):
+        """The ``candidates`` in which ``term_ids`` occur consecutively."""
+        if len(term_ids) == 1:
+            return candidates
+        out = []
+        for row in candidates:
+            starts = self.positions(row, term_ids[0])
+            for offset, tid in enumerate(term_ids[1:], 1):
+                starts = starts[np.isin(starts + offset, self.positions(row, tid), assume_unique=True)]
+                if not len(starts):
+                    break
+            if len(starts):
+                out.append(row)
+        return np.asarray(out, dtype=np.int64)
+
+    def min_span(self, row, term_ids):
+        """Length (last - first position) of the shortest window holding every term."""
+        lists = [self.positions(row, t) for t in term_ids]
+        if any(not len(p) for p in lists):
+            return None
+        pos = np.concatenate(lists)
+        label = np.repeat(np.arange(len(lists)), [len(p) for p in lists])
+        order = np.argsort(pos, kind="stable")
+        pos, label = pos[order], label[order]
+        if len(lists) == 2:
+            # Two terms: the closest neighbours with different labels
+            differ = label[1:] != label[:-1]
+            return int(np.diff(pos)[differ].min())
+
+        # Sliding window over the merged positions
+        need, have = len(lists), np.zeros(len(lists), dtype=np.int64)
+        covered, best, left = 0, None, 0
+        for right in range(len(pos)):
+            have[label[right]] += 1
+            covered += have[label[right]] == 1
+            while covered == need:
+                span = pos[right] - pos[left]
+                best = span if best is None or span < best else best
+                have[label[left]] -= 1
+                covered -= have[label[left]] == 0
+                left += 1
+        return int(best)
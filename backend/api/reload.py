@@ -0,0 +1,157 @@
+"""Hot reload of the search index and the text classifier.
+
+Views read the shared search index and classifier through a process-wide
+reference (``search_index.get_index()``, ``classifier.get_classifier()``) once
+per request. A reload loads or builds the replacement on a background thread
+and then swaps that reference in a single assignment: requests in flight
+finish on the version they started with, and the old object is released
+when the last of them drops it. ``retiring()`` lists the superseded versions
+that still have readers.
+
+Reloads are triggered by
+
+* the watcher thread, which polls the artifacts' mtime and size every
+  ``HOT_RELOAD["INTERVAL"]`` seconds and reloads what changed (a reload
+  whose content hash matches the loaded version is a no-op);
+* ``HOT_RELOAD["SIGNAL"]`` sent to a worker process;
+* ``POST /api/admin/reload/`` (staff only), for the worker that serves it.
+"""
+import logging, os, signal, threading, weakref
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+TARGETS = ("search", "classifier")
+
+_reload_lock = threading.Lock()
+_start_lock = threading.Lock()
+_watcher = None
+_retiring = {}
+
+
+def config():
+    return {"WATCH": True, "INTERVAL": 10, "SIGNAL": None, **getattr(settings, "HOT_RELOAD", {})}
+
+
+# ------------------------------ Retirement ------------------------------
+def retire(kind, obj, version):
+    """Track a superseded ``obj`` until the last request holding it lets go."""
+    key = id(obj)
+    _retiring[key] = (kind, version)
+    weakref.finalize(obj, _retired, key, kind, version)
+
+
+def _retired(key, kind, version):
+    _retiring.pop(key, None)
+    logger.info("Retired %s version %s", kind, version)
+
+
+def retiring():
+    return [{"kind": kind, "version": version} for kind, version in list(_retiring.values())]
+
+
+# ------------------------------- Reloading -------------------------------
+def _module(target):
+    if target == "search":
+        from . import search_index
+        return search_index
+    if target == "classifier":
+        from . import classifier
+        return classifier
+    raise ValueError(f"unknown reload target {target!r}")
+
+
+def reload(targets=TARGETS, force=False):
+    """Reload ``targets`` now; returns target -> version now being served.
+
+    Reloads run one at a time. Without ``force``, a target whose artifacts
+    hash to the version already loaded is left alone.
+    """
+    versions = {}
+    with _reload_lock:
+        for target in targets:
+            try:
+                versions[target] = _module(target).reload(force=force)
+            except Exception:
+                logger.exception("Reloading %s failed; keeping the current version", target)
+                versions[target] = _module(target).current_version()
+    return versions
+
+
+def reload_in_background(targets=TARGETS, force=False):
+    thread = threading.Thread(target=reload, args=(targets, force), name="hot-reload", daemon=True)
+    thread.start()
+    return thread
+
+
+def fingerprint(paths):
+    """(mtime, size) of each path; cheap enough to poll."""
+    out = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            out.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            out.append(None)
+    return tuple(out)
+
+
+class Watcher(threading.Thread):
+    """Polls the watched artifacts and reloads the loaded targets whose files changed."""
+
+    def __init__(self, interval):
+        super().__init__(name="hot-reload-watcher", daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self.seen = {target: fingerprint(_module(target).watched_files()) for target in TARGETS}
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            changed = []
+            for target in TARGETS:
+                current = fingerprint(_module(target).watched_files())
+                if current != self.seen[target]:
+                    self.seen[target] = current
+                    # Never loaded in this process: the first request loads the new files anyway
+                    if _module(target).is_ready():
+                        changed.append(target)
+            if changed:
+                logger.info("Artifacts changed for %s; reloading", ", ".join(changed))
+                reload(changed)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def ensure_watcher():
+    """Start the watcher thread once per process, if HOT_RELOAD enables it."""
+    global _watcher
+    options = config()
+    if not options["WATCH"] or _watcher is not None:
+        return
+    with _start_lock:
+        if _watcher is None:
+            _watcher = Watcher(options["INTERVAL"])
+            _watcher.start()
+
+
+def install_signal_handler():
+    """Reload on HOT_RELOAD["SIGNAL"]; only possible from the main thread."""
+    name = config()["SIGNAL"]
+    if not name:
+        return False
+    try:
+        signal.signal(getattr(signal, name), lambda signum, frame: reload_in_background())
+    except (ValueError, AttributeError, OSError) as e:
+        logger.warning("Cannot install %s reload handler: %s", name, e)
+        return False
+    return True
+
+
+def status():
+    return {
+        "search": _module("search").current_version(),
+        "classifier": _module("classifier").current_version(),
+        "retiring": retiring(),
+        "watching": _watcher is not None and _watcher.is_alive(),
+    }
@@ -0,0 +1,169 @@
+"""Retrieval backends for SearchScholarView.
+
+Every backend exposes ``rank(terms, k, rows=None) -> (rows, scores, matched)``
+over the stemmed query terms: the best ``k`` row ids (best first), their
+scores, and the total number of documents that match at all. ``rows`` (sorted
+row ids, e.g. one author's publications) restricts ranking to those documents.
+``SEARCH_BACKEND`` picks one.
+"""
+import numpy as np
+from sklearn.metrics.pairwise import linear_kernel
+
+
+def top_k(scores, k):
+    """Row ids of the ``k`` best positive scores, best first, plus the number of matches.
+
+    A partition keeps this O(N) regardless of corpus size; only the k
+    survivors are sorted. Ties keep document order, like the stable sort
+    this replaces, including among the rows tied with the k-th best score.
+    """
+    matched = np.flatnonzero(scores > 0)
+    if k < len(matched):
+        values = scores[matched]
+        kth = -np.partition(-values, k - 1)[k - 1]
+        # Everything above the k-th best score, then the earliest rows tied with it
+        above = matched[values > kth]
+        candidates = np.concatenate([above, matched[values == kth][:k - len(above)]])
+    else:
+        candidates = matched
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order], len(matched)
+
+
+class TfidfBackend:
+    """Cosine similarity against the full TF-IDF matrix."""
+    name = "tfidf"
+
+    def __init__(self, index):
+        self.index = index
+
+    def rank(self, terms, k, rows=None):
+        query_vector = self.index.vectorizer.transform([" ".join(terms)])
+        # Rows and query are already L2-normalised, so the dot product is the
+        # cosine; unlike cosine_similarity it does not copy the (mmapped) matrix
+        if rows is not None:
+            if not len(rows):
+                return rows, np.empty(0), 0
+            scores = linear_kernel(query_vector, self.index.tfidf_matrix[rows]).ravel()
+            best, matched = top_k(scores, k)
+            return rows[best], scores[best], matched
+        scores = linear_kernel(query_vector, self.index.tfidf_matrix).ravel()
+        rows, matched = top_k(scores, k)
+        return rows, scores[rows], matched
+
+
+class InvertedIndex:
+    """Array-backed postings lists: term id -> sorted doc rows and term frequencies.
+
+    Laid out like a CSC term-document matrix (``ptr``/``docs``/``tfs``), so it
+    can be saved and memory-mapped next to the TF-IDF arrays.
+    """
+
+    def __init__(self, ptr, docs, tfs, doc_lengths, live=None):
+        self.ptr = ptr
+        self.docs = docs
+        self.tfs = tfs
+        self.doc_lengths = doc_lengths
+        # Documents that count for IDF; fewer than the rows while an
+        # incrementally updated index still carries tombstoned rows
+        self.live = live
+
+    @classmethod
+    def from_counts(cls, counts, live=None):
+        """Build from a documents x terms count matrix."""
+        csc = counts.tocsc()
+        csc.sort_indices()
+        doc_lengths = np.asarray(counts.sum(axis=1)).ravel().astype(np.float32)
+        return cls(csc.indptr, csc.indices, csc.data.astype(np.float32), doc_lengths, live)
+
+    @property
+    def n_docs(self):
+        return len(self.doc_lengths) if self.live is None else self.live
+
+    def postings(self, term_id):
+        lo, hi = self.ptr[term_id], self.ptr[term_id + 1]
+        return self.docs[lo:hi], lo, hi
+
+
+class BM25Backend:
+    """Okapi BM25 over the inverted index with MaxScore top-k pruning.
+
+    Per-posting impacts and per-term upper bounds are precomputed once, so a
+    query only sums impacts for the postings of its own terms.
+    """
+    name = "bm25"
+
+    def __init__(self, index, k1=1.2, b=0.75):
+        self.index = index
+        inv = index.postings
+        self.inv = inv
+        n = inv.n_docs
+        df = np.diff(inv.ptr).astype(np.float64)
+        self.idf = np.log1p((n - df + 0.5) / (df + 0.5))
+
+        avgdl = inv.doc_lengths.sum() / n if n else 0.0
+        norm = k1 * (1 - b + b * inv.doc_lengths / (avgdl or 1.0))
+        term_of_posting = np.repeat(np.arange(len(df)), np.diff(inv.ptr))
+        tf = inv.tfs
+        self.impacts = (self.idf[term_of_posting] * tf * (k1 + 1) / (tf + norm[inv.docs])).astype(np.float32)
+
+        # MaxScore upper bound: the largest impact in each postings list
+        self.max_impact = np.zeros(len(df), dtype=np.float32)
+        nonempty = df > 0
+        if nonempty.any():
+            self.max_impact[nonempty] = np.maximum.reduceat(self.impacts, inv.ptr[:-1][nonempty])
+
+    def _score(self, candidates, term_ids, weights):
+        scores = np.zeros(len(candidates), dtype=np.float64)
+        for tid, w in zip(term_ids, weights):
+            docs, lo, _ = self.inv.postings(tid)
+            pos = np.searchsorted(docs, candidates)
+            pos[pos == len(docs)] = 0
+            hit = docs[pos] == candidates
+            scores[hit] += w * self.impacts[lo + pos[hit]]
+        return scores
+
+    def rank(self, terms, k, rows=None):
+        vocab = self.index.vectorizer.vocabulary_
+        ids, counts = np.unique([vocab[t] for t in terms if t in vocab], return_counts=True)
+        empty = np.empty(0, dtype=np.int64)
+        if not len(ids):
+            return empty, np.empty(0), 0
+
+        if rows is not None:
+            # A filtered set is small: score it directly instead of pruning
+            scores = self._score(rows, ids, counts)
+            best, matched = top_k(scores, k)
+            return rows[best], scores[best], matched
+
+        # Repeated query terms count once per occurrence, bounds included
+        bounds = self.max_impact[ids] * counts
+        order = np.argsort(bounds, kind="stable")
+        ids, counts, bounds = ids[order], counts[order], bounds[order]
+
+        all_lists = [self.inv.postings(t)[0] for t in ids]
+
+        # Seed the threshold by fully scoring the list with the highest bound
+        seed = np.asarray(all_lists[-1])
+        seed_scores = self._score(seed, ids, counts)
+        theta = np.partition(seed_scores, len(seed) - k)[len(seed) - k] if len(seed) >= k else 0.0
+
+        # Lists whose bounds sum below theta are non-essential: a document
+        # appearing only in them can never reach the top k
+        non_essential = np.searchsorted(np.cumsum(bounds), theta, side="left")
+        candidates = np.unique(np.concatenate(all_lists[non_essential:]))
+        scores = self._score(candidates, ids, counts)
+
+        # Documents only in non-essential lists still match; count them
+        # without merging those lists into the candidates
+        outside = [docs[~np.isin(docs, candidates, assume_unique=True)] for docs in all_lists[:non_essential]]
+        matched = len(candidates) + (len(np.unique(np.concatenate(outside))) if outside else 0)
+
+        best, _ = top_k(scores, k)
+        return candidates[best], scores[best], matched
+
+
+BACKENDS = {
+    TfidfBackend.name: TfidfBackend,
+    BM25Backend.name: BM25Backend,
+}
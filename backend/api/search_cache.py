@@ -0,0 +1,133 @@
+"""Result cache for /api/search/.
+
+Keys are built from the index version, the backend, the stemmed query and the
+page, so a rebuilt index never serves stale pages: its version changes and the
+old entries are either cleared (in-process) or simply never asked for again
+and expire (Django cache).
+"""
+import hashlib, threading, time
+from collections import OrderedDict
+from django.conf import settings
+
+
+def make_key(version, backend, terms, page, filters=None, facets=False, phrases=()):
+    """``filters`` is the dict from views.search_filters(); unset filters are left out."""
+    applied = "&".join(f"{k}={v}" for k, v in sorted((filters or {}).items()) if v is not None)
+    quoted = ";".join(" ".join(p) for p in phrases)
+    return f"{version}|{backend}|{' '.join(terms)}|{page}|{applied}|{int(bool(facets))}|{quoted}"
+
+
+class QueryCache:
+    """Bounded in-process LRU with a per-entry TTL."""
+    kind = "local"
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.kind,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class DjangoQueryCache(QueryCache):
+    """Shares results between workers through a configured Django cache alias.
+
+    Eviction is left to the cache backend (file, memcached, ...); hit and miss
+    counters are per process.
+    """
+    kind = "django"
+
+    def __init__(self, alias="default", max_entries=1024, ttl=300):
+        super().__init__(max_entries, ttl)
+        from django.core.cache import caches
+        self.alias = alias
+        self._cache = caches[alias]
+
+    @staticmethod
+    def _hashed(key):
+        # memcached rejects long keys and whitespace
+        return "search:" + hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        value = self._cache.get(self._hashed(key))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._cache.set(self._hashed(key), value, timeout=self.ttl)
+
+    def clear(self):
+        # Entries are keyed by index version, so old ones just age out
+        pass
+
+    def stats(self):
+        info = super().stats()
+        info.update(entries=None, alias=self.alias)
+        return info
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide query cache configured by SEARCH_CACHE (None when disabled)."""
+    global _cache
+    if _cache is None:
+        config = dict(getattr(settings, "SEARCH_CACHE", {}))
+        if not config.get("ENABLED", True):
+            return None
+        with _cache_lock:
+            if _cache is None:
+                options = {"max_entries": config.get("MAX_ENTRIES", 1024), "ttl": config.get("TTL", 300)}
+                if config.get("BACKEND", "local") == "django":
+                    _cache = DjangoQueryCache(config.get("ALIAS", "default"), **options)
+                else:
+                    _cache = QueryCache(**options)
+    return _cache
+
+
+def stats():
+    cache = get_cache()
+    return cache.stats() if cache else {"backend": None}
@@ -0,0 +1,546 @@
+import hashlib, json, logging, os, shutil, threading, time
+from functools import cached_property
+import numpy as np
+from scipy.sparse import csr_matrix
+from django.conf import settings
+from sklearn.feature_extraction.text import TfidfVectorizer
+from . import search_cache
+from .text import get_normalizer
+from .retrieval import BACKENDS, InvertedIndex
+from .authors import AuthorIndex
+from .facets import DocValues
+from . import incremental
+from .positions import PositionalIndex
+
+logger = logging.getLogger(__name__)
+
+# Path to crawled publications
+DATA_FILE = os.path.join(settings.BASE_DIR, "..", "crawler", "data", "publications.json")
+# What the last crawl added, changed and removed (crawler/state.py)
+DELTA_FILE = os.path.join(settings.BASE_DIR, "..", "crawler", "data", "publications_delta.json")
+
+# Bump whenever the on-disk layout written by SearchIndex.save() changes
+ARTIFACT_FORMAT = 3
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+
+
+def source_hash(data_file=DATA_FILE):
+    """sha256 of publications.json, used to detect a stale artifact."""
+    h = hashlib.sha256()
+    with open(data_file, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class StaleIndexError(Exception):
+    pass
+
+
+class SearchIndex:
+    """TF-IDF index over the crawled publications.
+
+    Built once per worker process and shared read-only by every
+    SearchScholarView instance, so nothing here may be mutated after build().
+    Crawl deltas produce a new index instead (see incremental.py).
+    """
+
+    def __init__(self, data_file=DATA_FILE):
+        self.data_file = data_file
+        self.normalizer = get_normalizer()
+        self.documents = {}
+        self.preprocessed_docs = []
+        self.vectorizer = None
+        self.tfidf_matrix = None
+        self.postings = None
+        self.positions = None
+        self.build_seconds = None
+        self.source_sha256 = None
+        self.loaded_from = None
+        # Set once incremental updates apply: raw count segments, dead rows,
+        # live document frequencies, and how many deltas since the last build
+        self.segments = None
+        self.tombstones = None
+        self.df = None
+        self.generation = 0
+        self._backends = {}
+
+    def load_documents(self):
+        with open(self.data_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            self.documents = {i: pub for i, pub in enumerate(data, 1)}
+        else:
+            self.documents = {1: data}
+        return self.documents
+
+    def pre_process(self, text):
+        return self.normalizer.normalize(text)
+
+    @property
+    def version(self):
+        if not self.source_sha256:
+            return None
+        if self.generation:
+            return f"{self.source_sha256[:12]}+{self.generation}"
+        return self.source_sha256[:12]
+
+    def build(self):
+        started = time.perf_counter()
+        self.source_sha256 = source_hash(self.data_file)
+        self.load_documents()
+        if self.documents:
+            self.preprocessed_docs = [
+                " ".join(self.pre_process(doc.get("title", "") + " " + doc.get("abstract", "")))
+                for doc in self.documents.values()
+            ]
+            self.vectorizer = TfidfVectorizer()
+            self.tfidf_matrix = self.vectorizer.fit_transform(self.preprocessed_docs)
+            # Raw term counts and token positions over the same vocabulary feed
+            # the BM25 postings and the positional index
+            counts, gaps = incremental.count_rows(self.preprocessed_docs, dict(self.vectorizer.vocabulary_))
+            self.postings = InvertedIndex.from_counts(counts)
+            self.positions = PositionalIndex.from_counts(counts, gaps)
+        self.build_seconds = time.perf_counter() - started
+        return self
+
+    def backend(self, name=None):
+        """Retrieval backend ``name`` (default: SEARCH_BACKEND), created once per index."""
+        name = name or getattr(settings, "SEARCH_BACKEND", "tfidf")
+        if name not in self._backends:
+            options = getattr(settings, "SEARCH_BACKEND_OPTIONS", {}).get(name, {})
+            self._backends[name] = BACKENDS[name](self, **options)
+        return self._backends[name]
+
+    def rank(self, terms, k, backend=None, rows=None, phrases=()):
+        """Best ``k`` rows for ``terms``, restricted to ``rows`` and to documents containing ``phrases``.
+
+        With SEARCH_PROXIMITY on, the top DEPTH results of a multi-term
+        query are re-ranked by how close together the terms occur.
+        """
+        if phrases:
+            rows = self.phrase_rows(phrases, rows)
+        options = getattr(settings, "SEARCH_PROXIMITY", {})
+        weight, depth = options.get("WEIGHT", 0.0), options.get("DEPTH", 100)
+        vocab = self.vectorizer.vocabulary_
+        ids = list(dict.fromkeys(vocab[t] for t in terms if t in vocab))
+        if not weight or len(ids) < 2:
+            return self.backend(backend).rank(terms, k, rows)
+
+        # Re-rank a fixed-size head so every page sees the same order
+        ranked, scores, matched = self.backend(backend).rank(terms, max(k, depth), rows)
+        head, rest = ranked[:depth], ranked[depth:]
+        closeness = np.zeros(len(head))
+        # Only rows holding every term have a span; find them from the postings
+        has_all = head
+        for tid in ids:
+            has_all = np.intersect1d(has_all, self.postings.postings(tid)[0], assume_unique=True)
+        for i in np.flatnonzero(np.isin(head, has_all)):
+            span = self.positions.min_span(head[i], ids)
+            closeness[i] = (len(ids) - 1) / max(span, len(ids) - 1)
+        boosted = scores[:depth] * (1 + weight * closeness)
+        order = np.argsort(-boosted, kind="stable")
+        ranked = np.concatenate([head[order], rest])[:k]
+        scores = np.concatenate([boosted[order], scores[depth:]])[:k]
+        return ranked, scores, matched
+
+    def phrase_rows(self, phrases, rows=None):
+        """Sorted rows (within ``rows``) containing every phrase, each a list of query stems.
+
+        Stems the vectorizer ignores (one character) are skipped; a phrase
+        with a stem outside the vocabulary matches nothing.
+        """
+        vocab = self.vectorizer.vocabulary_
+        for stems in phrases:
+            stems = [t for t in stems if len(t) > 1]
+            if not stems:
+                continue
+            if any(t not in vocab for t in stems):
+                return np.empty(0, dtype=np.int64)
+            ids = [vocab[t] for t in stems]
+            lists = sorted((self.postings.postings(t)[0] for t in set(ids)), key=len)
+            if rows is not None:
+                lists.insert(0, rows)
+            candidates = lists[0]
+            for docs in lists[1:]:
+                candidates = np.intersect1d(candidates, docs, assume_unique=True)
+            rows = self.positions.phrase_rows(candidates, ids)
+        return rows
+
+    @cached_property
+    def authors(self):
+        """Canonical author id -> publication rows, derived from the documents."""
+        return AuthorIndex(self.documents)
+
+    @cached_property
+    def doc_values(self):
+        """Year / author / has-abstract columns and filter bitmaps over the rows."""
+        return DocValues(self.documents, self.tfidf_matrix.shape[0], self.authors)
+
+    def matching_rows(self, terms, phrases=()):
+        """Sorted rows containing any of ``terms``: exactly the rows either backend scores above zero."""
+        vocab = self.vectorizer.vocabulary_
+        ids = {vocab[t] for t in terms if t in vocab}
+        if not ids:
+            return np.empty(0, dtype=np.int64)
+        rows = np.unique(np.concatenate([self.postings.postings(t)[0] for t in ids]))
+        return self.phrase_rows(phrases, rows) if phrases else rows
+
+    @cached_property
+    def suggester(self):
+        """Prefix completions over terms, titles and authors for /api/suggest/."""
+        from .suggest import Suggester
+        options = getattr(settings, "SEARCH_SUGGEST", {})
+        return Suggester(self, k=options.get("MAX_RESULTS", 10), scan_limit=options.get("SCAN_LIMIT", 64))
+
+    @cached_property
+    def rows_by_link(self):
+        return {doc.get("link"): doc_id - 1 for doc_id, doc in self.documents.items()}
+
+    # --------------------------- On-disk artifact ---------------------------
+    def save(self, root):
+        """Write the fitted index to ``root/<version>/`` and point CURRENT at it.
+
+        Arrays are plain .npy files so workers can memory-map them and share
+        pages through the OS page cache. The version directory is written
+        under a temporary name and renamed into place, so a reader never sees
+        a half-written artifact. Tombstoned rows are merged away first, since
+        the artifact stores documents by position.
+        """
+        if self.tombstones is not None and self.tombstones.any():
+            return incremental.merge(self).save(root)
+        os.makedirs(root, exist_ok=True)
+        target = os.path.join(root, self.version)
+        tmp = target + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        matrix = self.tfidf_matrix.tocsr()
+        np.save(os.path.join(tmp, "data.npy"), matrix.data)
+        np.save(os.path.join(tmp, "indices.npy"), matrix.indices)
+        np.save(os.path.join(tmp, "indptr.npy"), matrix.indptr)
+        np.save(os.path.join(tmp, "idf.npy"), self.vectorizer.idf_)
+        np.save(os.path.join(tmp, "postings_ptr.npy"), self.postings.ptr)
+        np.save(os.path.join(tmp, "postings_docs.npy"), self.postings.docs)
+        np.save(os.path.join(tmp, "postings_tfs.npy"), self.postings.tfs)
+        np.save(os.path.join(tmp, "doc_lengths.npy"), self.postings.doc_lengths)
+        np.save(os.path.join(tmp, "positions_indptr.npy"), self.positions.indptr)
+        np.save(os.path.join(tmp, "positions_terms.npy"), self.positions.terms)
+        np.save(os.path.join(tmp, "positions_ptr.npy"), self.positions.ptr)
+        np.save(os.path.join(tmp, "positions_gaps.npy"), self.positions.gaps)
+
+        # Terms in column order, so the list index is the vocabulary id
+        terms = sorted(self.vectorizer.vocabulary_, key=self.vectorizer.vocabulary_.get)
+        with open(os.path.join(tmp, "vocabulary.json"), "w", encoding="utf-8") as f:
+            json.dump(terms, f, ensure_ascii=False)
+        with open(os.path.join(tmp, "documents.json"), "w", encoding="utf-8") as f:
+            json.dump(list(self.documents.values()), f, ensure_ascii=False)
+
+        manifest = {
+            "format": ARTIFACT_FORMAT,
+            "version": self.version,
+            "source_sha256": self.source_sha256,
+            "documents": len(self.documents),
+            "terms": len(terms),
+            "shape": list(matrix.shape),
+            "tokenizer": self.normalizer.tokenizer,
+            "build_seconds": self.build_seconds,
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        with open(os.path.join(tmp, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp, target)
+        with open(os.path.join(root, CURRENT_FILE + ".tmp"), "w", encoding="utf-8") as f:
+            f.write(self.version)
+        os.replace(os.path.join(root, CURRENT_FILE + ".tmp"), os.path.join(root, CURRENT_FILE))
+        return target
+
+    @classmethod
+    def load(cls, root, data_file=DATA_FILE, mmap_mode="r", check_source=True):
+        """Load the artifact CURRENT points at, refusing it if publications.json changed.
+
+        ``check_source=False`` accepts an outdated artifact, for bringing it up
+        to date with a crawl delta.
+        """
+        started = time.perf_counter()
+        with open(os.path.join(root, CURRENT_FILE), "r", encoding="utf-8") as f:
+            path = os.path.join(root, f.read().strip())
+        with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        if manifest.get("format") != ARTIFACT_FORMAT:
+            raise StaleIndexError(f"artifact format {manifest.get('format')} != {ARTIFACT_FORMAT}")
+        if check_source and os.path.exists(data_file) and manifest["source_sha256"] != source_hash(data_file):
+            raise StaleIndexError("publications.json changed since the artifact was built")
+
+        index = cls(data_file)
+        if manifest.get("tokenizer") != index.normalizer.tokenizer:
+            raise StaleIndexError(
+                f"artifact was tokenized with {manifest.get('tokenizer')!r}, "
+                f"SEARCH_TOKENIZER is {index.normalizer.tokenizer!r}"
+            )
+        index.source_sha256 = manifest["source_sha256"]
+        index.loaded_from = path
+        with open(os.path.join(path, "documents.json"), "r", encoding="utf-8") as f:
+            index.documents = {i: pub for i, pub in enumerate(json.load(f), 1)}
+        with open(os.path.join(path, "vocabulary.json"), "r", encoding="utf-8") as f:
+            terms = json.load(f)
+
+        arrays = {
+            name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode)
+            for name in ("data", "indices", "indptr", "idf",
+                         "postings_ptr", "postings_docs", "postings_tfs", "doc_lengths",
+                         "positions_indptr", "positions_terms", "positions_ptr", "positions_gaps")
+        }
+        index.tfidf_matrix = csr_matrix(
+            (arrays["data"], arrays["indices"], arrays["indptr"]),
+            shape=tuple(manifest["shape"]), copy=False,
+        )
+        index.vectorizer = TfidfVectorizer()
+        index.vectorizer.vocabulary_ = {t: i for i, t in enumerate(terms)}
+        index.vectorizer.idf_ = np.asarray(arrays["idf"])
+        index.postings = InvertedIndex(
+            arrays["postings_ptr"], arrays["postings_docs"], arrays["postings_tfs"], arrays["doc_lengths"],
+        )
+        # Plain ndarray views of the maps: the positional index is sliced per
+        # candidate row, and memmap slices are needlessly slow to create
+        index.positions = PositionalIndex(*(
+            np.asarray(arrays[name]) for name in ("positions_indptr", "positions_terms", "positions_ptr", "positions_gaps")
+        ))
+        index.build_seconds = time.perf_counter() - started
+        return index
+
+
+# =========================== Process-wide holder ===========================
+_index = None
+_lock = threading.Lock()
+
+
+def artifact_dir():
+    return getattr(settings, "SEARCH_INDEX_DIR", None)
+
+
+def load_or_build():
+    """Prefer the prebuilt artifact; fall back to fitting in-process if it is missing or stale."""
+    root = artifact_dir()
+    if root and getattr(settings, "SEARCH_INDEX_USE_ARTIFACT", True):
+        try:
+            return SearchIndex.load(root, data_file=DATA_FILE)
+        except FileNotFoundError:
+            logger.info("No search index artifact in %s; building in-process", root)
+        except StaleIndexError as e:
+            logger.warning("Ignoring search index artifact in %s: %s", root, e)
+    return SearchIndex(DATA_FILE).build()
+
+
+def get_index():
+    """Return the shared index, loading or building it on first use."""
+    if _index is None:
+        with _lock:
+            if _index is None:
+                set_index(load_or_build())
+        from .reload import ensure_watcher
+        ensure_watcher()
+    return _index
+
+
+def merge_policy():
+    return {"MAX_SEGMENTS": 8, "MAX_DEAD_RATIO": 0.2, "BACKGROUND": True,
+            **getattr(settings, "SEARCH_INDEX_MERGE", {})}
+
+
+def _warm(index):
+    """Build what the first query would otherwise pay for, before publishing."""
+    index.backend()
+    index.doc_values
+    index.suggester
+    return index
+
+
+_writer_lock = threading.Lock()
+_merge_thread = None
+
+
+def apply_changes(upserts, removals):
+    """Apply added/updated records and removed links to the live index without a refit.
+
+    Requests in flight keep the snapshot they started with; the new one is
+    warmed and then published with a single assignment. Writers are
+    serialised, and a merge is scheduled once segments or tombstones pile up.
+    """
+    with _writer_lock:
+        snapshot = _warm(incremental.apply_changes(get_index(), upserts, removals))
+        set_index(snapshot)
+    _maybe_merge(snapshot)
+    return snapshot
+
+
+def _maybe_merge(snapshot):
+    policy = merge_policy()
+    if incremental.needs_merge(snapshot, policy["MAX_SEGMENTS"], policy["MAX_DEAD_RATIO"]):
+        if policy["BACKGROUND"]:
+            schedule_merge()
+        else:
+            merge_now()
+
+
+def apply_delta(path=DELTA_FILE, data_file=DATA_FILE):
+    """Apply a crawler publications_delta.json to the live index."""
+    with open(path, "r", encoding="utf-8") as f:
+        delta = json.load(f)
+    return apply_changes(*incremental.delta_changes(delta, data_file))
+
+
+def merge_now():
+    """Compact the live index's segments and drop tombstoned rows."""
+    with _writer_lock:
+        current = _index
+        merged = incremental.merge(current)
+        if merged is not current:
+            set_index(_warm(merged))
+        return merged
+
+
+def schedule_merge():
+    """Run merge_now() on a background thread, unless one is already running."""
+    global _merge_thread
+    with _lock:
+        if _merge_thread is not None and _merge_thread.is_alive():
+            return
+        _merge_thread = threading.Thread(target=merge_now, name="search-index-merge", daemon=True)
+        _merge_thread.start()
+
+
+def set_index(index):
+    """Publish ``index`` to every view; cached results from another version are dropped."""
+    global _index
+    previous, _index = _index, index
+    if previous is not None and previous is not index:
+        from .reload import retire
+        retire("search", previous, previous.version)
+    if previous is not None and previous.version != index.version:
+        cache = search_cache.get_cache()
+        if cache:
+            cache.clear()
+
+
+def use_artifact():
+    return bool(artifact_dir()) and getattr(settings, "SEARCH_INDEX_USE_ARTIFACT", True)
+
+
+def watched_files():
+    """Files whose change means a newer index.
+
+    With an artifact, only its CURRENT pointer: a crawl is folded into the
+    artifact once (``apply_search_delta`` or ``build_search_index``) and every
+    worker then maps the result. Without one, publications.json and the crawl
+    delta, which reload() applies to the live index.
+    """
+    if use_artifact():
+        return [os.path.join(artifact_dir(), CURRENT_FILE)]
+    return [DATA_FILE, DELTA_FILE]
+
+
+def current_version():
+    return _index.version if _index else None
+
+
+def reload(force=False):
+    """Bring the live index up to date off to the side, then swap it in.
+
+    With an artifact, the one CURRENT points at is loaded; an artifact older
+    than publications.json is refused and the live index kept until the
+    artifact catches up (``force`` builds in-process instead). Without one,
+    the crawl delta is applied to the live index, and only when it does not
+    account for publications.json (or with ``force``) is the index rebuilt.
+    Skipped without ``force`` when the live index is already current.
+    """
+    current = _index
+    if not force and current is not None and _up_to_date(current):
+        return current.version
+    if use_artifact():
+        fresh = _load_published(None if force else current)
+        if fresh is current:
+            return current.version
+        fresh = _warm(fresh)
+        with _writer_lock:
+            set_index(fresh)
+    else:
+        with _writer_lock:
+            fresh = None if force or current is None else _catch_up(current)
+            fresh = _warm(fresh or SearchIndex(DATA_FILE).build())
+            set_index(fresh)
+        _maybe_merge(fresh)
+    logger.info("Search index reloaded: %s -> %s", current.version if current else None, fresh.version)
+    return fresh.version
+
+
+def _load_published(current):
+    root = artifact_dir()
+    try:
+        return SearchIndex.load(root, data_file=DATA_FILE)
+    except (FileNotFoundError, StaleIndexError) as e:
+        if current is not None:
+            logger.warning("Not reloading the search index artifact in %s (%s); keeping %s",
+                           root, e, current.version)
+            return current
+        logger.warning("Cannot load the search index artifact in %s (%s); building in-process", root, e)
+        return SearchIndex(DATA_FILE).build()
+
+
+def _catch_up(index):
+    """``index`` with the crawl delta applied, or None if that does not give publications.json.
+
+    The result is only stamped with publications.json's sha once every
+    record it indexes matches the file, not just its links.
+    """
+    try:
+        sha, records = incremental.read_source(index.data_file)
+        with open(DELTA_FILE, "r", encoding="utf-8") as f:
+            delta = json.load(f)
+    except FileNotFoundError:
+        return None
+    snapshot = incremental.apply_changes(index, *incremental.delta_changes(delta, index.data_file))
+    extra, missing, changed = incremental.differences(snapshot, records)
+    if extra or missing or changed:
+        logger.info("Crawl delta run %s does not account for %s (%d extra, %d missing, %d changed); rebuilding",
+                    delta.get("run"), index.data_file, extra, missing, changed)
+        return None
+    snapshot.source_sha256 = sha
+    return snapshot
+
+
+def _up_to_date(index):
+    if use_artifact():
+        # The artifact CURRENT points at is the one loaded (or there is none to load)
+        try:
+            with open(os.path.join(artifact_dir(), CURRENT_FILE), "r", encoding="utf-8") as f:
+                return os.path.join(artifact_dir(), f.read().strip()) == index.loaded_from
+        except FileNotFoundError:
+            return True
+    try:
+        return index.source_sha256 == source_hash(index.data_file)
+    except FileNotFoundError:
+        return True
+
+
+def is_ready():
+    return _index is not None and _index.vectorizer is not None
+
+
+def status():
+    return {
+        "ready": is_ready(),
+        "documents": len(_index.documents) if _index else 0,
+        "build_seconds": _index.build_seconds if _index else None,
+        "version": _index.version if _index else None,
+        "artifact": _index.loaded_from if _index else None,
+        "segments": len(_index.segments) if _index and _index.segments is not None else 1,
+        "tombstones": int(_index.tombstones.sum()) if _index and _index.tombstones is not None else 0,
+        "backend": getattr(settings, "SEARCH_BACKEND", "tfidf"),
+        "cache": search_cache.stats(),
+        "stem_cache": _index.normalizer.cache_info() if _index else None,
+    }
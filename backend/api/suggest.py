@@ -0,0 +1,176 @@
+"""Type-ahead completions for /api/suggest/.
+
+Each kind of suggestion (query terms, publication titles, author names) is a
+``PrefixCompleter``: keys folded to lowercase ASCII words in one sorted list,
+so the keys sharing a prefix form one contiguous range found with two
+bisects. Every prefix whose range is larger than ``scan_limit`` keys gets its
+top-k completions precomputed at build time (these are the short, hot
+prefixes of the first keystrokes); a narrower range is ranked on the fly.
+A lookup is therefore two bisects plus at most ``scan_limit`` weights.
+
+Built once per loaded index, from
+
+* terms: the words of titles and abstracts, grouped by the stem they index
+  as and weighted by that stem's document frequency; every spelling is a
+  key, the most common one is shown;
+* titles: keyed by each word position, so "risk" completes "Credit risk
+  and ..."; weighted by year;
+* authors: keyed by full name and surname, weighted by publication count.
+"""
+import re, unicodedata
+from bisect import bisect_left
+from collections import Counter, defaultdict
+import numpy as np
+
+from .facets import parse_year
+
+WORD = re.compile(r"[a-z0-9]+")
+END = "\uffff"  # sorts after every folded key
+
+
+def fold(text):
+    """Lowercase ASCII words separated by single spaces."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join(WORD.findall(text))
+
+
+class PrefixCompleter:
+    """Top-k completions per prefix over (key, weight, value id) entries."""
+
+    def __init__(self, entries, values, k=10, scan_limit=64):
+        entries = sorted(entries, key=lambda e: e[0])
+        self.keys = [key for key, _, _ in entries]
+        self.weights = np.asarray([w for _, w, _ in entries], dtype=np.float64)
+        self.value_ids = np.asarray([v for _, _, v in entries], dtype=np.int64)
+        self.values = values
+        self.k = k
+        self.scan_limit = scan_limit
+        self.top = {}
+        self._precompute("", 0, len(self.keys))
+
+    def _precompute(self, prefix, lo, hi):
+        # Iterative walk over the implicit trie: one node per distinct prefix
+        # whose key range is still too wide to scan per keystroke
+        stack = [(prefix, lo, hi)]
+        while stack:
+            prefix, lo, hi = stack.pop()
+            if hi - lo <= self.scan_limit:
+                continue
+            self.top[prefix] = self._rank(lo, hi, self.k)
+            depth = len(prefix)
+            i = lo
+            while i < hi:
+                if len(self.keys[i]) <= depth:
+                    i += 1
+                    continue
+                child = prefix + self.keys[i][depth]
+                j = bisect_left(self.keys, child + END, i, hi)
+                stack.append((child, i, j))
+                i = j
+
+    def _rank(self, lo, hi, limit):
+        """Distinct value ids of the best entries in [lo, hi), heaviest first."""
+        order = lo + np.argsort(-self.weights[lo:hi], kind="stable")
+        seen, out = set(), []
+        for vid in self.value_ids[order]:
+            if vid not in seen:
+                seen.add(vid)
+                out.append(int(vid))
+                if len(out) == limit:
+                    break
+        return out
+
+    def complete(self, prefix, limit=None):
+        limit = min(limit or self.k, self.k)
+        if prefix in self.top:
+            return [self.values[v] for v in self.top[prefix][:limit]]
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + END, lo)
+        return [self.values[v] for v in self._rank(lo, hi, limit)]
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class Suggester:
+    """Term, title and author completers for one index snapshot."""
+
+    def __init__(self, index, k=10, scan_limit=64):
+        self.terms = self._terms(index, k, scan_limit)
+        self.titles = self._titles(index, k, scan_limit)
+        self.authors = self._authors(index, k, scan_limit)
+
+    @staticmethod
+    def _terms(index, k, scan_limit):
+        vocab = index.vectorizer.vocabulary_
+        df = np.diff(np.asarray(index.postings.ptr))
+        normalizer = index.normalizer
+        spellings = Counter()
+        for doc in index.documents.values():
+            spellings.update(WORD.findall(fold(doc.get("title", "") + " " + doc.get("abstract", ""))))
+
+        by_stem = defaultdict(list)
+        for word, count in spellings.items():
+            if word in normalizer.stop_words or word.isdigit():
+                continue
+            stem = normalizer.stem(word)
+            if stem in vocab and df[vocab[stem]] > 0:
+                by_stem[stem].append((count, word))
+
+        values, entries = [], []
+        for stem, words in by_stem.items():
+            most, shown = max(words)
+            vid = len(values)
+            values.append({"term": shown, "documents": int(df[vocab[stem]])})
+            for count, word in words:
+                # Stem document frequency first, spelling frequency breaks ties
+                entries.append((word, df[vocab[stem]] + count / (1 + most), vid))
+        return PrefixCompleter(entries, values, k, scan_limit)
+
+    @staticmethod
+    def _titles(index, k, scan_limit):
+        values, entries = [], []
+        for doc in index.documents.values():
+            words = fold(doc.get("title", "")).split()
+            if not words:
+                continue
+            vid = len(values)
+            values.append({"title": doc.get("title"), "link": doc.get("link")})
+            weight = parse_year(doc.get("published_date"))
+            for i in range(len(words)):
+                entries.append((" ".join(words[i:]), weight - (i > 0) * 0.5, vid))
+        return PrefixCompleter(entries, values, k, scan_limit)
+
+    @staticmethod
+    def _authors(index, k, scan_limit):
+        authors = index.authors
+        values, entries = [], []
+        for aid, rows in authors.rows.items():
+            vid = len(values)
+            values.append({"id": aid, "name": authors.names[aid], "publications": len(rows)})
+            for name in authors.variants[aid]:
+                words = fold(name).split()
+                if words:
+                    entries.append((" ".join(words), len(rows), vid))
+                    entries.append((words[-1], len(rows) - 0.5, vid))
+        return PrefixCompleter(entries, values, k, scan_limit)
+
+    def suggest(self, query, limit=5):
+        """Completions of the partial ``query`` for each kind.
+
+        Terms complete the last word and keep the words before it; titles
+        and authors match the whole query as a prefix.
+        """
+        key = fold(query)
+        if not key:
+            return {"terms": [], "titles": [], "authors": []}
+        head, _, last = key.rpartition(" ")
+        terms = []
+        for t in self.terms.complete(last, limit):
+            terms.append({**t, "query": f"{head} {t['term']}" if head else t["term"]})
+        return {
+            "terms": terms,
+            "titles": self.titles.complete(key, limit),
+            "authors": self.authors.complete(key, limit),
+        }
@@ -1,3 +1,893 @@
-from django.test import TestCase
+import asyncio, copy, io, json, math, os, shutil, tempfile, threading, time
+from collections import Counter
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from scipy.sparse import csr_matrix
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, override_settings
+
+from . import classifier, incremental, offload, reload as hot_reload, search_cache, search_index
+from .authors import author_id
+from .coalescer import MicroBatcher
+from .offload import BoundedExecutor, Overloaded
+from .positions import PositionalIndex, compact, encode_gaps
+from .retrieval import top_k
+from .suggest import PrefixCompleter
+from .management.commands.bench_text_normalization import nltk_baseline
+from .text import TextNormalizer
+
+# A small crawl in the shape of crawler/data/publications.json
+TOPICS = [
+    ("Credit risk and bank capital",
+     "We study credit risk in European banks and how capital structure changed after the financial crisis."),
+    ("Return on equity in emerging markets",
+     "Return on equity of listed firms in emerging markets is explained by leverage and ownership."),
+    ("Corporate governance and audit quality",
+     "Board independence improves audit quality; weak corporate governance raises the cost of capital."),
+    ("Monetary policy transmission",
+     "Monetary policy shocks reach bank lending through the credit channel and household balance sheets."),
+    ("Refugee finance and crowdfunding",
+     "A crowdfunding model can close the refugee finance gap where banks do not lend."),
+    ("Supply chain resilience",
+     "Firms with diversified suppliers recovered faster; supply chain resilience is priced by equity markets."),
+    ("Machine learning for credit scoring",
+     "Gradient boosting improves credit scoring accuracy over logistic regression for small business loans."),
+    ("Carbon disclosure and firm value",
+     ""),
+]
+AUTHORS = [
+    {"name": "Alice Smith", "profile": "https://portal.test/en/persons/alice-smith"},
+    {"name": "Bob Jones", "profile": ""},
+    {"name": "Chloé Martin", "profile": ""},
+    {"name": "Dev Patel", "profile": "https://portal.test/en/persons/dev-patel"},
+]
+
+
+def link(i):
+    return f"https://portal.test/en/publications/p{i}"
+
+
+def publications(n=32):
+    out = []
+    for i in range(n):
+        title, abstract = TOPICS[i % len(TOPICS)]
+        out.append({
+            "title": f"{title} {['evidence', 'revisited', 'a survey', 'new results'][i // len(TOPICS) % 4]}",
+            "link": link(i),
+            "authors": [dict(AUTHORS[i % len(AUTHORS)]), dict(AUTHORS[(i + 1) % len(AUTHORS)])],
+            "published_date": f"{1 + i % 28} Mar {2016 + i // 3 % 8}",
+            "abstract": abstract,
+        })
+    return out
+
+
+def crawl(records, run=2):
+    """Crawl ``run`` after ``records``: (publications.json, publications_delta.json)."""
+    records = copy.deepcopy(records)
+    removed = [records[i]["link"] for i in (3, 10, 17)]
+    records = [r for r in records if r["link"] not in removed]
+    updated = [records[1], records[12]]
+    for r in updated:
+        r["abstract"] += " Return on equity falls as the bank capital ratio rises."
+    added = []
+    for i in range(3):
+        r = copy.deepcopy(records[i])
+        r["link"] = link(100 * run + i)
+        r["title"] = "Zebrafish credit networks " + r["title"]
+        added.append(r)
+    records += added
+    return records, {"run": run, "added": added, "updated": updated, "removed": removed}
+
+
+def write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+class IndexTestCase(SimpleTestCase):
+    """Temporary publications.json / delta / artifact dir, and a clean process-wide index."""
+    # Settings of the subclass on top of these (a class-level override_settings would lose to them)
+    index_settings = {}
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.data_file = os.path.join(self.tmp, "publications.json")
+        self.delta_file = os.path.join(self.tmp, "publications_delta.json")
+        self.root = os.path.join(self.tmp, "search_index")
+        write_json(self.data_file, publications())
+        self.run = 1
+        for name, value in (("DATA_FILE", self.data_file), ("DELTA_FILE", self.delta_file), ("_index", None)):
+            patcher = mock.patch.object(search_index, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        settings = override_settings(**{
+            "SEARCH_INDEX_DIR": self.root,
+            "HOT_RELOAD": {"WATCH": False},
+            "SEARCH_INDEX_MERGE": {"BACKGROUND": False},
+            **self.index_settings,
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def next_crawl(self):
+        with open(self.data_file, "r", encoding="utf-8") as f:
+            records, delta = crawl(json.load(f), self.run + 1)
+        self.run += 1
+        write_json(self.delta_file, delta)
+        write_json(self.data_file, records)
+        return records
+
+    def no_refit(self):
+        return mock.patch.object(search_index.SearchIndex, "build", side_effect=AssertionError("refit"))
+
+
+class ReloadTests(IndexTestCase):
+    def test_status_after_the_watcher_stops(self):
+        watcher = hot_reload.Watcher(interval=0.01)
+        with mock.patch.object(hot_reload, "_watcher", watcher):
+            watcher.start()
+            self.assertTrue(hot_reload.status()["watching"])
+            watcher.stop()
+            watcher.join(timeout=5)
+            self.assertFalse(watcher.is_alive())
+            self.assertFalse(hot_reload.status()["watching"])
+
+    def test_artifact_mode_watches_only_the_current_pointer(self):
+        self.assertEqual(search_index.watched_files(), [os.path.join(self.root, search_index.CURRENT_FILE)])
+        with override_settings(SEARCH_INDEX_DIR=None):
+            self.assertEqual(search_index.watched_files(), [self.data_file, self.delta_file])
+
+    def test_artifact_mode_waits_for_the_artifact_instead_of_refitting(self):
+        search_index.SearchIndex(self.data_file).build().save(self.root)
+        loaded = search_index.get_index()
+        self.assertIsNotNone(loaded.loaded_from)
+
+        records = self.next_crawl()
+        with self.no_refit():
+            self.assertEqual(search_index.reload(), loaded.version)
+            self.assertIs(search_index.get_index(), loaded)
+
+            call_command("apply_search_delta", source=self.data_file, delta=self.delta_file, stdout=io.StringIO())
+            search_index.reload()
+        fresh = search_index.get_index()
+        self.assertIsNot(fresh, loaded)
+        self.assertNotEqual(fresh.loaded_from, loaded.loaded_from)
+        self.assertEqual(set(fresh.rows_by_link), {r["link"] for r in records})
+
+    @override_settings(SEARCH_INDEX_DIR=None)
+    def test_without_artifact_the_crawl_delta_is_applied(self):
+        built = search_index.get_index()
+        records = self.next_crawl()
+        with self.no_refit():
+            version = search_index.reload()
+        fresh = search_index.get_index()
+        self.assertEqual(fresh.version, version)
+        self.assertEqual(fresh.generation, built.generation + 1)
+        self.assertEqual(set(fresh.rows_by_link), {r["link"] for r in records})
+        # Caught up: a second reload is a no-op
+        self.assertEqual(search_index.reload(), version)
+
+    @override_settings(SEARCH_INDEX_DIR=None)
+    def test_without_artifact_a_delta_that_does_not_match_rebuilds(self):
+        search_index.get_index()
+        records = self.next_crawl()
+        write_json(self.delta_file, {"run": 3, "added": [], "updated": [], "removed": []})
+        search_index.reload()
+        fresh = search_index.get_index()
+        self.assertEqual(fresh.generation, 0)
+        self.assertEqual(set(fresh.rows_by_link), {r["link"] for r in records})
+
+    @override_settings(SEARCH_INDEX_DIR=None)
+    def test_without_artifact_a_change_the_delta_misses_rebuilds(self):
+        search_index.get_index()
+        records = self.next_crawl()
+        records[5]["abstract"] = "Zebrafish appear only in the rewritten abstract."
+        write_json(self.data_file, records)
+        search_index.reload()
+        fresh = search_index.get_index()
+        self.assertEqual(fresh.generation, 0)
+        self.assertEqual(fresh.source_sha256, search_index.source_hash(self.data_file))
+        self.assertEqual(fresh.documents[fresh.rows_by_link[records[5]["link"]] + 1], records[5])
+        self.assertTrue(incremental.indexes_exactly(fresh, self.data_file))
+
+
+
+class IncrementalTests(IndexTestCase):
+    """Crawl deltas applied as segments rank exactly like a rebuild of the new publications.json."""
+    queries = ["credit risk bank capital", "return on equity", "zebrafish credit", "audit quality governance",
+               "monetary policy", "capital"]
+    phrases = ["return on equity", "bank capital", "credit scoring", "capital bank"]
+
+    def results(self, index, backend):
+        out = {}
+        for query in self.queries:
+            rows, scores, matched = index.rank(index.pre_process(query), len(index.documents), backend=backend)
+            out["q", query] = ([index.documents[r + 1]["link"] for r in rows], scores, matched)
+        for phrase in self.phrases:
+            rows = index.phrase_rows([index.pre_process(phrase)])
+            out["p", phrase] = {index.documents[r + 1]["link"] for r in rows}
+        return out
+
+    def assertSameResults(self, index, rebuilt):
+        self.assertEqual(set(index.rows_by_link), set(rebuilt.rows_by_link))
+        for backend in ("tfidf", "bm25"):
+            got, expected = self.results(index, backend), self.results(rebuilt, backend)
+            for query in self.queries:
+                with self.subTest(backend=backend, query=query):
+                    (links, scores, matched), (want_links, want_scores, want_matched) = got["q", query], expected["q", query]
+                    self.assertEqual(matched, want_matched)
+                    np.testing.assert_allclose(scores, want_scores, rtol=1e-5)
+                    # Same rank for every link; tied scores may list in either row order
+                    self.assertEqual(dict(zip(links, np.round(scores, 5))), dict(zip(want_links, np.round(want_scores, 5))))
+            for phrase in self.phrases:
+                with self.subTest(backend=backend, phrase=phrase):
+                    self.assertEqual(got["p", phrase], expected["p", phrase])
+
+    def test_apply_changes_and_merge_match_a_rebuild(self):
+        index = search_index.SearchIndex(self.data_file).build()
+        for generation in (1, 2):
+            records = self.next_crawl()
+            with open(self.delta_file, "r", encoding="utf-8") as f:
+                upserts, removals = incremental.delta_changes(json.load(f), self.data_file)
+            index = incremental.apply_changes(index, upserts, removals)
+            rebuilt = search_index.SearchIndex(self.data_file).build()
+
+            self.assertEqual(index.generation, generation)
+            self.assertEqual(len(index.segments), generation + 1)
+            self.assertTrue(index.tombstones.any())
+            self.assertEqual(set(index.rows_by_link), {r["link"] for r in records})
+            self.assertSameResults(index, rebuilt)
+
+        merged = incremental.merge(index)
+        self.assertEqual(len(merged.segments), 1)
+        self.assertFalse(merged.tombstones.any())
+        self.assertEqual(len(merged.vectorizer.vocabulary_), len(rebuilt.vectorizer.vocabulary_))
+        self.assertSameResults(merged, rebuilt)
+
+    def test_apply_search_delta_refuses_changes_the_delta_does_not_carry(self):
+        search_index.SearchIndex(self.data_file).build().save(self.root)
+        records = self.next_crawl()
+        # Same links, but one record changed after the delta was written
+        records[5]["abstract"] += " Revised after the crawl."
+        write_json(self.data_file, records)
+        with self.assertRaisesMessage(CommandError, "0 extra, 0 missing, 1 changed"):
+            call_command("apply_search_delta", source=self.data_file, delta=self.delta_file, stdout=io.StringIO())
+
+
+
+class SearchFilterTests(IndexTestCase):
+    """/api/search/ filters and facets against a brute-force pass over the publications."""
+    index_settings = {"SEARCH_INDEX_DIR": None, "SEARCH_CACHE": {"ENABLED": False}}
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(search_cache, "_cache", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.index = search_index.get_index()
+
+    def search(self, status=200, **params):
+        response = self.client.get("/api/search/", params)
+        self.assertEqual(response.status_code, status, response.content)
+        return response.json()
+
+    def expected(self, query, author=None, year_from=None, year_to=None, has_abstract=None):
+        """Publications matching any query term and every filter, by hand."""
+        terms = set(self.index.pre_process(query))
+        out = []
+        for pub in publications():
+            year = int(pub["published_date"].split()[-1])
+            if not terms & set(self.index.pre_process(pub["title"] + " " + pub["abstract"])):
+                continue
+            if author is not None and author not in {author_id(a) for a in pub["authors"]}:
+                continue
+            if (year_from is not None and year < year_from) or (year_to is not None and year > year_to):
+                continue
+            if has_abstract is not None and bool(pub["abstract"]) != has_abstract:
+                continue
+            out.append(pub)
+        return out
+
+    def all_links(self, **params):
+        first = self.search(**params)
+        links = [r["link"] for r in first["results"]]
+        for page in range(2, first["total_pages"] + 1):
+            links += [r["link"] for r in self.search(page=page, **params)["results"]]
+        return first, links
+
+    def assertFacets(self, facets, pubs):
+        years = Counter(int(p["published_date"].split()[-1]) for p in pubs)
+        authors = Counter(author_id(a) for p in pubs for a in p["authors"])
+        self.assertEqual({f["value"]: f["count"] for f in facets["year"]}, years)
+        self.assertEqual(facets["year_unknown"], 0)
+        self.assertEqual({f["id"]: f["count"] for f in facets["author"]}, authors)
+        with_abstract = sum(bool(p["abstract"]) for p in pubs)
+        self.assertEqual(facets["has_abstract"], {"true": with_abstract, "false": len(pubs) - with_abstract})
+
+    def test_filters_narrow_the_results_and_facets(self):
+        query = "credit capital carbon"
+        unfiltered, links = self.all_links(query=query, facets=1)
+        everything = self.expected(query)
+        self.assertEqual(sorted(links), sorted(p["link"] for p in everything))
+        self.assertEqual(unfiltered["total_pages"], math.ceil(len(everything) / 10))
+        self.assertFacets(unfiltered["facets"], everything)
+
+        for params in [
+            {"year_from": 2018, "year_to": 2020},
+            {"year_from": 2021},
+            {"author": "dev-patel"},
+            {"author": "n-chloe-martin", "year_to": 2019},
+            {"has_abstract": False},
+            {"has_abstract": True, "year_from": 2017},
+        ]:
+            with self.subTest(**params):
+                filtered, links = self.all_links(query=query, facets=1, **params)
+                expected = self.expected(query, **params)
+                self.assertTrue(0 < len(expected) < len(everything))
+                self.assertEqual(sorted(links), sorted(p["link"] for p in expected))
+                self.assertEqual(filtered["total_pages"], math.ceil(len(expected) / 10))
+                self.assertFacets(filtered["facets"], expected)
+
+    def test_filters_that_exclude_everything(self):
+        for params in [{"author": "nobody"}, {"year_from": 2030}, {"year_to": 2022, "has_abstract": False}]:
+            with self.subTest(**params):
+                payload = self.search(query="credit capital", facets=1, **params)
+                self.assertEqual((payload["results"], payload["total_pages"]), ([], 0))
+                self.assertEqual(payload["facets"]["has_abstract"], {"true": 0, "false": 0})
+
+    def test_malformed_filters_are_rejected(self):
+        for params in [{"year_from": "2019s"}, {"year_to": "-1"}, {"has_abstract": "maybe"}]:
+            with self.subTest(**params):
+                self.assertIn("Invalid filter", self.search(400, query="credit", **params)["error"])
+
+
+def random_publications(n, vocabulary=400, seed=0):
+    """Publications over made-up words with Zipf-like frequencies: many rare terms, a few in most documents."""
+    rng = np.random.default_rng(seed)
+    words = sorted({"".join(rng.choice(list("bdfgklmnprtvz"), 3)) + "o" for _ in range(vocabulary)})
+    weights = 1 / np.arange(1, len(words) + 1)
+    out = []
+    for i in range(n):
+        text = rng.choice(words, size=rng.integers(5, 60), p=weights / weights.sum())
+        out.append({"title": " ".join(text[:4]), "link": link(i), "authors": [], "published_date": "2020",
+                    "abstract": " ".join(text[4:])})
+    return out
+
+
+class BM25PruningTests(SimpleTestCase):
+    """MaxScore top-k against scoring every document."""
+
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, True)
+        data_file = os.path.join(tmp, "publications.json")
+        write_json(data_file, random_publications(600))
+        self.index = search_index.SearchIndex(data_file).build()
+        self.bm25 = self.index.backend("bm25")
+
+    def test_pruned_top_k_matches_exhaustive_scoring(self):
+        rng = np.random.default_rng(1)
+        terms_by_id = sorted(self.index.vectorizer.vocabulary_, key=self.index.vectorizer.vocabulary_.get)
+        df = np.diff(self.index.postings.ptr)
+        everything = np.arange(len(self.index.documents))
+        for _ in range(300):
+            # Query terms drawn by document frequency, so common and rare ones mix
+            terms = list(rng.choice(terms_by_id, size=rng.integers(1, 6), p=df / df.sum()))
+            if rng.random() < 0.3:
+                terms += terms[:1]
+            for k in (1, 5, 20):
+                rows, scores, matched = self.bm25.rank(terms, k)
+                want_rows, want_scores, want_matched = self.bm25.rank(terms, k, rows=everything)
+                with self.subTest(terms=terms, k=k):
+                    self.assertEqual(matched, want_matched)
+                    np.testing.assert_array_equal(rows, want_rows)
+                    np.testing.assert_allclose(scores, want_scores, rtol=1e-12)
+
+    def test_unknown_terms(self):
+        rows, scores, matched = self.bm25.rank(["notaword"], 10)
+        self.assertEqual((len(rows), len(scores), matched), (0, 0, 0))
+
+
+class TopKTests(SimpleTestCase):
+    def full_sort(self, scores, k):
+        order = np.argsort(-scores, kind="stable")
+        order = order[scores[order] > 0]
+        return order[:k], len(order)
+
+    def test_matches_a_full_stable_sort(self):
+        rng = np.random.default_rng(0)
+        for n in (1, 7, 50, 500):
+            for _ in range(20):
+                # Few distinct values: ties everywhere, including at the cut-off; zeros never match
+                scores = rng.integers(0, 5, size=n).astype(np.float64)
+                for k in (1, 3, 10, n, n + 5):
+                    rows, matched = top_k(scores, k)
+                    want, want_matched = self.full_sort(scores, k)
+                    with self.subTest(n=n, k=k):
+                        np.testing.assert_array_equal(rows, want)
+                        self.assertEqual(matched, want_matched)
+
+    def test_nothing_matches(self):
+        rows, matched = top_k(np.zeros(5), 3)
+        self.assertEqual((len(rows), matched), (0, 0))
+
+
+class QueryCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(search_cache.time, "monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = search_cache.QueryCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)  # "b" is now the oldest
+        cache.set("c", 3)
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), (1, None, 3))
+        self.assertEqual(cache.stats()["entries"], 2)
+
+    def test_entries_expire_after_the_ttl(self):
+        cache = search_cache.QueryCache(ttl=300)
+        cache.set("a", 1)
+        self.now += 300
+        self.assertEqual(cache.get("a"), 1)
+        self.now += 1
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["entries"], 0)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_key_covers_everything_that_changes_the_page(self):
+        base = dict(version="abc", backend="tfidf", terms=["credit", "risk"], page=1,
+                    filters={"year_from": 2018}, facets=False, phrases=())
+        key = search_cache.make_key(**base)
+        self.assertEqual(key, search_cache.make_key(**dict(base, filters={"year_from": 2018, "author": None})))
+        for change in [{"version": "abd"}, {"backend": "bm25"}, {"terms": ["credit"]}, {"page": 2},
+                       {"filters": {"year_from": 2019}}, {"filters": {"year_from": 2018, "has_abstract": True}},
+                       {"filters": {}}, {"facets": True}, {"phrases": [["credit", "risk"]]}]:
+            with self.subTest(**change):
+                self.assertNotEqual(search_cache.make_key(**dict(base, **change)), key)
+
+
+class SearchCacheReloadTests(IndexTestCase):
+    index_settings = {"SEARCH_INDEX_DIR": None,
+                      "SEARCH_CACHE": {"ENABLED": True, "BACKEND": "local", "MAX_ENTRIES": 16, "TTL": 300}}
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(search_cache, "_cache", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def search(self, **params):
+        response = self.client.get("/api/search/", {"query": "zebrafish credit", **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_reload_drops_cached_results(self):
+        before = self.search()
+        self.assertEqual(self.search(), before)
+        cache = search_cache.get_cache()
+        self.assertEqual((cache.hits, cache.stats()["entries"]), (1, 1))
+
+        self.next_crawl()  # adds "Zebrafish credit networks ..." publications
+        search_index.reload()
+        self.assertEqual(cache.stats()["entries"], 0)
+        after = self.search()
+        self.assertNotEqual(after["index_version"], before["index_version"])
+        self.assertIn("Zebrafish", after["results"][0]["title"])
+        self.assertNotIn("Zebrafish", before["results"][0]["title"])
+
+
+@override_settings(HOT_RELOAD={"WATCH": False}, CLASSIFIER_COALESCE={"ENABLED": False}, CLASSIFIER_MAX_BATCH=4)
+class ClassifierTests(SimpleTestCase):
+    texts = ["Credit risk and capital requirements of European banks.",
+             "Hospital admissions fell after the vaccination campaign.",
+             "The parliament passed the electoral reform bill."]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.model = classifier.load()
+
+    def setUp(self):
+        patcher = mock.patch.object(classifier, "_classifier", self.model)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def classify_batch(self, body):
+        return self.client.post("/api/classify/batch/", body, content_type="application/json")
+
+    def test_batch_matches_one_text_at_a_time(self):
+        response = self.classify_batch({"texts": self.texts})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data["count"], data["model_version"]), (len(self.texts), self.model.version))
+        for text, result in zip(self.texts, data["results"]):
+            single = self.client.post("/api/classify/", {"text": text}, content_type="application/json").json()
+            self.assertEqual(result["prediction"], single["prediction"])
+            self.assertEqual(set(result["probabilities"]), set(self.model.classes))
+            for cls, p in single["probabilities"].items():
+                self.assertAlmostEqual(result["probabilities"][cls], p)
+
+    def test_batch_rejects_malformed_input(self):
+        for body in [{}, {"texts": []}, {"texts": "one text"}, {"texts": ["ok", 3]}, {"texts": ["ok"] * 5}]:
+            with self.subTest(body=body):
+                response = self.classify_batch(body)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.json())
+
+    def test_model_is_loaded_once_per_process(self):
+        def slow_load():
+            time.sleep(0.05)  # let the other threads reach get_classifier() meanwhile
+            return self.model
+
+        with mock.patch.object(classifier, "_classifier", None), \
+                mock.patch.object(classifier, "load", side_effect=slow_load) as load:
+            threads = [threading.Thread(target=classifier.get_classifier) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.client.post("/api/classify/", {"text": self.texts[0]}, content_type="application/json")
+            self.classify_batch({"texts": self.texts})
+            self.assertIs(classifier.get_classifier(), self.model)
+        self.assertEqual(load.call_count, 1)
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def test_concurrent_callers_share_one_batch(self):
+        calls = []
+
+        def double(items):
+            calls.append(items)
+            return [2 * x for x in items]
+
+        batcher = MicroBatcher(double, max_batch=8, max_wait=5)
+        results = {}
+        start = threading.Barrier(8)
+
+        def caller(x):
+            start.wait()
+            results[x] = batcher.submit(x).result(timeout=5)
+
+        threads = [threading.Thread(target=caller, args=(x,)) for x in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)  # max_batch reached long before max_wait
+        self.assertEqual(sorted(calls[0]), list(range(8)))
+        self.assertEqual(results, {x: 2 * x for x in range(8)})
+        self.assertEqual(batcher.stats()["batches"], 1)
+
+    def test_batch_of_cancelled_callers_is_not_flushed(self):
+        calls = []
+        entered, release = threading.Event(), threading.Event()
+
+        def echo(items):
+            calls.append(items)
+            entered.set()
+            release.wait(5)
+            return items
+
+        batcher = MicroBatcher(echo, max_batch=2, max_wait=0)
+        first = batcher.submit("a")
+        self.assertTrue(entered.wait(5))
+        # Queued behind "a" and cancelled before the batcher gets to them
+        for future in (batcher.submit("b"), batcher.submit("c")):
+            self.assertTrue(future.cancel())
+        last = batcher.submit("d")
+        release.set()
+        self.assertEqual((first.result(timeout=5), last.result(timeout=5)), ("a", "d"))
+        self.assertEqual(calls, [["a"], ["d"]])
+        self.assertEqual({k: batcher.stats()[k] for k in ("batches", "items")}, {"batches": 2, "items": 2})
+
+
+async def until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        await asyncio.sleep(0.001)
+
+
+class BoundedExecutorTests(SimpleTestCase):
+    async def test_cancelled_caller_keeps_the_slot_until_its_job_ends(self):
+        executor = BoundedExecutor(max_workers=1, max_queue=0)
+        gate = threading.Event()
+        caller = asyncio.ensure_future(executor.run(gate.wait, 5))
+        await until(lambda: executor.in_flight == 1)
+        caller.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await caller
+        # The thread is still busy with the job, so the pool is still full
+        self.assertEqual(executor.in_flight, 1)
+        with self.assertRaises(Overloaded):
+            await executor.run(time.sleep, 0)
+        gate.set()
+        await until(lambda: executor.in_flight == 0)
+        self.assertIsNone(await executor.run(time.sleep, 0))
+        self.assertEqual((executor.in_flight, executor.rejected), (0, 1))
+
+    async def test_slot_is_released_when_the_job_raises(self):
+        executor = BoundedExecutor(max_workers=1, max_queue=0)
+        with self.assertRaises(ZeroDivisionError):
+            await executor.run(divmod, 1, 0)
+        await until(lambda: executor.in_flight == 0)
+
+
+class AsyncViewTests(IndexTestCase):
+    index_settings = {"SEARCH_INDEX_DIR": None, "SEARCH_CACHE": {"ENABLED": False},
+                      "CLASSIFIER_COALESCE": {"ENABLED": False}}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.model = classifier.load()
+
+    def setUp(self):
+        super().setUp()
+        for module, name, value in ((classifier, "_classifier", self.model),
+                                    (offload, "_executor", BoundedExecutor(max_workers=2, max_queue=0, retry_after=7))):
+            patcher = mock.patch.object(module, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_async_search_matches_the_sync_view(self):
+        for params in [{"query": "credit risk"}, {"query": "capital", "page": 2},
+                       {"query": "bank", "year_from": 2019, "facets": 1}, {"query": '"return on equity"'}]:
+            with self.subTest(**params):
+                response = await self.async_client.get("/api/search/async/", params)
+                self.assertEqual(response.status_code, 200)
+                expected = await asyncio.to_thread(self.client.get, "/api/search/", params)
+                self.assertEqual(response.json(), expected.json())
+        self.assertEqual((await self.async_client.get("/api/search/async/")).status_code, 400)
+
+    async def test_async_classify(self):
+        text = "Credit risk and capital requirements of European banks."
+        response = await self.async_client.post("/api/classify/async/", {"text": text},
+                                                content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        (prediction, probabilities), = self.model.predict([text])
+        data = response.json()
+        self.assertEqual((data["prediction"], data["model_version"]), (prediction, self.model.version))
+        self.assertEqual(data["probabilities"], probabilities)
+        response = await self.async_client.post("/api/classify/async/", "{", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    async def test_full_pool_answers_503(self):
+        await asyncio.to_thread(search_index.get_index)
+        executor, gate = offload.get_executor(), threading.Event()
+        busy = [asyncio.ensure_future(executor.run(gate.wait, 5)) for _ in range(executor.capacity)]
+        await until(lambda: executor.in_flight == executor.capacity)
+        try:
+            for response in [await self.async_client.get("/api/search/async/", {"query": "credit"}),
+                             await self.async_client.post("/api/classify/async/", {"text": "bank lending"},
+                                                          content_type="application/json")]:
+                self.assertEqual(response.status_code, 503)
+                self.assertEqual(response["Retry-After"], "7")
+        finally:
+            gate.set()
+            await asyncio.gather(*busy)
+        self.assertEqual(executor.rejected, 2)
+        response = await self.async_client.get("/api/search/async/", {"query": "credit"})
+        self.assertEqual(response.status_code, 200)
+
+
+class PrefixCompleterTests(SimpleTestCase):
+    def brute_force(self, entries, prefix, limit):
+        ranked = sorted((e for e in sorted(entries, key=lambda e: e[0]) if e[0].startswith(prefix)),
+                        key=lambda e: -e[1])
+        out = []
+        for _, _, vid in ranked:
+            if vid not in out:
+                out.append(vid)
+        return out[:limit]
+
+    def test_completions_match_a_full_scan(self):
+        rng = np.random.default_rng(3)
+        words = ["".join(rng.choice(list("abc"), size=rng.integers(1, 6))) for _ in range(300)]
+        entries = [(w, float(rng.integers(0, 20)), int(rng.integers(0, 80))) for w in words]
+        values = [f"v{i}" for i in range(80)]
+        # A small scan_limit puts the short prefixes in the precomputed table and ranks the rest per lookup
+        completer = PrefixCompleter(entries, values, k=6, scan_limit=8)
+        self.assertIn("a", completer.top)
+        prefixes = {w[:i] for w in words for i in range(len(w) + 1)} | {"abcabcx", "d"}
+        for prefix in sorted(prefixes):
+            for limit in (1, 3, 6, 10):
+                with self.subTest(prefix=prefix, limit=limit):
+                    want = [values[v] for v in self.brute_force(entries, prefix, min(limit, 6))]
+                    self.assertEqual(completer.complete(prefix, limit), want)
+
+
+class SuggestTests(IndexTestCase):
+    index_settings = {"SEARCH_INDEX_DIR": None, "SEARCH_SUGGEST": {"MAX_RESULTS": 3}}
+
+    def suggest(self, q, **params):
+        response = self.client.get("/api/suggest/", {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_prefixes_complete_terms_titles_and_authors(self):
+        data = self.suggest("bank cred")
+        self.assertEqual(data["terms"][0]["term"], "credit")
+        self.assertEqual(data["terms"][0]["query"], "bank credit")
+        self.assertEqual(self.suggest("cred")["terms"][0]["query"], "credit")
+
+        titles = self.suggest("credit risk")["titles"]
+        self.assertTrue(titles)
+        self.assertTrue(all("credit risk" in t["title"].lower() for t in titles))
+        # Mid-title words complete too, the most recent publication first
+        scoring = [r for r in publications() if "credit scoring" in r["title"].lower()]
+        latest = max(scoring, key=lambda r: int(r["published_date"][-4:]))
+        self.assertEqual(self.suggest("scoring")["titles"][0]["link"], latest["link"])
+
+        self.assertEqual([a["name"] for a in self.suggest("smi")["authors"]], ["Alice Smith"])
+        self.assertEqual([a["id"] for a in self.suggest("chloe mar")["authors"]], ["n-chloe-martin"])
+
+    def test_limit(self):
+        self.assertEqual(len(self.suggest("c", limit=1)["terms"]), 1)
+        self.assertEqual(len(self.suggest("c", limit=50)["terms"]), 3)  # SEARCH_SUGGEST["MAX_RESULTS"]
+        self.assertEqual(len(self.suggest("c", limit=0)["terms"]), 1)
+        self.assertEqual(self.client.get("/api/suggest/", {"q": "c", "limit": "many"}).status_code, 400)
+
+    def test_empty_or_unknown_prefix(self):
+        for q in ["", "   ", "?!", "zzzq", "credit zzzq"]:
+            with self.subTest(q=q):
+                data = self.suggest(q)
+                self.assertEqual({k: data[k] for k in ("terms", "titles", "authors")},
+                                 {"terms": [], "titles": [], "authors": []})
+
+    def test_reload_refreshes_completions(self):
+        before = self.suggest("zebra")
+        self.assertEqual((before["terms"], before["titles"]), ([], []))
+        self.next_crawl()  # adds "Zebrafish credit networks ..." publications
+        search_index.reload()
+        after = self.suggest("zebra")
+        self.assertNotEqual(after["index_version"], before["index_version"])
+        self.assertEqual(after["terms"][0]["term"], "zebrafish")
+        self.assertTrue(after["titles"][0]["title"].startswith("Zebrafish credit networks"))
+
+
+class PositionalIndexTests(IndexTestCase):
+    index_settings = {"SEARCH_INDEX_DIR": None, "SEARCH_CACHE": {"ENABLED": False}}
+    extra = [
+        ("Adjacent", "The return on equity of the firm."),
+        ("Reversed", "Equity holders return the capital."),
+        ("Apart", "Return and risk matter for equity."),
+        ("Proximity", "Credit alpha beta gamma delta risk."),
+        ("Proximity", "Credit risk alpha beta gamma delta."),
+    ]
+
+    def setUp(self):
+        super().setUp()
+        records = publications()
+        for i, (title, abstract) in enumerate(self.extra):
+            records.append({"title": title, "link": link(500 + i), "authors": [], "abstract": abstract,
+                            "published_date": "1 Jan 2020"})
+        write_json(self.data_file, records)
+        self.index = search_index.get_index()
+
+    def streams(self, index):
+        """Row -> the token stream positions are counted in."""
+        return {row: incremental._analyze(incremental.doc_text(index, doc))
+                for row, doc in ((i - 1, d) for i, d in index.documents.items())}
+
+    def assertPositions(self, index):
+        vocab = index.vectorizer.vocabulary_
+        for row, stream in self.streams(index).items():
+            for term in set(stream):
+                want = [i for i, t in enumerate(stream) if t == term]
+                np.testing.assert_array_equal(index.positions.positions(row, vocab[term]), want)
+
+    def row(self, title_word):
+        return next(i - 1 for i, d in self.index.documents.items() if d["title"] == title_word)
+
+    def test_phrase_matches_only_adjacent_terms(self):
+        streams = self.streams(self.index)
+        for phrase in ["return on equity", "equity return", "credit risk", "capital bank", "bank capital ratio"]:
+            stems = [t for t in self.index.pre_process(phrase) if len(t) > 1]
+            want = [row for row, stream in streams.items()
+                    if any(stream[i:i + len(stems)] == stems for i in range(len(stream)))]
+            with self.subTest(phrase=phrase):
+                np.testing.assert_array_equal(self.index.phrase_rows([stems]), want)
+        rows = self.index.phrase_rows([self.index.pre_process("return on equity")])
+        self.assertIn(self.row("Adjacent"), rows)
+        self.assertNotIn(self.row("Reversed"), rows)
+        self.assertNotIn(self.row("Apart"), rows)
+
+        response = self.client.get("/api/search/", {"query": '"return on equity"'})
+        titles = {r["title"] for r in response.json()["results"]}
+        self.assertIn("Adjacent", titles)
+        self.assertFalse(titles & {"Reversed", "Apart"})
+
+    def test_proximity_boost_orders_closer_terms_first(self):
+        far, near = [i - 1 for i, d in self.index.documents.items() if d["title"] == "Proximity"]
+        terms = self.index.pre_process("credit risk")
+        n = self.index.tfidf_matrix.shape[0]
+        for backend in ("tfidf", "bm25"):
+            for weight, first in ((0.0, far), (0.5, near)):
+                with self.subTest(backend=backend, weight=weight), \
+                        override_settings(SEARCH_PROXIMITY={"WEIGHT": weight, "DEPTH": n}):
+                    ranked = list(self.index.rank(terms, n, backend)[0])
+                    # Same terms and length: only where they occur tells the two apart
+                    self.assertEqual(min((far, near), key=ranked.index), first)
+
+    def test_positions_survive_gap_encoding_and_the_artifact(self):
+        self.assertEqual(self.index.positions.gaps.dtype, np.uint16)
+        self.assertPositions(self.index)
+
+        self.index.save(self.root)
+        loaded = search_index.SearchIndex.load(self.root, self.data_file, mmap_mode="r")
+        self.assertIsNotNone(loaded.loaded_from)
+        for name in ("indptr", "terms", "ptr", "gaps"):
+            np.testing.assert_array_equal(getattr(loaded.positions, name), getattr(self.index.positions, name))
+        self.assertPositions(loaded)
+        phrase = [self.index.pre_process("return on equity")]
+        np.testing.assert_array_equal(loaded.phrase_rows(phrase), self.index.phrase_rows(phrase))
+
+    def test_wide_gaps_are_stored_in_uint32(self):
+        positions = [[3, 70000, 70001], [0, 5]]
+        gaps = compact(np.concatenate([encode_gaps(p) for p in positions]))
+        self.assertEqual(gaps.dtype, np.uint32)
+        counts = csr_matrix(([3, 2], [0, 1], [0, 1, 2]), shape=(2, 2))
+        index = PositionalIndex.from_counts(counts, gaps)
+        for row, want in enumerate(positions):
+            np.testing.assert_array_equal(index.positions(row, row), want)
+        self.assertEqual(len(index.positions(0, 1)), 0)
+
+
+class AuthorIdTests(SimpleTestCase):
+    def test_fallback_matches_the_crawler_ids(self):
+        # Ids crawler/authors.py gives these names when each is the only spelling
+        for name, expected in [
+            ("Chloé Martin", "n-chloe-martin"),
+            ("Martin, C.", "n-c-martin"),
+            ("C. Martin", "n-c-martin"),
+            ("José María García-López", "n-jose-garcia-lopez"),
+            ("García-López, J. M.", "n-j-garcia-lopez"),
+            ("Jane Q. Smith (Editor)", "n-jane-smith"),
+            ("J. R. R. Tolkien", "n-j-tolkien"),
+            ("", "n-unknown"),
+        ]:
+            self.assertEqual(author_id({"name": name, "profile": ""}), expected, name)
+
+    def test_profile_slug_and_crawler_id_win(self):
+        self.assertEqual(author_id(AUTHORS[0]), "alice-smith")
+        self.assertEqual(author_id({**AUTHORS[0], "id": "n-alice-smith"}), "n-alice-smith")
+
+
+class TextNormalizerTests(SimpleTestCase):
+    corpus = [f"{title} {abstract}" for title, abstract in TOPICS] + [
+        "Banks' lending: evidence from 1990 to 2020 (UK), and the crisis!",
+        "Stemming: running runners ran; studies studying studied.",
+        "",
+    ]
+    # Where word_tokenize keeps punctuation inside a token, which the isalnum()
+    # filter then drops; the regex tokenizer splits it into words instead
+    joined = "Middle-income households in the U.K., 1990–2020, and e-commerce"
+
+    def test_punkt_matches_the_nltk_path(self):
+        baseline, punkt = nltk_baseline(), TextNormalizer("punkt")
+        for text in self.corpus + [self.joined]:
+            self.assertEqual(punkt.normalize(text), baseline(text), text)
+
+    def test_regex_matches_the_nltk_path_without_joined_tokens(self):
+        baseline, regex = nltk_baseline(), TextNormalizer("regex")
+        for text in self.corpus:
+            self.assertEqual(regex.normalize(text), baseline(text), text)
+
+    def test_regex_only_adds_tokens(self):
+        baseline, regex = nltk_baseline(), TextNormalizer("regex")
+        for text in self.corpus + [self.joined, "Design/methodology/approach: a euro-area's cross-country panel."]:
+            self.assertFalse(Counter(baseline(text)) - Counter(regex.normalize(text)), text)
+
+    def test_regex_keeps_the_words_of_joined_tokens(self):
+        self.assertEqual(nltk_baseline()(self.joined), ["household"])
+        self.assertEqual(TextNormalizer("regex").normalize(self.joined),
+                         ["middl", "incom", "household", "u", "k", "1990", "2020", "e", "commerc"])
@@ -1,7 +1,20 @@
 from django.urls import path
-from .views import SearchScholarView, TextClassifierView, SampleTextView
+from django.views.decorators.csrf import csrf_exempt
+from .views import (
+    SearchScholarView, SearchReadyView, AuthorView, TextClassifierView, BatchTextClassifierView, ClassifierStatsView,
+    SampleTextView, AsyncSearchScholarView, AsyncTextClassifierView, ReloadView, SuggestView,
+)
 urlpatterns = [
     path("sample/<str:category>/", SampleTextView.as_view(), name="sample-text"),
     path("search/", SearchScholarView.as_view(), name="search"),
+    path("search/ready/", SearchReadyView.as_view(), name="search-ready"),
+    path("suggest/", SuggestView.as_view(), name="suggest"),
+    path("authors/<str:author_id>/", AuthorView.as_view(), name="author"),
     path("classify/", TextClassifierView.as_view(), name="classify"),
+    path("classify/batch/", BatchTextClassifierView.as_view(), name="classify-batch"),
+    path("classify/stats/", ClassifierStatsView.as_view(), name="classify-stats"),
+    path("admin/reload/", ReloadView.as_view(), name="admin-reload"),
+    # ASGI-native variants (serve under backend.asgi)
+    path("search/async/", AsyncSearchScholarView.as_view(), name="search-async"),
+    path("classify/async/", csrf_exempt(AsyncTextClassifierView.as_view()), name="classify-async"),
 ]
\ No newline at end of file
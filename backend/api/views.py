@@ -1,34 +1,32 @@
 from rest_framework import status
+from rest_framework.permissions import IsAdminUser
 from rest_framework.views import APIView
 from rest_framework.response import Response
-import json, os, nltk, random, joblib
+import json, os, random
+from functools import lru_cache
 from django.conf import settings
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import PorterStemmer
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from django.http import JsonResponse
+from django.views import View
+from . import search_cache
+from .offload import Overloaded, get_executor
 
-nltk.download('stopwords')
-nltk.download('punkt')
+# NLTK, sklearn, numpy and joblib are imported inside the views that need them
+# (via search_index / the classifier), so importing this module stays cheap and
+# never touches the network. Provision NLTK data with `manage.py fetch_nltk_data`.
 
 # Path to dataset folder
 BASE_DIR = os.path.join(settings.BASE_DIR, "..", "data", "classification")
 
-# Dictionary to hold samples
-SAMPLES = {"business": [], "health": [], "politics": []}
+CATEGORIES = ("business", "health", "politics")
 
-# Load all text files into memory at startup
-for category in SAMPLES.keys():
+@lru_cache(maxsize=None)
+def sample_files(category):
+    """Paths of the sample texts for a category, listed on first use."""
     folder = os.path.join(BASE_DIR, category)
-    if os.path.exists(folder):
-        for filename in os.listdir(folder):
-            if filename.endswith(".txt"):
-                filepath = os.path.join(folder, filename)
-                with open(filepath, "r", encoding="utf-8") as f:
-                    SAMPLES[category].append(f.read())
-    else:
+    if not os.path.exists(folder):
         print(f"Folder not found: {folder}")
+        return ()
+    return tuple(os.path.join(folder, f) for f in sorted(os.listdir(folder)) if f.endswith(".txt"))
 
 class SampleTextView(APIView):
     def clean_sample(self, text):
@@ -39,13 +37,16 @@ class SampleTextView(APIView):
 
     def get(self, request, category):
         category = category.lower()
-        if category not in SAMPLES:
+        if category not in CATEGORIES:
             return Response({"error": "Invalid category"}, status=400)
 
-        if not SAMPLES[category]:
+        files = sample_files(category)
+        if not files:
             return Response({"error": "No samples available"}, status=404)
 
-        raw_text = random.choice(SAMPLES[category])
+        # Only the chosen sample is read, instead of the whole corpus at import time
+        with open(random.choice(files), "r", encoding="utf-8") as f:
+            raw_text = f.read()
         clean_text = self.clean_sample(raw_text)
 
         return Response({
@@ -53,101 +54,314 @@ class SampleTextView(APIView):
             "sample": clean_text
         })
 
-class SearchScholarView(APIView):
-    documents = None
-    vectorizer = None
-    tfidf_matrix = None
-    preprocessed_docs = None
+PAGE_SIZE = 10
+
+def search_filters(params):
+    """Filters from query parameters: author id, year_from / year_to, has_abstract.
+
+    Raises ValueError for a malformed value.
+    """
+    filters = {}
+    author = params.get("author", "").strip()
+    if author:
+        filters["author"] = author
+    for name in ("year_from", "year_to"):
+        value = params.get(name, "").strip()
+        if value:
+            if not value.isdigit():
+                raise ValueError(f"{name} must be a year")
+            filters[name] = int(value)
+    value = params.get("has_abstract", "").strip().lower()
+    if value:
+        if value not in ("1", "true", "0", "false"):
+            raise ValueError("has_abstract must be true or false")
+        filters["has_abstract"] = value in ("1", "true")
+    return filters
+
+def wants_facets(params):
+    return params.get("facets", "").strip().lower() in ("1", "true")
 
+def query_phrases(index, query):
+    """Normalised terms of each "quoted phrase" in the raw query."""
+    from .positions import split_phrases
+    return [index.pre_process(p) for p in split_phrases(query)]
+
+def search_page(index, terms, page, backend, page_size=PAGE_SIZE, filters=None, facets=False, phrases=()):
+    """Ranked, paginated search response for already-normalised query terms.
+
+    ``filters`` (see search_filters) become a row mask from the index's doc
+    values, and only those rows are scored. ``phrases`` (see query_phrases)
+    further limits them to documents containing each phrase. ``facets`` adds
+    year, author and has-abstract counts over every matching row.
+    """
+    from .authors import author_id
+    # Rank only as far as the requested page; zero-score documents never match
+    start = (page - 1) * page_size
+    mask = index.doc_values.mask(**(filters or {}))
+    rows = mask.nonzero()[0] if mask is not None else None
+    ranked, scores, matched = index.rank(terms, page * page_size, backend, rows, phrases)
+    total_pages = (matched + page_size - 1) // page_size
+
+    # Materialise just the rows on this page
+    paginated_results = []
+    for row, score in zip(ranked[start:], scores[start:]):
+        doc = index.documents[int(row) + 1]
+        authors = [{"id": author_id(a), "name": a["name"], "profile": a.get("profile")}
+                   for a in doc.get("authors", [])]
+        paginated_results.append({
+            "title": doc.get("title"),
+            "link": doc.get("link"),
+            "authors": authors,
+            "year": doc.get("published_date", ""),
+            "snippet": doc.get("abstract", "")[:200] + "...",
+            "score": float(score),
+        })
+
+    payload = {
+        "results": paginated_results,
+        "page": page,
+        "total_pages": total_pages,
+        "index_version": index.version,
+    }
+    if facets:
+        hits = index.matching_rows(terms, phrases)
+        if mask is not None:
+            hits = hits[mask[hits]]
+        payload["facets"] = index.doc_values.facets(hits)
+    return payload
+
+class SearchScholarView(APIView):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.stemmer = PorterStemmer()
-        self.stop_words = set(stopwords.words('english'))
-        self.data_file = os.path.join(settings.BASE_DIR, "..", "crawler", "data", "publications.json")
-
-        # Load documents & precompute TF-IDF once
-        self.load_documents()
-        if self.documents:
-            self.preprocessed_docs = [
-                " ".join(self.pre_process(doc.get("title", "") + " " + doc.get("abstract", "")))
-                for doc in self.documents.values()
-            ]
-            self.vectorizer = TfidfVectorizer()
-            self.tfidf_matrix = self.vectorizer.fit_transform(self.preprocessed_docs)
-
-    def load_documents(self):
-        if not self.documents:
-            with open(self.data_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            if isinstance(data, list):
-                self.documents = {i: pub for i, pub in enumerate(data, 1)}
-            else:
-                self.documents = {1: data}
-        return self.documents
-
-    def pre_process(self, text):
-        tokens = word_tokenize(text.lower())
-        return [self.stemmer.stem(t) for t in tokens if t.isalnum() and t not in self.stop_words]
+        from . import search_index
+        # Shared per-process index; built on the first request (or at startup)
+        self.index = search_index.get_index()
 
     def get(self, request):
         query = request.GET.get("query", "").strip()
         if not query:
             return Response({"error": "Query is required"}, status=400)
 
-        page = int(request.GET.get("page", 1))
-        page_size = 10
+        page = max(int(request.GET.get("page", 1)), 1)
 
-        query_vector = self.vectorizer.transform([" ".join(self.pre_process(query))])
-        similarities = cosine_similarity(query_vector, self.tfidf_matrix).flatten()
+        try:
+            filters = search_filters(request.GET)
+        except ValueError as e:
+            return Response({"error": f"Invalid filter: {e}"}, status=400)
+        facets = wants_facets(request.GET)
 
-        # Rank and paginate
-        ranked_docs = sorted(zip(self.documents.keys(), similarities), key=lambda x: x[1], reverse=True)
-        results = []
-        for doc_id, score in ranked_docs:
-            doc = self.documents[doc_id]
-            authors = [{"name": a["name"], "profile": a.get("profile")} for a in doc.get("authors", [])]
-            results.append({
+        terms = self.index.pre_process(query)
+        phrases = query_phrases(self.index, query)
+        backend = getattr(settings, "SEARCH_BACKEND", "tfidf")
+        cache = search_cache.get_cache()
+        cache_key = search_cache.make_key(self.index.version, backend, terms, page, filters, facets, phrases)
+        if cache:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return Response(cached, status=status.HTTP_200_OK)
+
+        payload = search_page(self.index, terms, page, backend, filters=filters, facets=facets, phrases=phrases)
+        if cache:
+            cache.set(cache_key, payload)
+        return Response(payload, status=status.HTTP_200_OK)
+
+class SuggestView(APIView):
+    def get(self, request):
+        """Type-ahead: completions of the partial query ``q`` (terms, titles, authors)."""
+        from . import search_index
+        query = request.GET.get("q", "")
+        try:
+            limit = min(max(int(request.GET.get("limit", 5)), 1), getattr(settings, "SEARCH_SUGGEST", {}).get("MAX_RESULTS", 10))
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        index = search_index.get_index()
+        payload = index.suggester.suggest(query, limit)
+        payload["index_version"] = index.version
+        return Response(payload, status=status.HTTP_200_OK)
+
+class AuthorView(APIView):
+    def get(self, request, author_id):
+        """Canonical author: display name, spellings seen, and their publications."""
+        from . import search_index
+        index = search_index.get_index()
+        info = index.authors.describe(author_id)
+        if info is None:
+            return Response({"error": "Unknown author"}, status=status.HTTP_404_NOT_FOUND)
+        info["results"] = [
+            {
                 "title": doc.get("title"),
                 "link": doc.get("link"),
-                "authors": authors,
                 "year": doc.get("published_date", ""),
-                "snippet": doc.get("abstract", "")[:200] + "...",
-                "score": float(score),
-            })
-
-        total_pages = (len(results) + page_size - 1) // page_size
-        start = (page - 1) * page_size
-        end = start + page_size
-        paginated_results = results[start:end]
+            }
+            for doc in (index.documents[int(row) + 1] for row in index.authors.rows_for(author_id))
+        ]
+        return Response(info, status=status.HTTP_200_OK)
 
-        return Response({
-            "results": paginated_results,
-            "page": page,
-            "total_pages": total_pages
-        }, status=status.HTTP_200_OK)
+class SearchReadyView(APIView):
+    def get(self, request):
+        """Readiness probe: 200 once the shared search index is built, else 503."""
+        from . import search_index
+        info = search_index.status()
+        code = status.HTTP_200_OK if info["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE
+        return Response(info, status=code)
 
 class TextClassifierView(APIView):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        # Load model and vectorizer once when server starts
-        self.model = joblib.load(os.path.join(settings.BASE_DIR, "..", "classifier", "logreg_model.pkl"))
-        self.vectorizer = joblib.load(os.path.join(settings.BASE_DIR, "..","classifier", "tfidf_vectorizer.pkl"))
-    
+        from . import classifier
+        # Model and vectorizer are loaded once per process and shared
+        self.classifier = classifier.get_classifier()
+        self.batcher = classifier.get_batcher()
+
     def post(self, request):
         try:
             text = request.data.get("text", "")
             if not text:
                 return Response({"error": "No text provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Transform and predict
-            X = self.vectorizer.transform([text])
-            prediction = self.model.predict(X)[0]
-            probabilities = self.model.predict_proba(X)[0]
+            # Transform and predict, coalesced with concurrent requests when enabled
+            if self.batcher:
+                prediction, probabilities, version = self.batcher.submit(text).result()
+            else:
+                (prediction, probabilities), version = self.classifier.predict([text])[0], self.classifier.version
 
             return Response({
                 "text": text,
                 "prediction": prediction,
-                "probabilities": {cls: float(prob) for cls, prob in zip(self.model.classes_, probabilities)}
+                "probabilities": probabilities,
+                "model_version": version,
             })
         except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class ClassifierStatsView(APIView):
+    def get(self, request):
+        """Classifier load time and, when enabled, coalescer batch-size and queue-delay metrics."""
+        from . import classifier
+        return Response(classifier.status())
+
+class ReloadView(APIView):
+    """Hot reload for staff: GET shows the versions served, POST reloads.
+
+    Body: {"targets": ["search", "classifier"], "force": false, "wait": false}.
+    Reloads only this worker process; the artifact watcher or HOT_RELOAD's
+    signal reaches every worker.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        from . import reload
+        return Response(reload.status())
+
+    def post(self, request):
+        from . import reload
+        targets = request.data.get("targets") or list(reload.TARGETS)
+        if isinstance(targets, str):
+            targets = [targets]
+        unknown = [t for t in targets if t not in reload.TARGETS]
+        if unknown:
+            return Response({"error": f"Unknown targets: {', '.join(map(str, unknown))}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        force = bool(request.data.get("force", False))
+        if request.data.get("wait", False):
+            return Response({"versions": reload.reload(targets, force), **reload.status()})
+        reload.reload_in_background(targets, force)
+        return Response({"reloading": targets, **reload.status()}, status=status.HTTP_202_ACCEPTED)
+
+class BatchTextClassifierView(TextClassifierView):
+    def post(self, request):
+        """Classify a list of texts in one vectorizer/model pass: {"texts": [...]}."""
+        try:
+            texts = request.data.get("texts")
+            if not isinstance(texts, list) or not texts:
+                return Response({"error": "texts must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+            if not all(isinstance(t, str) for t in texts):
+                return Response({"error": "texts must contain only strings"}, status=status.HTTP_400_BAD_REQUEST)
+            max_batch = getattr(settings, "CLASSIFIER_MAX_BATCH", 5000)
+            if len(texts) > max_batch:
+                return Response({"error": f"At most {max_batch} texts per request"}, status=status.HTTP_400_BAD_REQUEST)
+
+            results = [
+                {"prediction": prediction, "probabilities": probabilities}
+                for prediction, probabilities in self.classifier.predict(texts)
+            ]
+            return Response({"results": results, "count": len(results), "model_version": self.classifier.version})
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# =========================== Async (ASGI) variants ===========================
+# Plain Django async views: cache hits are answered on the event loop, scoring
+# and prediction run on the bounded offload pool, and a full pool gets a 503
+# with Retry-After instead of queueing without limit.
+
+def overloaded_response(retry_after):
+    response = JsonResponse({"error": "Server busy, retry later"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    response["Retry-After"] = str(retry_after)
+    return response
+
+class AsyncSearchScholarView(View):
+    async def get(self, request):
+        from . import search_index
+        query = request.GET.get("query", "").strip()
+        if not query:
+            return JsonResponse({"error": "Query is required"}, status=400)
+        page = max(int(request.GET.get("page", 1)), 1)
+        try:
+            filters = search_filters(request.GET)
+        except ValueError as e:
+            return JsonResponse({"error": f"Invalid filter: {e}"}, status=400)
+        facets = wants_facets(request.GET)
+
+        executor = get_executor()
+        try:
+            index = search_index.get_index() if search_index.is_ready() else await executor.run(search_index.get_index)
+            terms = index.pre_process(query)
+            phrases = query_phrases(index, query)
+            backend = getattr(settings, "SEARCH_BACKEND", "tfidf")
+            cache = search_cache.get_cache()
+            cache_key = search_cache.make_key(index.version, backend, terms, page, filters, facets, phrases)
+            if cache:
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    return JsonResponse(cached)
+
+            payload = await executor.run(search_page, index, terms, page, backend, PAGE_SIZE, filters, facets, phrases)
+        except Overloaded as e:
+            return overloaded_response(e.retry_after)
+        if cache:
+            cache.set(cache_key, payload)
+        return JsonResponse(payload)
+
+class AsyncTextClassifierView(View):
+    async def post(self, request):
+        from . import classifier
+        try:
+            text = json.loads(request.body or b"{}").get("text", "")
+        except (ValueError, AttributeError):
+            return JsonResponse({"error": "Invalid JSON body"}, status=400)
+        if not text:
+            return JsonResponse({"error": "No text provided"}, status=400)
+
+        executor = get_executor()
+        try:
+            batcher = classifier.get_batcher()
+            if batcher:
+                if batcher.pending() >= executor.capacity:
+                    raise Overloaded(executor.retry_after)
+                prediction, probabilities, version = await batcher.submit_async(text)
+            else:
+                model = classifier.get_classifier() if classifier.is_ready() else await executor.run(classifier.get_classifier)
+                prediction, probabilities = (await executor.run(model.predict, [text]))[0]
+                version = model.version
+        except Overloaded as e:
+            return overloaded_response(e.retry_after)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=500)
+
+        return JsonResponse({
+            "text": text,
+            "prediction": prediction,
+            "probabilities": probabilities,
+            "model_version": version,
+        })
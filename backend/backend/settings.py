@@ -126,3 +126,100 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Search index
+# Build the shared TF-IDF index when the app loads rather than on the first /api/search/ call
+SEARCH_INDEX_EAGER = False
+
+# Prebuilt index written by `manage.py build_search_index`; workers memory-map it at startup
+# and fall back to building in-process when it is missing or older than publications.json
+SEARCH_INDEX_DIR = BASE_DIR / 'search_index'
+SEARCH_INDEX_USE_ARTIFACT = True
+
+# Crawl deltas (`manage.py apply_search_delta`, search_index.apply_delta) append a segment
+# and tombstone replaced rows instead of refitting; segments are compacted once there are
+# more than MAX_SEGMENTS or more than MAX_DEAD_RATIO of the rows are dead
+SEARCH_INDEX_MERGE = {
+    'MAX_SEGMENTS': 8,
+    'MAX_DEAD_RATIO': 0.2,
+    'BACKGROUND': True,
+}
+
+# Hot reload of the search index and classifier without restarting workers. Each worker
+# polls the artifacts every INTERVAL seconds, loads the new version in the background and
+# swaps it in; requests in flight finish on the old one. With SEARCH_INDEX_DIR that is the
+# index's CURRENT pointer (fold a crawl in once with `apply_search_delta`); without it,
+# publications.json and the crawl delta, applied to the live index. Also the classifier .pkl
+# files. `kill -SIGNAL <worker pid>` forces a check,
+# and staff can POST /api/admin/reload/ to reload the worker that serves the request.
+HOT_RELOAD = {
+    'WATCH': True,
+    'INTERVAL': 10,
+    'SIGNAL': 'SIGUSR2',
+}
+
+# Retrieval backend for /api/search/: "tfidf" (cosine over the full matrix) or
+# "bm25" (inverted index, scores only the query terms' postings)
+SEARCH_BACKEND = 'tfidf'
+SEARCH_BACKEND_OPTIONS = {
+    'bm25': {'k1': 1.2, 'b': 0.75},
+}
+
+# Multi-word queries: the top DEPTH results are re-ranked with score * (1 + WEIGHT * closeness),
+# closeness being 1 when the terms are adjacent and falling with the shortest window holding
+# them all (positional index). WEIGHT 0 turns it off. "Quoted phrases" always filter exactly.
+SEARCH_PROXIMITY = {
+    'WEIGHT': 0.5,
+    'DEPTH': 100,
+}
+
+# Type-ahead for /api/suggest/: at most MAX_RESULTS completions per kind; prefixes matching
+# more than SCAN_LIMIT keys get their completions precomputed when the index loads
+SEARCH_SUGGEST = {
+    'MAX_RESULTS': 10,
+    'SCAN_LIMIT': 64,
+}
+
+# Cache of /api/search/ responses keyed by index version, backend, stemmed query and page.
+# BACKEND "local" is a per-process LRU; "django" shares entries between workers through
+# CACHES[ALIAS], e.g. a FileBasedCache or a memcached backend:
+# CACHES = {'search': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+#                      'LOCATION': BASE_DIR / 'search_cache'}}
+SEARCH_CACHE = {
+    'ENABLED': True,
+    'BACKEND': 'local',
+    'ALIAS': 'default',
+    'MAX_ENTRIES': 1024,
+    'TTL': 300,
+}
+
+# Text normalisation shared by indexing and querying: "punkt" (NLTK word_tokenize) or
+# "regex" (alphanumeric runs, no Punkt; also keeps the parts of hyphenated and dotted words
+# such as "middle-income" that punkt drops). Changing it invalidates the built index artifact.
+SEARCH_TOKENIZER = 'punkt'
+SEARCH_STEM_CACHE_SIZE = 65536
+
+# Pre-provisioned NLTK data (stopwords, punkt_tab), searched before the NLTK defaults.
+# Nothing is downloaded at runtime; run `manage.py fetch_nltk_data` once per deployment.
+NLTK_DATA_DIR = BASE_DIR / 'nltk_data'
+
+# Text classifier: set CLASSIFIER_MMAP_MODE = 'r' to memory-map the model arrays
+# (shared between workers via the page cache) instead of copying them per process
+CLASSIFIER_MMAP_MODE = None
+CLASSIFIER_MAX_BATCH = 5000
+
+# Coalesce concurrent /api/classify/ calls arriving within MAX_WAIT_MS (up to MAX_BATCH)
+# into one predict_proba; metrics at /api/classify/stats/
+CLASSIFIER_COALESCE = {
+    'ENABLED': False,
+    'MAX_WAIT_MS': 5,
+    'MAX_BATCH': 64,
+}
+
+# Pool the async (ASGI) views offload scoring and prediction to. Once MAX_WORKERS are busy
+# and MAX_QUEUE more are waiting, further requests get 503 with Retry-After: RETRY_AFTER
+ASYNC_OFFLOAD = {
+    'MAX_WORKERS': 4,
+    'MAX_QUEUE': 64,
+    'RETRY_AFTER': 1,
+}
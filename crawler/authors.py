@@ -0,0 +1,184 @@
+"""Canonical author ids across the crawled dataset.
+
+The same person shows up as "Panagiotis Andrikopoulos" (persons link),
+"P. Andrikopoulos" (citation meta) or "Andrikopoulos, P." (subtitle line).
+This batch stage runs over all records at once:
+
+1. every distinct name string is normalised once (accents folded, initials
+   and "Surname, I." order handled) into given-name tokens and a
+   "first-initial surname" key; large dumps use a process pool;
+2. authors with a portal profile get the profile slug as their id, and
+   every profile-less spelling whose key and first name agree with exactly
+   one profile joins it;
+3. the remaining names are grouped by key, keeping different full first
+   names apart, and get an ``n-...`` id.
+
+How a profile-less spelling resolves depends on the other names in the
+dataset, so a later crawl could move it. ``known`` ids (persisted in the
+crawl state) win over resolution: once a spelling has an id it keeps it, and
+the search index fed by crawl deltas never holds stale ids.
+
+Each author dict gains ``"id"``; ``build_index`` gives id -> name, profile,
+spellings and publication links (written next to publications.json as
+authors.json).
+"""
+import argparse, json, os, re, unicodedata
+from collections import Counter, defaultdict
+from multiprocessing import Pool
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+PARENS = re.compile(r"\([^)]*\)")
+SURNAME_FIRST = re.compile(r"^\s*([^,]+?)\s*,\s*((?:[A-Z]\.?[\s-]*)+)\s*$")
+TOKEN = re.compile(r"[a-z0-9']+(?:-[a-z0-9']+)*")  # "garcia-lopez" stays one surname
+SLUG_SEP = re.compile(r"[^a-z0-9]+")
+PROFILE_SLUG = re.compile(r"/persons/([^/?#]+)")
+
+PARALLEL_MIN_NAMES = 20000  # below this a process pool costs more than it saves
+
+
+class NameParts(NamedTuple):
+    given: Tuple[str, ...]  # given-name tokens; single letters for initials
+    surname: str
+    key: str  # "first-initial surname"
+
+
+def fold(text: str) -> str:
+    """Lowercase ASCII: accents stripped, compatibility forms unified."""
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def normalize_name(name: str) -> NameParts:
+    name = PARENS.sub(" ", unicodedata.normalize("NFKC", name)).strip()
+    m = SURNAME_FIRST.match(name)
+    if m:  # "Surname, I. J." -> "I. J. Surname"
+        name = f"{m.group(2)} {m.group(1)}"
+    tokens = TOKEN.findall(fold(name).replace(".", " "))
+    if not tokens:
+        return NameParts((), "", "")
+    surname = tokens[-1]
+    given = tuple(tokens[:-1])
+    return NameParts(given, surname, f"{given[0][0]} {surname}" if given else surname)
+
+
+def slug(text: str) -> str:
+    return SLUG_SEP.sub("-", fold(text)).strip("-")
+
+
+def profile_id(profile: Optional[str]) -> Optional[str]:
+    m = PROFILE_SLUG.search(profile or "")
+    return m.group(1) if m else None
+
+
+def _first_name(parts: NameParts) -> Optional[str]:
+    """The full first given name, or None if only initials are known."""
+    return parts.given[0] if parts.given and len(parts.given[0]) > 1 else None
+
+
+def normalize_all(names: List[str], workers: Optional[int] = None) -> Dict[str, NameParts]:
+    if workers is None:
+        workers = (os.cpu_count() or 1) if len(names) >= PARALLEL_MIN_NAMES else 1
+    if workers > 1:
+        with Pool(workers) as pool:
+            parts = pool.map(normalize_name, names, chunksize=max(1, len(names) // (workers * 8)))
+    else:
+        parts = list(map(normalize_name, names))
+    return dict(zip(names, parts))
+
+
+def canonicalize(records: List[Dict], workers: Optional[int] = None,
+                 known: Optional[Dict[str, str]] = None) -> Dict[str, Dict]:
+    """Set ``id`` on every author of every record (in place) and return the author index.
+
+    ``known`` maps profile-less spellings to the ids earlier crawls gave them.
+    """
+    names = sorted({a["name"] for rec in records for a in rec.get("authors", []) if a.get("name")})
+    parts = normalize_all(names, workers)
+
+    # Profiles: key -> {profile id -> first names seen for it}
+    profiles_by_key: Dict[str, Dict[str, set]] = defaultdict(lambda: defaultdict(set))
+    for rec in records:
+        for a in rec.get("authors", []):
+            pid = profile_id(a.get("profile"))
+            p = parts.get(a.get("name", ""))
+            if pid and p and p.key:
+                profiles_by_key[p.key][pid].add(_first_name(p))
+
+    # Profile-less spellings: key -> full first names seen (to split "J. Smith" from "Jane"/"John")
+    firsts_by_key: Dict[str, set] = defaultdict(set)
+    for p in parts.values():
+        if _first_name(p):
+            firsts_by_key[p.key].add(_first_name(p))
+
+    def resolve(parts_: NameParts) -> str:
+        first = _first_name(parts_)
+        candidates = [pid for pid, firsts in profiles_by_key.get(parts_.key, {}).items()
+                      if first is None or first in firsts or firsts == {None}]
+        if len(candidates) == 1:
+            return candidates[0]
+        if first is None and len(firsts_by_key[parts_.key]) == 1:
+            first = next(iter(firsts_by_key[parts_.key]))
+        return "n-" + slug(f"{first} {parts_.surname}" if first else parts_.key)
+
+    resolved: Dict[str, str] = dict(known or {})
+    for rec in records:
+        for a in rec.get("authors", []):
+            name = a.get("name", "")
+            pid = profile_id(a.get("profile"))
+            if pid:
+                a["id"] = pid
+            elif name in resolved:
+                a["id"] = resolved[name]
+            else:
+                p = parts.get(name)
+                a["id"] = resolved[name] = resolve(p) if p and p.key else "n-" + (slug(name) or "unknown")
+    return build_index(records)
+
+
+def assigned_ids(records: List[Dict]) -> Dict[str, str]:
+    """Profile-less spelling -> the id ``canonicalize`` gave it, for keeping it next crawl."""
+    return {a["name"]: a["id"] for rec in records for a in rec.get("authors", [])
+            if a.get("name") and a.get("id") and not profile_id(a.get("profile"))}
+
+
+def build_index(records: List[Dict]) -> Dict[str, Dict]:
+    spellings: Dict[str, Counter] = defaultdict(Counter)
+    index: Dict[str, Dict] = {}
+    for rec in records:
+        for a in rec.get("authors", []):
+            aid = a.get("id")
+            if not aid:
+                continue
+            entry = index.setdefault(aid, {"name": "", "profile": "", "variants": [], "publications": []})
+            spellings[aid][a["name"]] += 1
+            if a.get("profile") and not entry["profile"]:
+                entry["profile"] = a["profile"]
+            if not entry["publications"] or entry["publications"][-1] != rec["link"]:
+                entry["publications"].append(rec["link"])
+    for aid, counts in spellings.items():
+        # most frequent spelling, longest on ties ("Graham V. Sadler" over "Graham Sadler")
+        index[aid]["name"] = max(counts, key=lambda n: (counts[n], len(n)))
+        index[aid]["variants"] = sorted(counts)
+    return index
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Assign canonical author ids to a crawled publications.json.")
+    ap.add_argument("publications", nargs="?", default=os.path.join("data", "publications.json"))
+    ap.add_argument("--workers", type=int, default=None, help="Processes for name normalisation (default: auto).")
+    args = ap.parse_args()
+
+    with open(args.publications, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    index = canonicalize(records, args.workers)
+    with open(args.publications, "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+    out = os.path.join(os.path.dirname(args.publications), "authors.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    spellings = sum(len(v["variants"]) for v in index.values())
+    print(f"[AUTHORS] {spellings} spellings → {len(index)} authors → {out}")
+
+
+if __name__ == "__main__":
+    main()
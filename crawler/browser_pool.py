@@ -0,0 +1,128 @@
+"""Pool of long-lived browsers shared by the detail workers.
+
+Starting Firefox costs seconds, so drivers are created lazily (at most
+``size``), handed out one caller at a time and kept between pages. A driver
+is health-checked before reuse, recycled after ``max_pages`` pages, and thrown
+away when a WebDriverException says the browser is gone. The exception still
+propagates, so the crawl engine requeues the link. A TimeoutException (a slow
+page, not a lost session) propagates too but keeps the browser.
+"""
+import queue, threading, time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+
+class PooledDriver:
+    def __init__(self, driver: Any, ident: int, startup: float = 0.0):
+        self.driver = driver
+        self.ident = ident
+        self.startup = startup
+        self.started = time.monotonic()
+        self.pages = 0
+
+
+class DriverPool:
+    def __init__(self, factory: Callable[[], Any], size: int = 2, max_pages: int = 200):
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self._idle: "queue.LifoQueue[PooledDriver]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._live: Dict[int, PooledDriver] = {}
+        self.history: List[Dict] = []  # retired drivers, for the report
+        self.crashes = 0
+
+    # ------------------------------ lifecycle ------------------------------
+    def _create(self) -> PooledDriver:
+        t0 = time.monotonic()
+        driver = self.factory()
+        with self._lock:
+            self._next_id += 1
+            pd = self._live[self._next_id] = PooledDriver(driver, self._next_id, time.monotonic() - t0)
+        print(f"[POOL] Started browser #{pd.ident} in {pd.startup:.1f}s")
+        return pd
+
+    def _retire(self, pd: PooledDriver, reason: str):
+        try:
+            pd.driver.quit()
+        except Exception:
+            pass
+        with self._lock:
+            self._live.pop(pd.ident, None)
+            self.history.append(self._row(pd, reason))
+        print(f"[POOL] Retired browser #{pd.ident} after {pd.pages} pages ({reason})")
+
+    @staticmethod
+    def _healthy(pd: PooledDriver) -> bool:
+        try:
+            return pd.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    @contextmanager
+    def driver(self):
+        """Borrow a browser for one page; blocks while all ``size`` are busy."""
+        self._slots.acquire()
+        pd: Optional[PooledDriver] = None
+        try:
+            try:
+                pd = self._idle.get_nowait()
+            except queue.Empty:
+                pd = None
+            if pd is not None and not self._healthy(pd):
+                self.crashes += 1
+                self._retire(pd, "failed health check")
+                pd = None
+            if pd is None:
+                pd = self._create()
+            try:
+                yield pd.driver
+            except TimeoutException:
+                raise  # a WebDriverException too, but the session is fine
+            except WebDriverException:
+                self.crashes += 1
+                self._retire(pd, "crashed")
+                pd = None
+                raise
+            pd.pages += 1
+            if self.max_pages and pd.pages >= self.max_pages:
+                self._retire(pd, "recycled")
+            else:
+                self._idle.put(pd)
+            pd = None
+        finally:
+            if pd is not None:  # any other error: keep the browser, it is still usable
+                self._idle.put(pd)
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                pd = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._retire(pd, "closed")
+
+    # ------------------------------ report ------------------------------
+    @staticmethod
+    def _row(pd: PooledDriver, status: str) -> Dict:
+        minutes = (time.monotonic() - pd.started) / 60
+        return {"browser": pd.ident, "startup_ms": round(pd.startup * 1000), "pages": pd.pages,
+                "minutes": round(minutes, 2), "pages_per_min": round(pd.pages / minutes, 2) if minutes else 0.0, "status": status}
+
+    def report(self) -> List[Dict]:
+        with self._lock:
+            return self.history + [self._row(pd, "live") for pd in self._live.values()]
+
+    def print_report(self):
+        rows = self.report()
+        if not rows:
+            return
+        print(f"[POOL] {len(rows)} browsers, {self.crashes} crashes")
+        for r in rows:
+            print(f"[POOL]   #{r['browser']:<3} {r['pages']:>5} pages  {r['minutes']:>7.2f} min  "
+                  f"{r['pages_per_min']:>6.2f} pages/min  ({r['status']})")
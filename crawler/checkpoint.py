@@ -0,0 +1,93 @@
+"""Append-only JSONL checkpoints for detail records.
+
+Every record is written the moment it is extracted and fsync'd periodically,
+so an interrupted crawl keeps what it already fetched and ``--resume`` can
+skip those links. ``compact`` folds the log into the final deduplicated list.
+"""
+import json, os, threading, time
+from typing import Dict, Iterable, Iterator, List, Set
+
+
+class JsonlWriter:
+    def __init__(self, path: str, append: bool = True, fsync_every: int = 50, fsync_seconds: float = 5.0):
+        self.path = path
+        self.fsync_every = max(1, fsync_every)
+        self.fsync_seconds = fsync_seconds
+        self._fh = open(path, "a" if append else "w", encoding="utf-8")
+        if append and self._fh.tell() > 0 and not _ends_with_newline(path):
+            # a crash left a torn last line; don't glue the next record onto it
+            self._fh.write("\n")
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.written = 0
+
+    def write(self, rec: Dict):
+        line = json.dumps(rec, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._fh.write(line)
+            self._fh.flush()
+            self.written += 1
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_seconds:
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self._fh.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if not self._fh.closed:
+                self._fh.flush()
+                self._sync()
+                self._fh.close()
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def read_jsonl(path: str) -> Iterator[Dict]:
+    """Records in write order; a torn last line from a crash is skipped."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def done_links(path: str) -> Set[str]:
+    return {rec["link"] for rec in read_jsonl(path) if rec.get("link")}
+
+
+def compact(path: str, listing: List[Dict], known: Iterable[Dict] = ()) -> Dict[str, Dict]:
+    """Listing order first, later log entries for a link replacing earlier ones.
+
+    A link with no log entry takes its ``known`` record (from the crawl
+    state, say a page crawled last run whose fetch failed this time); only a
+    link with neither stays a title-and-link stub from the listing.
+    """
+    by_link: Dict[str, Dict] = {}
+    for it in listing:
+        by_link[it["link"]] = {"title": it["title"], "link": it["link"]}
+    stubs = set(by_link)
+    for rec in read_jsonl(path):
+        if rec.get("link"):
+            by_link[rec["link"]] = rec  # overwrite with full detail
+            stubs.discard(rec["link"])
+    for rec in known:
+        link = rec.get("link")
+        if link and (link in stubs or link not in by_link):
+            by_link[link] = rec
+            stubs.discard(link)
+    return by_link
@@ -1,7 +1,8 @@
-import argparse, json, os, time, re
-from math import ceil
+import argparse, asyncio, json, os, time
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import List, Dict
+from urllib.parse import urlsplit
+from typing import List, Dict, Optional, Set, Tuple
 
 # Selenium
 from selenium import webdriver
@@ -9,19 +10,50 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.firefox.service import Service as FirefoxService
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from webdriver_manager.firefox import GeckoDriverManager
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
 # Parallelism
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from engine import CrawlEngine
+
+import requests
+from http_detail import make_session, fetch_page, extract_detail_from_html
+from state import CrawlState
+from checkpoint import JsonlWriter, compact, done_links
+from browser_pool import DriverPool
+from listing import ListingCrawler
+from dom_extract import EXTRACT_JS, SELECTOR_ARGS, FieldTimings, record_from_payload
+from metrics import CrawlMetrics, WorkerProfiler
+from page_cache import PageCache
+from reparse import reparse_all
+from authors import assigned_ids, canonicalize
 
 BASE_URL = (
     "https://pureportal.coventry.ac.uk/en/organisations/fbl-school-of-economics-finance-and-accounting/publications/"
 )
 
 # =========================== Firefox helpers ===========================
-def build_firefox_options(headless: bool) -> FirefoxOptions:
+# Detail pages only need the DOM: skip images, web fonts and CSS, and send
+# every request to another host (analytics, CDNs) to a dead proxy via PAC.
+BLOCKING_PREFS = {
+    "permissions.default.image": 2,
+    "browser.display.use_document_fonts": 0,
+    "gfx.downloadable_fonts.enabled": False,
+    "permissions.default.stylesheet": 2,
+    "media.autoplay.default": 5,
+}
+FIRST_PARTY_PAC = (
+    "data:text/plain,function FindProxyForURL(url, host) {"
+    " return (host == '%s' || dnsDomainIs(host, '.%s')) ? 'DIRECT' : 'PROXY 127.0.0.1:9'; }"
+)
+
+@lru_cache(maxsize=1)
+def geckodriver_path() -> str:
+    """Resolve (and download if needed) geckodriver once per process."""
+    return GeckoDriverManager().install()
+
+def build_firefox_options(headless: bool, block_resources: bool = False) -> FirefoxOptions:
     opts = FirefoxOptions()
     if headless:
         opts.add_argument("--headless")
@@ -37,12 +69,17 @@ def build_firefox_options(headless: bool) -> FirefoxOptions:
     opts.set_preference("dom.webnotifications.enabled", False)
     opts.set_preference("general.useragent.override", 
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:129.0) Gecko/20100101 Firefox/129.0")
+    if block_resources:
+        for name, value in BLOCKING_PREFS.items():
+            opts.set_preference(name, value)
+        host = urlsplit(BASE_URL).hostname
+        opts.set_preference("network.proxy.type", 2)
+        opts.set_preference("network.proxy.autoconfig_url", FIRST_PARTY_PAC % (host, host))
     return opts
 
-def make_driver(headless: bool, legacy_headless: bool = False) -> webdriver.Firefox:
-    service = FirefoxService(GeckoDriverManager().install(), log_output=os.devnull)
-    print(f"Using GeckoDriver: {service.service_url}")
-    driver = webdriver.Firefox(service=service, options=build_firefox_options(headless))
+def make_driver(headless: bool, legacy_headless: bool = False, block_resources: bool = False) -> webdriver.Firefox:
+    service = FirefoxService(geckodriver_path(), log_output=os.devnull)
+    driver = webdriver.Firefox(service=service, options=build_firefox_options(headless, block_resources))
     driver.set_page_load_timeout(45)
     try:
         driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
@@ -87,25 +124,36 @@ def scrape_listing_page(driver: webdriver.Firefox, page_idx: int) -> List[Dict]:
             continue
     return rows
 
-def gather_all_listing_links(max_pages: int, headless_listing: bool = False, legacy_headless: bool = False) -> List[Dict]:
+def gather_all_listing_links(max_pages: int, headless_listing: bool = False, legacy_headless: bool = False,
+                             known: Optional[Set[str]] = None) -> Tuple[List[Dict], bool]:
+    """Walk the listing pages. With ``known`` links (incremental mode), stop at the
+    first page that lists nothing new: the portal lists newest first.
+
+    Also returns whether the scan reached the end of the listing (an empty
+    page before ``max_pages``), i.e. whether it saw every publication."""
     # Listing works more reliably non-headless
     driver = make_driver(headless_listing, legacy_headless)
     try:
         driver.get(BASE_URL)
         accept_cookies_if_present(driver)
         all_rows: List[Dict] = []
+        complete = False
         for i in range(max_pages):
             print(f"[LIST] Page {i+1}/{max_pages}")
             rows = scrape_listing_page(driver, i)
             if not rows:
                 print(f"[LIST] Empty at page index {i}; stopping early.")
+                complete = known is None
                 break
             all_rows.extend(rows)
+            if known is not None and all(r["link"] in known for r in rows):
+                print(f"[LIST] No new links at page index {i}; stopping (incremental).")
+                break
         # dedupe by link
         uniq = {}
         for r in all_rows:
             uniq[r["link"]] = r
-        return list(uniq.values())
+        return list(uniq.values()), complete
     finally:
         try:
             driver.quit()
@@ -113,272 +161,392 @@ def gather_all_listing_links(max_pages: int, headless_listing: bool = False, leg
             pass
 
 # =========================== DETAIL (Stage 2) ===========================
-# author parsing helpers
-FIRST_DIGIT = re.compile(r"\d")
-NAME_PAIR = re.compile(
-    r"[A-Z][A-Za-z'’\-]+,\s*(?:[A-Z](?:\.)?)(?:\s*[A-Z](?:\.)?)*",
-    flags=re.UNICODE
-)
-
-def _uniq(seq: List[str]) -> List[str]:
-    seen, out = set(), []
-    for x in seq:
-        x = x.strip()
-        if x and x not in seen:
-            seen.add(x); out.append(x)
-    return out
-
-def _get_meta_list(driver: webdriver.Firefox, names_or_props: List[str]) -> List[str]:
-    vals = []
-    for nm in names_or_props:
-        for el in driver.find_elements(By.CSS_SELECTOR, f'meta[name="{nm}"], meta[property="{nm}"]'):
-            c = (el.get_attribute("content") or "").strip()
-            if c:
-                vals.append(c)
-    return _uniq(vals)
-
-def _extract_authors_jsonld(driver: webdriver.Firefox) -> List[str]:
-    import json as _json
-    names = []
-    for s in driver.find_elements(By.CSS_SELECTOR, 'script[type="application/ld+json"]'):
-        txt = (s.get_attribute("textContent") or "").strip()
-        if not txt:
-            continue
-        try:
-            data = _json.loads(txt)
-        except Exception:
-            continue
-        objs = data if isinstance(data, list) else [data]
-        for obj in objs:
-            auth = obj.get("author")
-            if not auth:
-                continue
-            if isinstance(auth, list):
-                for a in auth:
-                    n = a.get("name") if isinstance(a, dict) else str(a)
-                    if n: names.append(n)
-            elif isinstance(auth, dict):
-                n = auth.get("name")
-                if n: names.append(n)
-            elif isinstance(auth, str):
-                names.append(auth)
-    return _uniq(names)
-
-def _maybe_expand_authors(driver: webdriver.Firefox):
-    try:
-        btns = driver.find_elements(
-            By.XPATH,
-            "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'show') or "
-            "contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'more')]"
-        )
-        for b in btns[:2]:
-            try:
-                driver.execute_script("arguments[0].scrollIntoView({block:'center'});", b)
-                time.sleep(0.15)
-                b.click()
-                time.sleep(0.25)
-            except Exception:
-                continue
-    except Exception:
-        pass
-
-def _authors_from_subtitle_simple(driver: webdriver.Firefox, title_text: str) -> List[str]:
-    """
-    Use the line containing authors + date:
-    remove the title, keep chars until first digit (date starts),
-    then extract 'Surname, Initials' pairs.
-    """
-    try:
-        date_el = driver.find_element(By.CSS_SELECTOR, "span.date")
-    except NoSuchElementException:
-        return []
-
-    # prefer ancestor with class 'subtitle' (portal markup), else parent
-    try:
-        subtitle = date_el.find_element(By.XPATH, "ancestor::*[contains(@class,'subtitle')][1]")
-    except Exception:
-        try:
-            subtitle = date_el.find_element(By.XPATH, "..")
-        except Exception:
-            subtitle = None
-
-    line = (subtitle.text if subtitle else "")
-    if title_text and title_text in line:
-        line = line.replace(title_text, "")
-    line = " ".join(line.split()).strip()
-
-    m = FIRST_DIGIT.search(line)
-    pre_date = line[:m.start()].strip(" -—–·•,;|") if m else line
-    pre_date = pre_date.replace(" & ", ", ").replace(" and ", ", ")
-    pairs = NAME_PAIR.findall(pre_date)
-    return _uniq(pairs)
-
-def extract_detail_for_link(driver: webdriver.Firefox, link: str, title_hint: str, delay: float) -> Dict:
+def extract_detail_for_link(driver: webdriver.Firefox, link: str, title_hint: str, delay: float,
+                            timings: Optional[FieldTimings] = None, sources: Optional[Dict[str, str]] = None) -> Dict:
+    t0 = time.perf_counter()
     driver.get(link)
+    t1 = time.perf_counter()
     accept_cookies_if_present(driver)
+    t2 = time.perf_counter()
     try:
         WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.CSS_SELECTOR, "h1")))
     except TimeoutException:
         pass
+    t3 = time.perf_counter()
 
-    # Title
-    try:
-        title = driver.find_element(By.CSS_SELECTOR, "h1").text.strip()
-    except NoSuchElementException:
-        title = title_hint or ""
-
-    _maybe_expand_authors(driver)
-
-    # AUTHORS: collect name + profile link if available
-    authors = []
-    for sel in [
-        ".relations.persons a[href*='/en/persons/']",
-        "section#persons a[href*='/en/persons/']",
-    ]:
-        for el in driver.find_elements(By.CSS_SELECTOR, sel):
-            name = el.text.strip()
-            href = el.get_attribute("href") or ""
-            if name:
-                authors.append({"name": name, "profile": href})
-        if authors:
-            break
-
-    # Fallbacks if no structured authors found
-    if not authors:
-        # subtitle / meta / JSON-LD
-        fallback_names = _authors_from_subtitle_simple(driver, title) \
-                         or _get_meta_list(driver, ["citation_author", "dc.contributor", "dc.contributor.author"]) \
-                         or _extract_authors_jsonld(driver)
-        authors = [{"name": n, "profile": ""} for n in _uniq(fallback_names)]
-
-    # PUBLISHED DATE
-    published_date = None
-    for sel in ["span.date", "time[datetime]", "time"]:
-        try:
-            el = driver.find_element(By.CSS_SELECTOR, sel)
-            published_date = el.get_attribute("datetime") or el.text.strip()
-            if published_date:
-                break
-        except NoSuchElementException:
-            continue
-    if not published_date:
-        metas = _get_meta_list(driver, ["citation_publication_date", "dc.date", "article:published_time"])
-        if metas:
-            published_date = metas[0]
-
-    # ABSTRACT
-    abstract_txt = None
-    for sel in [
-        "section#abstract .textblock",
-        "section.abstract .textblock",
-        "div.abstract .textblock",
-        "div#abstract",
-        "section#abstract",
-        "div.textblock",
-    ]:
-        try:
-            el = driver.find_element(By.CSS_SELECTOR, sel)
-            txt = el.text.strip()
-            if txt and len(txt) > 15:
-                abstract_txt = txt
-                break
-        except NoSuchElementException:
-            continue
-    if not abstract_txt:
-        try:
-            hdrs = driver.find_elements(By.CSS_SELECTOR, "h2, h3")
-            for h in hdrs:
-                if "abstract" in h.text.strip().lower():
-                    nxt = h.find_element(By.XPATH, "./following::*[self::div or self::p or self::section][1]")
-                    txt = nxt.text.strip()
-                    if txt:
-                        abstract_txt = txt
-                        break
-        except Exception:
-            pass
+    # One round-trip collects every candidate field; fallbacks are applied in Python
+    payload = driver.execute_async_script(EXTRACT_JS, SELECTOR_ARGS)
+    t4 = time.perf_counter()
+    rec = record_from_payload(payload, link, title_hint, sources)
 
+    if timings is not None:
+        timings.add({"navigate": (t1 - t0) * 1000, "cookies": (t2 - t1) * 1000, "wait_h1": (t3 - t2) * 1000,
+                     "script": (t4 - t3) * 1000, "parse": (time.perf_counter() - t4) * 1000,
+                     **payload["timings_ms"]})
     time.sleep(delay)
-    return {
-        "title": title,
-        "link": link,
-        "authors": authors,
-        "published_date": published_date,
-        "abstract": abstract_txt or ""
-    }
+    return rec
 
 # =========================== Workers ===========================
-def worker_detail_batch(batch: List[Dict], headless: bool, legacy_headless: bool, delay: float) -> List[Dict]:
-    driver = make_driver(headless=headless, legacy_headless=legacy_headless)
-    out: List[Dict] = []
-    try:
-        for i, it in enumerate(batch, 1):
-            try:
-                rec = extract_detail_for_link(driver, it["link"], it.get("title",""), delay)
-                out.append(rec)
-                print(f"[WORKER] {i}/{len(batch)} OK: {rec['title'][:60]}")
-            except WebDriverException as e:
-                print(f"[WORKER] ERR {it['link']}: {e}")
-                continue
-    finally:
-        try:
-            driver.quit()
-        except Exception:
-            pass
-    return out
+class DetailWorker:
+    """One crawl worker's resources: a keep-alive HTTP session and access to the browser pool.
+
+    fetch_mode "http" reads each page over HTTP and only borrows a pooled
+    Firefox for pages missing authors or an abstract (with a CrawlState, not
+    again for a page the browser found no abstract on, while its HTTP
+    extraction stays the same); "selenium" renders every page in a pooled
+    browser. Politeness is the engine's per-host rate limit, so no per-page
+    sleep happens here.
+
+    With a CrawlState, pages crawled within ``max_age`` seconds are not
+    requested at all, others are fetched with conditional headers, and every
+    extracted record is stored with its hash so unchanged pages are not
+    reported as changes.
+    """
 
-def chunk(items: List[Dict], n: int) -> List[List[Dict]]:
-    if n <= 1:
-        return [items]
-    size = ceil(len(items) / n)
-    return [items[i:i+size] for i in range(0, len(items), size)]
+    def __init__(self, pool: DriverPool, fetch_mode: str = "http",
+                 state: Optional[CrawlState] = None, max_age: float = 0, timings: Optional[FieldTimings] = None,
+                 metrics: Optional[CrawlMetrics] = None, profiler: Optional[WorkerProfiler] = None,
+                 cache: Optional[PageCache] = None):
+        self.pool = pool
+        self.cache = cache
+        self.timings = timings
+        self.metrics = metrics
+        self.profiler = profiler if profiler is not None and profiler.claim() else None
+        self.fetch_mode = fetch_mode
+        self.state = state
+        self.max_age = max_age
+        self.session = make_session() if fetch_mode == "http" else None
+
+    def fetch(self, it: Dict) -> Dict:
+        if self.profiler is not None:
+            return self.profiler.runcall(self._fetch, it)
+        return self._fetch(it)
+
+    def _fetch(self, it: Dict) -> Dict:
+        link = it["link"]
+        t0 = time.perf_counter()
+        nbytes = 0
+        sources: Dict[str, str] = {}
+        http_rec: Optional[Dict] = None
+        row = self.state.get(link) if self.state else None
+        if self.state and self.max_age and self.state.is_fresh(row, self.max_age):
+            self._measure(link, "fresh", t0)
+            return json.loads(row["record"])
+
+        if self.session is not None:
+            try:
+                headers = self.state.conditional_headers(row) if self.state else {}
+                page = fetch_page(self.session, link, headers)
+                nbytes = page.nbytes
+                if page.status == 304 and row is not None:
+                    self.state.touch(link)
+                    print(f"[WORKER] NOT MODIFIED: {link}")
+                    self._measure(link, "not_modified", t0, nbytes)
+                    return json.loads(row["record"])
+                if self.cache is not None:
+                    self.cache.put(link, page.html, "http")
+                rec, complete = extract_detail_from_html(page.html, link, it.get("title", ""), sources)
+                if complete:
+                    self._store(link, rec, "http", page.etag, page.last_modified)
+                    self._measure(link, "http", t0, nbytes, sources)
+                    return rec
+                if row is not None and self.state.rendered_without_abstract(link, rec):
+                    # Unchanged since the browser last rendered it and found no abstract either
+                    self.state.touch(link)
+                    print(f"[WORKER] NO ABSTRACT (rendered before): {link}")
+                    self._measure(link, "no_abstract", t0, nbytes, sources)
+                    return json.loads(row["record"])
+                http_rec = rec
+            except requests.RequestException as e:
+                print(f"[WORKER] HTTP ERR {link}: {e}; falling back to browser")
+
+        # A crashed browser is discarded by the pool and the engine requeues the link
+        with self.pool.driver() as driver:
+            rec = extract_detail_for_link(driver, link, it.get("title",""), 0, self.timings, sources)
+            if self.cache is not None:
+                # the rendered DOM, so a reparse sees what the browser saw
+                self.cache.put(link, driver.page_source, "browser")
+        self._store(link, rec, "browser")
+        if http_rec is not None and self.state:
+            self.state.note_rendered(link, http_rec, rec)
+        self._measure(link, "browser" if self.session is None else "http+browser", t0, nbytes, sources)
+        return rec
+
+    def _measure(self, link: str, via: str, t0: float, nbytes: int = 0, sources: Optional[Dict[str, str]] = None):
+        if self.metrics is not None:
+            self.metrics.page(link, via, (time.perf_counter() - t0) * 1000, nbytes, sources)
+
+    def _store(self, link: str, rec: Dict, via: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        change = self.state.record(link, rec, etag, last_modified) if self.state else "new"
+        print(f"[WORKER] OK ({via}, {change}): {rec['title'][:60]}")
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
 
 # =========================== Orchestrator ===========================
 def main():
     ap = argparse.ArgumentParser(description="Coventry PurePortal scraper (listing → details: authors + abstract + date).")
     ap.add_argument("--outdir", default="data")
     ap.add_argument("--max-pages", type=int, default=50, help="Max listing pages to scan (stops early on empty).")
-    ap.add_argument("--workers", type=int, default=8, help="Parallel headless browsers for detail pages.")
-    ap.add_argument("--delay", type=float, default=0.35, help="Per-detail polite delay (seconds).")
+    ap.add_argument("--workers", type=int, default=8, help="Concurrent detail-page workers.")
+    ap.add_argument("--delay", type=float, default=0.35,
+                    help="Polite minimum interval between requests to the same host (seconds).")
+    ap.add_argument("--burst", type=int, default=1, help="Requests a host may receive back-to-back before --delay applies.")
+    ap.add_argument("--max-retries", type=int, default=3, help="Retries per detail or listing page (jittered exponential backoff).")
     ap.add_argument("--listing-headless", action="store_true", help="Run listing headless (not recommended).")
     ap.add_argument("--legacy-headless", action="store_true", help="Use legacy --headless (no effect for Firefox).")
+    ap.add_argument("--listing-mode", choices=["http", "selenium"], default="http",
+                    help="Fetch listing pages concurrently over HTTP (falls back to the browser if that finds nothing).")
+    ap.add_argument("--listing-workers", type=int, default=4, help="Concurrent listing page fetches (http mode).")
+    ap.add_argument("--browsers", type=int, default=2, help="Max concurrent Firefox instances for detail pages.")
+    ap.add_argument("--recycle-after", type=int, default=200, help="Restart a detail browser after this many pages (0 = never).")
+    ap.add_argument("--no-block-resources", action="store_true",
+                    help="Let detail browsers load images, fonts, CSS and third-party requests.")
+    ap.add_argument("--fetch-mode", choices=["http", "selenium"], default="http",
+                    help="Detail pages: plain HTTP with browser fallback for incomplete pages, or always Selenium.")
+    ap.add_argument("--state", default=None,
+                    help="SQLite crawl state (default: OUTDIR/crawl_state.sqlite3; '' disables).")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Stop listing at the first page with no new links and skip recently crawled details.")
+    ap.add_argument("--recheck-after", type=float, default=7.0,
+                    help="Incremental mode: re-request known detail pages older than this many days.")
+    ap.add_argument("--resume", action="store_true",
+                    help="Continue an interrupted crawl: reuse the saved links and skip details already in the JSONL log.")
+    ap.add_argument("--fsync-every", type=int, default=50, help="fsync the JSONL log after this many records.")
+    ap.add_argument("--compact-only", action="store_true",
+                    help="Just rebuild publications.json from publications.jsonl and the saved links.")
+    ap.add_argument("--page-cache", default=None,
+                    help="Compressed raw HTML cache for re-extraction (default: OUTDIR/page_cache; '' disables).")
+    ap.add_argument("--page-cache-mb", type=int, default=512, help="Evict least recently used pages beyond this size.")
+    ap.add_argument("--reparse-only", action="store_true",
+                    help="Don't crawl: rerun extraction over the page cache on all cores and rewrite the outputs.")
+    ap.add_argument("--reparse-workers", type=int, default=None, help="Processes for --reparse-only (default: all cores).")
+    ap.add_argument("--metrics", default=None,
+                    help="Per-stage/per-page metrics JSONL (default: OUTDIR/crawl_metrics.jsonl; '' disables the file).")
+    ap.add_argument("--profile-workers", type=int, default=0,
+                    help="cProfile the fetches of this many detail workers, one fetch at a time (written to OUTDIR/crawl_profile.prof).")
     args = ap.parse_args()
 
     outdir = Path(args.outdir); outdir.mkdir(parents=True, exist_ok=True)
+    links_path = outdir / "publications_links.json"
+    log_path = outdir / "publications.jsonl"
+
+    state = None
+    state_path = str(outdir / "crawl_state.sqlite3") if args.state is None else args.state
 
-    # -------- Stage 1: listing
-    print(f"[STAGE 1] Collecting links (up to {args.max_pages} pages)…")
-    listing = gather_all_listing_links(args.max_pages, headless_listing=args.listing_headless, legacy_headless=args.legacy_headless)
-    if not listing:
+    if args.compact_only:
+        listing = json.loads(links_path.read_text(encoding="utf-8")) if links_path.exists() else []
+        # no new run, but keep the author ids earlier crawls assigned
+        state = CrawlState(state_path) if state_path and os.path.exists(state_path) else None
+        try:
+            write_final(outdir, compact(str(log_path), listing), state)
+        finally:
+            if state:
+                state.close()
+        return
+
+    cache_path = str(outdir / "page_cache") if args.page_cache is None else args.page_cache
+    cache = PageCache(cache_path, args.page_cache_mb * 1024 * 1024) if cache_path else None
+
+    if state_path:
+        state = CrawlState(state_path)
+        state.begin_run(full_scan=not (args.incremental or args.reparse_only))
+        print(f"[STATE] Run {state.run_id} using {state_path}")
+    known = state.known_urls() if (state and args.incremental) else None
+
+    if args.reparse_only:
+        if cache is None:
+            ap.error("--reparse-only needs the page cache")
+        reparse_cached(args, outdir, links_path, log_path, cache, state)
+        return
+
+    metrics = CrawlMetrics(str(outdir / "crawl_metrics.jsonl") if args.metrics is None else args.metrics or None)
+    profiler = WorkerProfiler(args.profile_workers, str(outdir / "crawl_profile.prof")) if args.profile_workers else None
+
+    def report():
+        metrics.print_summary()
+        metrics.close()
+        if profiler is not None:
+            profiler.dump()
+
+    # -------- Stage 1 + 2: listing pages stream links straight into the detail workers
+    resuming = args.resume and links_path.exists()
+    done = done_links(str(log_path)) if args.resume else set()
+    if done:
+        print(f"[STAGE 2] {len(done)} details already in {log_path.name}; skipping them.")
+    writer = JsonlWriter(str(log_path), append=args.resume, fsync_every=args.fsync_every)
+    pool = DriverPool(partial(make_driver, True, args.legacy_headless, not args.no_block_resources),
+                      size=args.browsers, max_pages=args.recycle_after)
+    max_age = args.recheck_after * 86400 if args.incremental else 0
+    timings = FieldTimings()  # browser-rendered pages only
+    engine = CrawlEngine(
+        fetch=lambda worker, it: worker.fetch(it),
+        make_state=lambda: DetailWorker(pool, args.fetch_mode, state, max_age, timings, metrics, profiler,
+                                        cache),
+        close_state=lambda worker: worker.close(),
+        concurrency=args.workers,
+        rate_per_host=1 / args.delay if args.delay > 0 else 0,
+        burst=args.burst,
+        max_retries=args.max_retries,
+        on_result=lambda it, rec: writer.write(rec),
+        keep_results=False,
+        on_error=lambda it, attempt, e, will_retry: metrics.retry(it["link"], attempt, str(e), will_retry),
+    )
+    submitted: Set[str] = set()
+    # Only a listing that reached its last page may retire publications it no longer shows
+    listing_complete = False
+
+    def submit_rows(rows: List[Dict]):
+        for r in rows:
+            if r["link"] not in submitted:
+                submitted.add(r["link"])
+                if r["link"] not in done:
+                    engine.submit(r)
+
+    async def listing_stage() -> List[Dict]:
+        with metrics.stage("listing"):
+            return await _listing()
+
+    async def _listing() -> List[Dict]:
+        nonlocal listing_complete
+        if resuming:
+            listing = json.loads(links_path.read_text(encoding="utf-8"))
+            print(f"[STAGE 1] Resuming with {len(listing)} saved links.")
+            submit_rows(listing)
+            return listing
+        print(f"[STAGE 1] Collecting links (up to {args.max_pages} pages, {args.listing_mode})…")
+        listing = []
+        if args.listing_mode == "http":
+            session = make_session(pool_size=args.listing_workers)
+            try:
+                lister = ListingCrawler(session, BASE_URL, args.max_pages, lambda idx, rows: submit_rows(rows),
+                                        concurrency=args.listing_workers, limiter=engine.limiter,
+                                        known=known, metrics=metrics, max_retries=args.max_retries)
+                listing = await lister.run()
+                listing_complete = lister.complete
+            finally:
+                session.close()
+            if not listing:
+                print("[STAGE 1] No links over HTTP; falling back to the browser listing.")
+        if not listing:
+            listing, listing_complete = await asyncio.to_thread(gather_all_listing_links, args.max_pages,
+                                                                args.listing_headless, args.legacy_headless, known)
+            submit_rows(listing)
+        if listing:
+            links_path.write_text(json.dumps(listing, indent=2), encoding="utf-8")
+        print(f"[STAGE 1] Collected {len(listing)} unique links.")
+        return listing
+
+    async def crawl() -> List[Dict]:
+        engine.start()
+        try:
+            listing = await listing_stage()
+        except BaseException:
+            await engine.shutdown()
+            raise
+        await engine.join()
+        return listing
+
+    print(f"[STAGE 2] Scraping details with {args.workers} workers ({args.fetch_mode} mode) as links arrive…")
+    try:
+        with metrics.stage("listing+details"):
+            listing = asyncio.run(crawl())
+    finally:
+        writer.close()
+        pool.close()
+        print(f"[STAGE 2] {engine.stats.summary()}; {writer.written} records appended to {log_path}")
+        pool.print_report()
+        timings.print_summary()
+        for row in pool.report():
+            metrics.browser(row)
+        if cache is not None:
+            print(f"[CACHE] {cache.stats()}")
+            cache.close()
+    if not listing and not state:
         print("No publications found on listing pages.")
+        report()
         return
-    (outdir / "publications_links.json").write_text(json.dumps(listing, indent=2), encoding="utf-8")
-    print(f"[STAGE 1] Collected {len(listing)} unique links.")
-
-    # -------- Stage 2: details (parallel)
-    print(f"[STAGE 2] Scraping details with {args.workers} headless workers…")
-    batches = chunk(listing, args.workers)
-    results: List[Dict] = []
-    with ThreadPoolExecutor(max_workers=args.workers) as ex:
-        futs = [ex.submit(worker_detail_batch, batch, True, args.legacy_headless, args.delay) for batch in batches]
-        done = 0
-        for fut in as_completed(futs):
-            part = fut.result() or []
-            results.extend(part)
-            done += 1
-            print(f"[STAGE 2] Completed {done}/{len(batches)} batches (+{len(part)} items)")
+    if state:
+        state.mark_seen(r["link"] for r in listing)
+        if not args.incremental and not listing_complete:
+            print("[STATE] Listing scan incomplete; keeping publications it did not list")
 
     # -------- Save
-    # de-dupe by link; prefer detail results
-    by_link: Dict[str, Dict] = {}
-    for it in listing:
-        by_link[it["link"]] = {"title": it["title"], "link": it["link"]}
-    for rec in results:
-        by_link[rec["link"]] = rec  # overwrite with full detail
+    with metrics.stage("save"):
+        save(outdir, log_path, listing, state, full_scan=not args.incremental and listing_complete)
+    report()
+
+def reparse_cached(args, outdir: Path, links_path: Path, log_path: Path, cache: PageCache,
+                   state: Optional[CrawlState]):
+    """Re-extract every cached page and fold the new records into the outputs like a crawl would."""
+    listing = json.loads(links_path.read_text(encoding="utf-8")) if links_path.exists() else []
+    titles = {it["link"]: it.get("title", "") for it in listing}
+    tasks = [(url, path, titles.get(url, "")) for url, path in cache.entries()]
+    print(f"[REPARSE] {cache.stats()}; re-extracting {len(tasks)} pages…")
+    t0 = time.perf_counter()
+    writer = JsonlWriter(str(log_path), append=True, fsync_every=500)
+    counts: Dict[str, int] = {}
+    try:
+        for url, rec, _ in reparse_all(tasks, args.reparse_workers):
+            if rec is None:
+                counts["missing"] = counts.get("missing", 0) + 1
+                continue
+            if state:
+                row = state.get(url)
+                change = state.record(url, rec, row["etag"] if row else None, row["last_modified"] if row else None)
+            else:
+                change = "extracted"
+            counts[change] = counts.get(change, 0) + 1
+            writer.write(rec)
+    finally:
+        writer.close()
+        cache.close()
+    print(f"[REPARSE] {len(tasks)} pages in {time.perf_counter() - t0:.1f}s: "
+          + ", ".join(f"{n} {k}" for k, n in sorted(counts.items())))
+    save(outdir, log_path, listing, state, full_scan=False)
+
+def save(outdir: Path, log_path: Path, listing: List[Dict], state: Optional[CrawlState], full_scan: bool):
+    known: List[Dict] = []
+    if state:
+        # Only a full scan that listed every page can tell a publication was taken down;
+        # incremental, capped (--max-pages) or failed listings keep everything already crawled
+        if full_scan and listing:
+            removed = state.mark_removed_unseen()
+            if removed:
+                print(f"[STATE] {len(removed)} publications no longer listed")
+        known = state.records()
+    # de-dupe by link; prefer this run's detail results, then earlier crawls, in listing order
+    by_link = compact(str(log_path), listing, known)
+    if state:
+        delta = state.delta()
+        state.finish_run()
+        delta_path = outdir / "publications_delta.json"
+        delta_path.write_text(json.dumps(delta, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[STATE] Delta: +{len(delta['added'])} ~{len(delta['updated'])} -{len(delta['removed'])} → {delta_path}")
+
+    try:
+        write_final(outdir, by_link, state)
+    finally:
+        if state:
+            state.close()
 
+def write_final(outdir: Path, by_link: Dict[str, Dict], state: Optional[CrawlState] = None):
     final_rows = list(by_link.values())
+    # canonical author ids; the JSONL log and crawl state keep the raw extraction.
+    # Ids given by earlier crawls stay put, so records missing from a delta never go stale
+    authors = canonicalize(final_rows, known=state.author_ids() if state else None)
+    if state:
+        state.keep_author_ids(assigned_ids(final_rows))
+    authors_path = outdir / "authors.json"
+    authors_path.write_text(json.dumps(authors, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"[AUTHORS] {sum(len(a['variants']) for a in authors.values())} spellings → {len(authors)} authors "
+          f"→ {authors_path}")
     out_path = outdir / "publications.json"
-    out_path.write_text(json.dumps(final_rows, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp_path = outdir / "publications.json.tmp"
+    tmp_path.write_text(json.dumps(final_rows, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp_path, out_path)
     print(f"[DONE] Saved {len(final_rows)} records → {out_path}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,180 @@
+"""Single-round-trip detail extraction for Selenium.
+
+Every ``find_element`` / ``.text`` / ``get_attribute`` is a separate call to
+geckodriver. Instead, ``EXTRACT_JS`` runs once per page inside the browser:
+it expands collapsed author lists, then collects every candidate value for
+every selector (in the order parsing.py lists them) into one JSON payload,
+timing each field group with performance.now(). ``record_from_payload``
+applies the same fallback order as the HTTP extractor on the Python side.
+"""
+import threading
+from typing import Dict, List, Optional
+
+from parsing import (
+    PERSON_SELECTORS, DATE_SELECTORS, ABSTRACT_SELECTORS, META_AUTHORS, META_DATES,
+    _uniq, authors_from_subtitle_line, authors_from_jsonld, first_found, is_abstract,
+)
+
+# Run with execute_async_script(EXTRACT_JS, selectors); the last argument is the callback.
+EXTRACT_JS = r"""
+const sel = arguments[0], done = arguments[arguments.length - 1];
+const t = {};
+const timed = (name, fn) => { const t0 = performance.now(); const v = fn(); t[name] = performance.now() - t0; return v; };
+// WebElement.text is the rendered text; unrendered elements read as ""
+const text = el => (el && el.getClientRects().length) ? el.innerText.trim() : "";
+
+// "show more" / "show all" buttons that collapse long author lists
+const clicked = timed("expand", () => {
+  let n = 0;
+  for (const b of Array.from(document.querySelectorAll("button")).filter(b => /show|more/.test(b.textContent.toLowerCase())).slice(0, 2)) {
+    try { b.scrollIntoView({block: "center"}); b.click(); n++; } catch (e) {}
+  }
+  return n;
+});
+
+setTimeout(() => {
+  const out = {timings_ms: t};
+  out.title = timed("title", () => { const h = document.querySelector("h1"); return h ? text(h) : null; });
+  out.persons = timed("persons", () => sel.persons.map(s =>
+    Array.from(document.querySelectorAll(s)).map(a => ({name: text(a), href: a.href || ""}))));
+  out.subtitle = timed("subtitle", () => {
+    const d = document.querySelector("span.date");
+    if (!d) return "";
+    let p = d.parentElement;
+    for (let a = p; a; a = a.parentElement) {
+      if (Array.from(a.classList).some(c => c.includes("subtitle"))) { p = a; break; }
+    }
+    return text(p);
+  });
+  out.meta = timed("meta", () => {
+    const m = {};
+    for (const nm of sel.meta) {
+      m[nm] = Array.from(document.querySelectorAll(`meta[name="${nm}"], meta[property="${nm}"]`))
+        .map(e => (e.getAttribute("content") || "").trim()).filter(Boolean);
+    }
+    return m;
+  });
+  out.jsonld = timed("jsonld", () =>
+    Array.from(document.querySelectorAll('script[type="application/ld+json"]')).map(s => s.textContent));
+  out.dates = timed("dates", () => sel.dates.map(s => {
+    const e = document.querySelector(s);
+    return e ? (e.getAttribute("datetime") || text(e)) : null;
+  }));
+  out.abstracts = timed("abstracts", () => sel.abstracts.map(s => {
+    const e = document.querySelector(s);
+    return e ? text(e) : null;
+  }));
+  out.heading_abstract = timed("heading_abstract", () => {
+    for (const h of document.querySelectorAll("h2, h3")) {
+      if (!text(h).toLowerCase().includes("abstract")) continue;
+      // XPath following::*[self::div or self::p or self::section][1]
+      for (const e of document.querySelectorAll("div, p, section")) {
+        const pos = h.compareDocumentPosition(e);
+        if ((pos & Node.DOCUMENT_POSITION_FOLLOWING) && !(pos & Node.DOCUMENT_POSITION_CONTAINED_BY)) {
+          const txt = text(e);
+          if (txt) return txt;
+          break;
+        }
+      }
+    }
+    return null;
+  });
+  done(out);
+}, clicked ? 400 : 0);
+"""
+
+SELECTOR_ARGS = {
+    "persons": PERSON_SELECTORS,
+    "dates": DATE_SELECTORS,
+    "abstracts": ABSTRACT_SELECTORS,
+    "meta": META_AUTHORS + META_DATES,
+}
+
+
+def _meta(payload: Dict, names: List[str]) -> List[str]:
+    return _uniq([v for nm in names for v in payload["meta"].get(nm, [])])
+
+
+def record_from_payload(payload: Dict, link: str, title_hint: str = "",
+                        sources: Optional[Dict[str, str]] = None) -> Dict:
+    """Turn EXTRACT_JS output into a record, first selector with a value winning.
+
+    ``sources`` works as in ``extract_detail_from_html``.
+    """
+    title = payload["title"] if payload["title"] is not None else (title_hint or "")
+    src = {"authors": "none", "date": "none", "abstract": "none"}
+
+    authors = []
+    for sel, found in zip(PERSON_SELECTORS, payload["persons"]):
+        authors = [{"name": a["name"], "profile": a["href"]} for a in found if a["name"]]
+        if authors:
+            src["authors"] = sel
+            break
+    if not authors:
+        src["authors"], fallback_names = first_found(
+            ("subtitle", lambda: authors_from_subtitle_line(payload["subtitle"], title)),
+            ("meta", lambda: _meta(payload, META_AUTHORS)),
+            ("jsonld", lambda: authors_from_jsonld(payload["jsonld"])),
+        )
+        authors = [{"name": n, "profile": ""} for n in _uniq(fallback_names)]
+
+    published_date: Optional[str] = None
+    for sel, d in zip(DATE_SELECTORS, payload["dates"]):
+        if d:
+            published_date, src["date"] = d, sel
+            break
+    if not published_date:
+        metas = _meta(payload, META_DATES)
+        if metas:
+            published_date, src["date"] = metas[0], "meta"
+
+    abstract_txt = None
+    for sel, a in zip(ABSTRACT_SELECTORS, payload["abstracts"]):
+        if is_abstract(a):
+            abstract_txt, src["abstract"] = a, sel
+            break
+    if not abstract_txt and payload["heading_abstract"]:
+        abstract_txt, src["abstract"] = payload["heading_abstract"], "heading"
+
+    if sources is not None:
+        sources.update(src)
+
+    return {
+        "title": title,
+        "link": link,
+        "authors": authors,
+        "published_date": published_date,
+        "abstract": abstract_txt or ""
+    }
+
+
+class FieldTimings:
+    """Per-field time (ms) across pages: navigation and waits on the Python side,
+    each selector group from the in-browser timings."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, timings: Dict[str, float]):
+        with self._lock:
+            for name, ms in timings.items():
+                self.samples.setdefault(name, []).append(ms)
+
+    def summary(self) -> List[Dict]:
+        rows = []
+        with self._lock:
+            for name, vals in self.samples.items():
+                vals = sorted(vals)
+                rows.append({"field": name, "pages": len(vals), "mean_ms": sum(vals) / len(vals),
+                             "p95_ms": vals[min(len(vals) - 1, int(0.95 * len(vals)))], "total_ms": sum(vals)})
+        return sorted(rows, key=lambda r: -r["total_ms"])
+
+    def print_summary(self):
+        rows = self.summary()
+        if not rows:
+            return
+        print(f"[TIMING] {'field':<18}{'pages':>7}{'mean ms':>10}{'p95 ms':>10}{'total s':>10}")
+        for r in rows:
+            print(f"[TIMING] {r['field']:<18}{r['pages']:>7}{r['mean_ms']:>10.1f}{r['p95_ms']:>10.1f}"
+                  f"{r['total_ms'] / 1000:>10.2f}")
@@ -0,0 +1,172 @@
+"""asyncio crawl core: shared work queue, per-host token buckets, bounded concurrency.
+
+Workers pull items from one queue as they become idle, so a slow page only
+delays itself. Fetching stays blocking (requests / Selenium) and runs in a
+thread per worker; the event loop only schedules, rate-limits and retries.
+"""
+import asyncio, random, time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """``rate`` tokens per second, holding at most ``burst``."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HostRateLimiter:
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    async def acquire(self, url: str):
+        if self.rate <= 0:
+            return
+        host = urlsplit(url).netloc
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        await bucket.acquire()
+
+
+@dataclass
+class CrawlStats:
+    started: float = field(default_factory=time.monotonic)
+    finished: Optional[float] = None
+    ok: int = 0
+    failed: int = 0
+    retries: int = 0
+    rate_wait: float = 0.0  # seconds workers spent waiting on the per-host rate limit
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    def summary(self) -> str:
+        rate = self.ok / self.elapsed if self.elapsed else 0.0
+        return (f"{self.ok} ok, {self.failed} failed, {self.retries} retries "
+                f"in {self.elapsed:.1f}s ({rate:.2f} pages/s, {self.rate_wait:.1f}s waiting on rate limits)")
+
+
+class CrawlEngine:
+    """Run ``fetch(state, item)`` over items with ``concurrency`` workers.
+
+    ``make_state()`` creates each worker's private resources (HTTP session,
+    browser) and ``close_state(state)`` releases them. Failed items are retried
+    up to ``max_retries`` times after a jittered exponential backoff, without
+    holding a worker while they wait.
+    """
+
+    def __init__(self, fetch: Callable[[Any, Dict], Dict], make_state: Callable[[], Any] = lambda: None,
+                 close_state: Callable[[Any], None] = lambda state: None, concurrency: int = 8,
+                 rate_per_host: float = 2.0, burst: int = 1, max_retries: int = 3,
+                 backoff_base: float = 1.0, backoff_max: float = 30.0,
+                 on_result: Optional[Callable[[Dict, Dict], None]] = None, keep_results: bool = True,
+                 on_error: Optional[Callable[[Dict, int, Exception, bool], None]] = None):
+        self.fetch = fetch
+        self.make_state = make_state
+        self.close_state = close_state
+        self.concurrency = max(1, concurrency)
+        self.limiter = HostRateLimiter(rate_per_host, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.on_result = on_result
+        # Streaming callers (on_result) can drop records instead of holding them all
+        self.keep_results = keep_results
+        self.on_error = on_error  # (item, attempt, error, will_retry)
+        self.stats = CrawlStats()
+        self.results: List[Dict] = []
+        self.failures: List[Dict] = []
+
+    def backoff(self, attempt: int) -> float:
+        # "full jitter": uniform over [0, min(cap, base * 2^attempt)]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _retry_later(self, queue: asyncio.Queue, item: Dict, attempt: int, delay: float):
+        await asyncio.sleep(delay)
+        await queue.put((item, attempt))
+        # The failed attempt stays unfinished until its retry is queued, so join() waits for it
+        queue.task_done()
+
+    async def _worker(self, name: int, queue: asyncio.Queue):
+        state = await asyncio.to_thread(self.make_state)
+        try:
+            while True:
+                item, attempt = await queue.get()
+                t0 = time.monotonic()
+                await self.limiter.acquire(item["link"])
+                self.stats.rate_wait += time.monotonic() - t0
+                try:
+                    rec = await asyncio.to_thread(self.fetch, state, item)
+                except Exception as e:
+                    if self.on_error:
+                        self.on_error(item, attempt, e, attempt < self.max_retries)
+                    if attempt < self.max_retries:
+                        self.stats.retries += 1
+                        delay = self.backoff(attempt)
+                        print(f"[ENGINE] w{name} retry {attempt + 1}/{self.max_retries} in {delay:.1f}s {item['link']}: {e}")
+                        asyncio.create_task(self._retry_later(queue, item, attempt + 1, delay))
+                        continue
+                    self.stats.failed += 1
+                    self.failures.append({"link": item["link"], "error": str(e)})
+                    print(f"[ENGINE] w{name} GAVE UP {item['link']}: {e}")
+                    queue.task_done()
+                    continue
+                self.stats.ok += 1
+                if self.keep_results:
+                    self.results.append(rec)
+                if self.on_result:
+                    self.on_result(item, rec)
+                queue.task_done()
+        finally:
+            await asyncio.to_thread(self.close_state, state)
+
+    # Streaming use: start(), submit() as items are discovered, then join().
+    def start(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.workers = [asyncio.create_task(self._worker(i, self.queue)) for i in range(self.concurrency)]
+
+    def submit(self, item: Dict):
+        self.queue.put_nowait((item, 0))
+
+    async def join(self) -> List[Dict]:
+        """Wait until every submitted item is done (call once nothing more will be submitted)."""
+        try:
+            await self.queue.join()
+        finally:
+            await self.shutdown()
+        return self.results
+
+    async def shutdown(self):
+        for w in self.workers:
+            w.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        if self.stats.finished is None:
+            self.stats.finished = time.monotonic()
+
+    async def run(self, items: List[Dict]) -> List[Dict]:
+        self.start()
+        for it in items:
+            self.submit(it)
+        return await self.join()
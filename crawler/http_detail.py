@@ -0,0 +1,205 @@
+"""HTTP-first detail fetching for server-rendered PurePortal pages.
+
+Title, persons, date, abstract, meta tags and JSON-LD are all in the HTML the
+portal sends, so a pooled keep-alive ``requests`` session plus an HTML parser
+reproduces what the browser reads without starting Firefox. The extractor
+mirrors ``extract_detail_for_link`` selector for selector (see parsing.py);
+pages where it finds no authors or no abstract are reported as incomplete so
+the caller can retry them in Selenium.
+"""
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, Comment, NavigableString
+
+from parsing import (
+    PERSON_SELECTORS, DATE_SELECTORS, ABSTRACT_SELECTORS, META_AUTHORS, META_DATES,
+    _uniq, authors_from_subtitle_line, authors_from_jsonld, first_found, is_abstract,
+)
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:129.0) Gecko/20100101 Firefox/129.0"
+
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+# =========================== Session ===========================
+def make_session(pool_size: int = 8, retries: int = 3) -> requests.Session:
+    """Keep-alive session with a bounded connection pool and backoff on 429/5xx."""
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=frozenset({"GET", "HEAD"}), respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT, "Accept-Language": "en-US,en;q=0.8"})
+    return session
+
+class FetchResult(NamedTuple):
+    status: int
+    html: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    nbytes: int = 0
+
+def fetch_page(session: requests.Session, url: str, headers: Optional[Dict[str, str]] = None,
+               timeout: float = 30) -> FetchResult:
+    """GET with optional conditional headers; a 304 comes back with empty html."""
+    resp = session.get(url, headers=headers or {}, timeout=timeout)
+    if resp.status_code != 304:
+        resp.raise_for_status()
+    return FetchResult(resp.status_code, resp.text if resp.status_code != 304 else "",
+                       resp.headers.get("ETag"), resp.headers.get("Last-Modified"), len(resp.content))
+
+# =========================== Text helpers ===========================
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "figcaption",
+    "footer", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "ol",
+    "p", "pre", "section", "table", "td", "th", "tr", "ul",
+}
+HIDDEN_TAGS = {"script", "style", "noscript", "template"}
+WHITESPACE = re.compile(r"\s+")
+
+def visible_text(el) -> str:
+    """Approximate WebElement.text (innerText): collapse whitespace, one line per
+    block element, a blank line around paragraphs, a line break per <br>."""
+    parts: List = []  # text, or the number of line breaks a block boundary requires
+
+    def walk(node):
+        for child in node.children:
+            if isinstance(child, NavigableString):
+                if not isinstance(child, Comment):
+                    parts.append(WHITESPACE.sub(" ", str(child)))
+            elif child.name in HIDDEN_TAGS:
+                continue
+            elif child.name == "br":
+                parts.append("\n")
+            else:
+                breaks = 2 if child.name == "p" else 1 if child.name in BLOCK_TAGS else 0
+                parts.append(breaks)
+                walk(child)
+                parts.append(breaks)
+
+    walk(el)
+    out, pending = "", 0
+    for part in parts:
+        if isinstance(part, int):
+            pending = max(pending, part)
+            continue
+        if pending or not out or out.endswith(("\n", " ")):
+            part = part.lstrip(" ")  # no space at the start of a line, nor two in a row
+        if not part:
+            continue
+        if out and pending:
+            out = out.rstrip(" ") + "\n" * pending
+        pending = 0
+        out += part
+    return "\n".join(line.strip(" ") for line in out.strip().split("\n"))
+
+def _meta_list(soup: BeautifulSoup, names_or_props: List[str]) -> List[str]:
+    vals = []
+    for nm in names_or_props:
+        for el in soup.select(f'meta[name="{nm}"], meta[property="{nm}"]'):
+            c = (el.get("content") or "").strip()
+            if c:
+                vals.append(c)
+    return _uniq(vals)
+
+def _subtitle_line(soup: BeautifulSoup) -> str:
+    date_el = soup.select_one("span.date")
+    if date_el is None:
+        return ""
+    # prefer ancestor with class 'subtitle' (portal markup), else parent
+    subtitle = date_el.find_parent(lambda t: any("subtitle" in c for c in (t.get("class") or [])))
+    subtitle = subtitle or date_el.parent
+    return visible_text(subtitle) if subtitle is not None else ""
+
+# =========================== Extraction ===========================
+def extract_detail_from_html(html: str, link: str, title_hint: str = "",
+                             sources: Optional[Dict[str, str]] = None) -> Tuple[Dict, bool]:
+    """Parse a detail page. Returns (record, complete); complete means authors and abstract were found.
+
+    If ``sources`` is given it is filled with the selector or fallback that
+    produced the authors, date and abstract (for crawl metrics).
+    """
+    soup = BeautifulSoup(html, PARSER)
+    src = {"authors": "none", "date": "none", "abstract": "none"}
+
+    # Title
+    h1 = soup.select_one("h1")
+    title = visible_text(h1) if h1 is not None else ""
+    title = title or title_hint or ""
+
+    # AUTHORS: collect name + profile link if available
+    authors: List[Dict] = []
+    for sel in PERSON_SELECTORS:
+        for el in soup.select(sel):
+            name = visible_text(el)
+            href = urljoin(link, el.get("href") or "")
+            if name:
+                authors.append({"name": name, "profile": href})
+        if authors:
+            src["authors"] = sel
+            break
+
+    # Fallbacks if no structured authors found
+    if not authors:
+        jsonld = [s.string or s.get_text() for s in soup.select('script[type="application/ld+json"]')]
+        src["authors"], fallback_names = first_found(
+            ("subtitle", lambda: authors_from_subtitle_line(_subtitle_line(soup), title)),
+            ("meta", lambda: _meta_list(soup, META_AUTHORS)),
+            ("jsonld", lambda: authors_from_jsonld(jsonld)),
+        )
+        authors = [{"name": n, "profile": ""} for n in _uniq(fallback_names)]
+
+    # PUBLISHED DATE (first element per selector, as find_element does)
+    published_date: Optional[str] = None
+    for sel in DATE_SELECTORS:
+        el = soup.select_one(sel)
+        if el is not None:
+            published_date = el.get("datetime") or visible_text(el)
+            if published_date:
+                src["date"] = sel
+                break
+    if not published_date:
+        metas = _meta_list(soup, META_DATES)
+        if metas:
+            published_date = metas[0]
+            src["date"] = "meta"
+
+    # ABSTRACT
+    abstract_txt = None
+    for sel in ABSTRACT_SELECTORS:
+        el = soup.select_one(sel)
+        if el is not None:
+            txt = visible_text(el)
+            if is_abstract(txt):
+                abstract_txt = txt
+                src["abstract"] = sel
+                break
+    if not abstract_txt:
+        for h in soup.select("h2, h3"):
+            if "abstract" in visible_text(h).lower():
+                nxt = h.find_next(["div", "p", "section"])
+                txt = visible_text(nxt) if nxt is not None else ""
+                if txt:
+                    abstract_txt = txt
+                    src["abstract"] = "heading"
+                    break
+
+    if sources is not None:
+        sources.update(src)
+    record = {
+        "title": title,
+        "link": link,
+        "authors": authors,
+        "published_date": published_date,
+        "abstract": abstract_txt or ""
+    }
+    return record, bool(authors) and bool(abstract_txt)
@@ -0,0 +1,157 @@
+"""Concurrent listing stage over HTTP.
+
+The listing pages are server-rendered, so they are fetched with the pooled
+session and parsed with the same selectors as ``scrape_listing_page``. Page 0's
+pagination links say how many pages to fetch first; past that, pages are
+probed in doubling strides until one comes back empty. The remaining pages
+are fetched concurrently and every page's rows are handed to ``on_rows`` as
+soon as they arrive, so detail fetching starts before the listing finishes.
+
+A page whose fetch fails is retried with jittered exponential backoff and,
+if it still fails, recorded in ``failed`` rather than read as an empty page.
+``complete`` says whether a full scan reached the end of the listing (an
+empty page) with no failed pages and without stopping at ``max_pages``;
+only then may the caller treat publications it did not list as removed.
+"""
+import asyncio, random, re, time
+from typing import Callable, Dict, List, Optional, Set
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup
+
+from http_detail import PARSER, fetch_page, visible_text
+
+PAGE_PARAM = re.compile(r"[?&;]page=(\d+)")  # ";" for &amp;-escaped hrefs
+
+
+def extract_listing_from_html(html: str, base_url: str) -> List[Dict]:
+    soup = BeautifulSoup(html, PARSER)
+    rows = []
+    for a in soup.select(".result-container h3.title a"):
+        title = visible_text(a)
+        link = urljoin(base_url, a.get("href") or "")
+        if title and a.get("href"):
+            rows.append({"title": title, "link": link})
+    return rows
+
+
+def page_count_from_html(html: str) -> Optional[int]:
+    """Number of listing pages according to the pagination links, if any."""
+    pages = [int(m.group(1)) for m in PAGE_PARAM.finditer(html)]
+    return max(pages) + 1 if pages else None
+
+
+class ListingCrawler:
+    def __init__(self, session: requests.Session, base_url: str, max_pages: int,
+                 on_rows: Callable[[int, List[Dict]], None], concurrency: int = 4,
+                 limiter=None, known: Optional[Set[str]] = None, metrics=None,
+                 max_retries: int = 3, backoff_base: float = 1.0, backoff_max: float = 30.0):
+        self.session = session
+        self.base_url = base_url
+        self.max_pages = max_pages
+        self.on_rows = on_rows
+        self.concurrency = max(1, concurrency)
+        self.limiter = limiter
+        self.known = known
+        self.metrics = metrics
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pages: Dict[int, List[Dict]] = {}
+        self.failed: Set[int] = set()
+        self.first_html = ""
+        self.complete = False
+
+    async def fetch_page(self, idx: int) -> Optional[List[Dict]]:
+        """Rows of listing page ``idx``, or None if it could not be fetched."""
+        if idx in self.pages:
+            return self.pages[idx]
+        url = f"{self.base_url}?page={idx}"
+        for attempt in range(self.max_retries + 1):
+            if self.limiter is not None:
+                await self.limiter.acquire(url)
+            t0 = time.perf_counter()
+            try:
+                page = await asyncio.to_thread(fetch_page, self.session, url)
+                break
+            except requests.RequestException as e:
+                will_retry = attempt < self.max_retries
+                if self.metrics is not None:
+                    self.metrics.retry(url, attempt, str(e), will_retry)
+                if not will_retry:
+                    print(f"[LIST] GAVE UP page {idx}: {e}")
+                    self.failed.add(idx)
+                    return None
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                print(f"[LIST] ERR page {idx}: {e}; retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+        rows = extract_listing_from_html(page.html, self.base_url) if page.html else []
+        if self.metrics is not None:
+            self.metrics.listing_page(idx, (time.perf_counter() - t0) * 1000, page.nbytes, len(rows))
+        if idx == 0:
+            self.first_html = page.html
+        self.pages[idx] = rows
+        print(f"[LIST] Page {idx + 1}: {len(rows)} links")
+        if rows:
+            self.on_rows(idx, rows)
+        return rows
+
+    def _stale(self, rows: List[Dict]) -> bool:
+        return self.known is not None and all(r["link"] in self.known for r in rows)
+
+    async def run(self) -> List[Dict]:
+        first = await self.fetch_page(0)
+        if not first:
+            return []
+
+        if self.known is not None:
+            # Incremental: the portal lists newest first, so go in order, a window
+            # at a time, and stop after the first page with nothing new.
+            idx, end = 1, self.max_pages
+            stop = self._stale(first)
+            while not stop and idx < end:
+                window = range(idx, min(idx + self.concurrency, end))
+                results = await asyncio.gather(*(self.fetch_page(i) for i in window))
+                # A page that failed even after retries ends the walk too: what
+                # follows it cannot be told apart from the rest of the listing
+                stop = any(not rows or self._stale(rows) for rows in results)
+                idx = window.stop
+            if stop:
+                print(f"[LIST] No new links by page index {idx - 1}; stopping (incremental).")
+        else:
+            # Fetch the pages the pagination advertises (or just page 1 if it
+            # shows none) concurrently; while the last one still has results,
+            # keep going in doubling strides.
+            total = page_count_from_html(self.first_html)
+            start, end = 1, min(total or 2, self.max_pages)
+            sem = asyncio.Semaphore(self.concurrency)
+
+            async def one(i: int):
+                async with sem:
+                    await self.fetch_page(i)
+
+            while True:
+                await asyncio.gather(*(one(i) for i in range(start, end)))
+                if end - 1 in self.failed:
+                    break  # can't tell whether the listing goes on
+                if not self.pages.get(end - 1):
+                    self.complete = not self.failed
+                    break
+                if end >= self.max_pages:
+                    break
+                start, end = end, min(end * 2, self.max_pages)
+            print(f"[LIST] Scanned {len(self.pages)} listing pages (pagination said {total or '?'})")
+
+        if self.failed:
+            print(f"[LIST] Incomplete: {len(self.failed)} pages failed after retries: "
+                  + ", ".join(str(i) for i in sorted(self.failed)))
+        elif self.known is None and not self.complete:
+            print(f"[LIST] Incomplete: stopped at --max-pages {self.max_pages}")
+
+        # dedupe by link, in page order
+        uniq: Dict[str, Dict] = {}
+        for idx in sorted(self.pages):
+            for r in self.pages[idx]:
+                uniq.setdefault(r["link"], r)
+        return list(uniq.values())
@@ -0,0 +1,159 @@
+"""Structured crawl metrics: one JSONL event per stage, page, retry and browser.
+
+Events carry a type (``stage``, ``listing_page``, ``page``, ``retry``,
+``failure``, ``browser``) plus whatever that type measures; ``page`` events
+record how the record was produced (http / browser / fresh / not_modified),
+the time, bytes fetched and which selector or fallback supplied the
+authors, date and abstract. ``print_summary`` folds the same events into a
+table at the end of the run, so the file is only needed for deeper digging.
+"""
+import cProfile, io, pstats, threading, time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from checkpoint import JsonlWriter
+
+
+def _pct(vals: List[float], q: float) -> float:
+    vals = sorted(vals)
+    return vals[min(len(vals) - 1, int(q * len(vals)))] if vals else 0.0
+
+
+class CrawlMetrics:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._writer = JsonlWriter(path, append=False, fsync_every=500, fsync_seconds=30.0) if path else None
+        self._lock = threading.Lock()
+        self.stages: Dict[str, float] = {}
+        self.page_ms: Dict[str, List[float]] = defaultdict(list)
+        self.page_bytes = 0
+        self.listing_pages = 0
+        self.listing_bytes = 0
+        self.retries = 0
+        self.failures = 0
+        self.sources: Dict[str, Counter] = defaultdict(Counter)
+        self.browsers: List[Dict] = []
+
+    def event(self, kind: str, **fields):
+        if self._writer is not None:
+            self._writer.write({"event": kind, "ts": round(time.time(), 3), **fields})
+
+    # ------------------------------ recording ------------------------------
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - t0
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + seconds
+            self.event("stage", stage=name, seconds=round(seconds, 3))
+
+    def listing_page(self, page: int, ms: float, nbytes: int, rows: int):
+        with self._lock:
+            self.listing_pages += 1
+            self.listing_bytes += nbytes
+        self.event("listing_page", page=page, ms=round(ms, 1), bytes=nbytes, rows=rows)
+
+    def page(self, url: str, via: str, ms: float, nbytes: int = 0, sources: Optional[Dict[str, str]] = None,
+             **fields):
+        with self._lock:
+            self.page_ms[via].append(ms)
+            self.page_bytes += nbytes
+            for field, source in (sources or {}).items():
+                self.sources[field][source] += 1
+        self.event("page", url=url, via=via, ms=round(ms, 1), bytes=nbytes, sources=sources or {}, **fields)
+
+    def retry(self, url: str, attempt: int, error: str, will_retry: bool):
+        with self._lock:
+            if will_retry:
+                self.retries += 1
+            else:
+                self.failures += 1
+        self.event("retry" if will_retry else "failure", url=url, attempt=attempt, error=error)
+
+    def browser(self, row: Dict):
+        with self._lock:
+            self.browsers.append(row)
+        self.event("browser", **row)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    # ------------------------------ report ------------------------------
+    def print_summary(self):
+        print("[METRICS] stage            seconds")
+        for name, seconds in self.stages.items():
+            print(f"[METRICS] {name:<16}{seconds:>8.2f}")
+        print(f"[METRICS] listing pages: {self.listing_pages} ({self.listing_bytes / 1e6:.2f} MB)")
+        print(f"[METRICS] {'detail via':<16}{'pages':>7}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for via, vals in sorted(self.page_ms.items()):
+            print(f"[METRICS] {via:<16}{len(vals):>7}{sum(vals) / len(vals):>10.1f}"
+                  f"{_pct(vals, 0.5):>10.1f}{_pct(vals, 0.95):>10.1f}")
+        print(f"[METRICS] detail bytes: {self.page_bytes / 1e6:.2f} MB; retries: {self.retries}; "
+              f"gave up: {self.failures}")
+        for field in ("authors", "date", "abstract"):
+            counts = self.sources.get(field)
+            if counts:
+                print(f"[METRICS] {field} from: " + ", ".join(f"{src} {n}" for src, n in counts.most_common()))
+        for row in self.browsers:
+            print(f"[METRICS] browser #{row['browser']}: startup {row.get('startup_ms', 0):.0f} ms, "
+                  f"{row['pages']} pages, {row['pages_per_min']} pages/min ({row['status']})")
+        if self.path:
+            print(f"[METRICS] events → {self.path}")
+
+
+class WorkerProfiler:
+    """cProfile around the fetches of the first ``workers`` detail workers.
+
+    There is one Profile for the whole run: Python allows only one active
+    profiler at a time (3.12+ raises "Another profiling tool is already
+    active"), so a sampled fetch runs under it only while no other fetch
+    does, and otherwise runs unprofiled. ``dump`` writes it to ``path`` and
+    prints the top functions by cumulative time.
+    """
+
+    def __init__(self, workers: int, path: str):
+        self.workers = workers
+        self.path = path
+        self.profile = cProfile.Profile()
+        self.claimed = 0
+        self.calls = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._active = threading.Lock()
+
+    def claim(self) -> bool:
+        """Whether the calling worker is one of the sampled ones."""
+        with self._lock:
+            if self.claimed >= self.workers:
+                return False
+            self.claimed += 1
+            return True
+
+    def runcall(self, func, *args):
+        if not self._active.acquire(blocking=False):
+            with self._lock:
+                self.skipped += 1
+            return func(*args)
+        try:
+            self.calls += 1
+            return self.profile.runcall(func, *args)
+        finally:
+            self._active.release()
+
+    def dump(self, top: int = 25):
+        if not self.calls:
+            return
+        self.profile.create_stats()
+        stats = pstats.Stats(self.profile, stream=io.StringIO())
+        stats.dump_stats(self.path)
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats("cumulative").print_stats(top)
+        print(f"[PROFILE] {self.calls} fetches from {self.claimed} workers profiled "
+              f"({self.skipped} ran unprofiled while another was) → {self.path} (open with pstats or snakeviz)")
+        print(out.getvalue().rstrip())
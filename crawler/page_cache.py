@@ -0,0 +1,114 @@
+"""Content-addressed, compressed cache of raw detail-page HTML.
+
+Pages are stored once per distinct content: ``objects/<sha[:2]>/<sha>.html.gz``
+where sha is the SHA-256 of the HTML, with a small SQLite index mapping each
+URL to its current object. When the objects outgrow ``max_bytes`` the least
+recently used ones are deleted (with the URLs pointing at them) until the
+cache is back under 90% of the limit.
+
+With the raw pages on disk, ``--reparse-only`` can rerun extraction after a
+selector or NAME_PAIR change without touching the portal.
+"""
+import gzip, hashlib, os, sqlite3, threading, time
+from typing import Iterator, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    sha TEXT NOT NULL,
+    via TEXT,
+    fetched REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_sha ON pages (sha);
+"""
+
+
+def read_blob(path: str) -> str:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return f.read()
+
+
+class PageCache:
+    def __init__(self, root: str, max_bytes: int = 512 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(root, "index.sqlite3"), check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def blob_path(self, sha: str) -> str:
+        return os.path.join(self.root, "objects", sha[:2], sha + ".html.gz")
+
+    def put(self, url: str, html: str, via: str = "http") -> str:
+        data = html.encode("utf-8")
+        sha = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(sha)
+        now = time.time()
+        with self.lock:
+            row = self.db.execute("SELECT size FROM blobs WHERE sha = ?", (sha,)).fetchone()
+        if row is None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, "wb", compresslevel=6) as f:
+                f.write(data)
+            os.replace(tmp, path)
+            size = os.path.getsize(path)
+        with self.lock, self.db:
+            if row is None and self.db.execute("SELECT 1 FROM blobs WHERE sha = ?", (sha,)).fetchone() is None:
+                self.db.execute("INSERT INTO blobs (sha, size, last_access) VALUES (?, ?, ?)", (sha, size, now))
+                self.total += size
+            else:
+                self.db.execute("UPDATE blobs SET last_access = ? WHERE sha = ?", (now, sha))
+            self.db.execute("INSERT OR REPLACE INTO pages (url, sha, via, fetched) VALUES (?, ?, ?, ?)",
+                            (url, sha, via, now))
+            if self.total > self.max_bytes:
+                self._evict(int(self.max_bytes * 0.9))
+        return sha
+
+    def _evict(self, target: int):
+        # caller holds the lock and the transaction
+        for sha, size in self.db.execute("SELECT sha, size FROM blobs ORDER BY last_access").fetchall():
+            if self.total <= target:
+                break
+            try:
+                os.remove(self.blob_path(sha))
+            except FileNotFoundError:
+                pass
+            self.db.execute("DELETE FROM blobs WHERE sha = ?", (sha,))
+            self.db.execute("DELETE FROM pages WHERE sha = ?", (sha,))
+            self.total -= size
+
+    def get(self, url: str) -> Optional[str]:
+        with self.lock:
+            row = self.db.execute("SELECT sha FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        try:
+            html = read_blob(self.blob_path(row[0]))
+        except FileNotFoundError:
+            return None
+        with self.lock, self.db:
+            self.db.execute("UPDATE blobs SET last_access = ? WHERE sha = ?", (time.time(), row[0]))
+        return html
+
+    def entries(self) -> Iterator[Tuple[str, str]]:
+        """(url, blob path) for every cached page."""
+        with self.lock:
+            rows = self.db.execute("SELECT url, sha FROM pages ORDER BY rowid").fetchall()
+        for url, sha in rows:
+            yield url, self.blob_path(sha)
+
+    def stats(self) -> str:
+        with self.lock:
+            pages, blobs = self.db.execute("SELECT (SELECT COUNT(*) FROM pages), (SELECT COUNT(*) FROM blobs)").fetchone()
+        return f"{pages} pages in {blobs} objects, {self.total / 1e6:.1f} MB (limit {self.max_bytes / 1e6:.0f} MB)"
+
+    def close(self):
+        self.db.close()
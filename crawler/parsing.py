@@ -0,0 +1,96 @@
+"""Driver-independent extraction rules shared by the Selenium and HTTP fetchers.
+
+Selector lists are tried in order; the first that yields a value wins, so
+keep the order identical wherever they are used.
+"""
+import json, re
+from typing import List, Optional, Tuple
+
+# =========================== Selectors ===========================
+PERSON_SELECTORS = [
+    ".relations.persons a[href*='/en/persons/']",
+    "section#persons a[href*='/en/persons/']",
+]
+DATE_SELECTORS = ["span.date", "time[datetime]", "time"]
+ABSTRACT_SELECTORS = [
+    "section#abstract .textblock",
+    "section.abstract .textblock",
+    "div.abstract .textblock",
+    "div#abstract",
+    "section#abstract",
+    "div.textblock",
+]
+META_AUTHORS = ["citation_author", "dc.contributor", "dc.contributor.author"]
+META_DATES = ["citation_publication_date", "dc.date", "article:published_time"]
+MIN_ABSTRACT_CHARS = 15
+
+# =========================== Author parsing ===========================
+FIRST_DIGIT = re.compile(r"\d")
+NAME_PAIR = re.compile(
+    r"[A-Z][A-Za-z'’\-]+,\s*(?:[A-Z](?:\.)?)(?:\s*[A-Z](?:\.)?)*",
+    flags=re.UNICODE
+)
+
+def _uniq(seq: List[str]) -> List[str]:
+    seen, out = set(), []
+    for x in seq:
+        x = x.strip()
+        if x and x not in seen:
+            seen.add(x); out.append(x)
+    return out
+
+def authors_from_subtitle_line(line: str, title_text: str) -> List[str]:
+    """
+    Use the line containing authors + date:
+    remove the title, keep chars until first digit (date starts),
+    then extract 'Surname, Initials' pairs.
+    """
+    if title_text and title_text in line:
+        line = line.replace(title_text, "")
+    line = " ".join(line.split()).strip()
+
+    m = FIRST_DIGIT.search(line)
+    pre_date = line[:m.start()].strip(" -—–·•,;|") if m else line
+    pre_date = pre_date.replace(" & ", ", ").replace(" and ", ", ")
+    pairs = NAME_PAIR.findall(pre_date)
+    return _uniq(pairs)
+
+def authors_from_jsonld(blocks: List[str]) -> List[str]:
+    """Author names from the page's application/ld+json script bodies."""
+    names = []
+    for txt in blocks:
+        txt = (txt or "").strip()
+        if not txt:
+            continue
+        try:
+            data = json.loads(txt)
+        except Exception:
+            continue
+        objs = data if isinstance(data, list) else [data]
+        for obj in objs:
+            if not isinstance(obj, dict):
+                continue
+            auth = obj.get("author")
+            if not auth:
+                continue
+            if isinstance(auth, list):
+                for a in auth:
+                    n = a.get("name") if isinstance(a, dict) else str(a)
+                    if n: names.append(n)
+            elif isinstance(auth, dict):
+                n = auth.get("name")
+                if n: names.append(n)
+            elif isinstance(auth, str):
+                names.append(auth)
+    return _uniq(names)
+
+def first_found(*candidates) -> Tuple[str, List[str]]:
+    """(name, values) of the first ``(name, thunk)`` whose thunk returns something; ("none", [])."""
+    for name, thunk in candidates:
+        values = thunk()
+        if values:
+            return name, values
+    return "none", []
+
+def is_abstract(txt: Optional[str]) -> bool:
+    return bool(txt) and len(txt) > MIN_ABSTRACT_CHARS
@@ -0,0 +1,33 @@
+"""Re-extract records from the raw page cache on every core.
+
+BeautifulSoup parsing is CPU-bound and holds the GIL, so the work goes to a
+process pool; each task gets only a URL, a blob path and a title hint and
+reads the page itself, so no HTML is pickled between processes.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from http_detail import extract_detail_from_html
+from page_cache import read_blob
+
+
+def reparse_one(task: Tuple[str, str, str]) -> Tuple[str, Optional[Dict], Dict[str, str]]:
+    url, path, title = task
+    try:
+        html = read_blob(path)
+    except (FileNotFoundError, OSError, EOFError):
+        return url, None, {}
+    sources: Dict[str, str] = {}
+    rec, _ = extract_detail_from_html(html, url, title, sources)
+    return url, rec, sources
+
+
+def reparse_all(tasks: List[Tuple[str, str, str]], workers: Optional[int] = None,
+                chunksize: int = 16) -> Iterator[Tuple[str, Optional[Dict], Dict[str, str]]]:
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield from map(reparse_one, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        yield from ex.map(reparse_one, tasks, chunksize=chunksize)
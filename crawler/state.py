@@ -0,0 +1,194 @@
+"""Persistent crawl state (SQLite) for incremental re-crawls.
+
+One row per detail URL: validators for conditional GETs (ETag /
+Last-Modified), a hash of the extracted record, the record itself and when it
+was last crawled. Canonical author ids, once assigned, are kept here too (see
+authors.py), as are the pages the browser fallback found no abstract on
+either, so later crawls leave them to plain HTTP while they do not change. Each crawl is a numbered run; rows remember the run that
+last added, changed or removed them, which is how a run's delta is produced;
+a run that never finished hands its changes to the next one.
+"""
+import hashlib, json, sqlite3, threading, time
+from typing import Dict, Iterable, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    finished REAL,
+    full_scan INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,
+    record TEXT,
+    first_seen REAL NOT NULL,
+    last_crawled REAL,
+    seen_run INTEGER,
+    changed_run INTEGER,
+    change TEXT,
+    removed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS author_ids (
+    name TEXT PRIMARY KEY,
+    id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS no_abstract (
+    url TEXT PRIMARY KEY,
+    http_hash TEXT NOT NULL
+);
+"""
+
+
+def record_hash(rec: Dict) -> str:
+    """Hash of the extracted fields; page chrome (tokens, timestamps) never causes a change."""
+    canonical = json.dumps(rec, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CrawlState:
+    def __init__(self, path: str):
+        self.path = path
+        # Shared by the crawl worker threads; every access goes through the lock
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.run_id: Optional[int] = None
+
+    # ------------------------------ runs ------------------------------
+    def begin_run(self, full_scan: bool) -> int:
+        """Start a run. Changes made by earlier runs that never finished (an interrupted
+        crawl, resumed or not) wrote no delta, so they move into this run's."""
+        with self.lock, self.db:
+            cur = self.db.execute("INSERT INTO runs (started, full_scan) VALUES (?, ?)", (time.time(), int(full_scan)))
+            self.run_id = cur.lastrowid
+            self.db.execute(
+                "UPDATE pages SET changed_run = ? WHERE changed_run IN (SELECT id FROM runs WHERE finished IS NULL AND id < ?)",
+                (self.run_id, self.run_id),
+            )
+        return self.run_id
+
+    def finish_run(self):
+        with self.lock, self.db:
+            self.db.execute("UPDATE runs SET finished = ? WHERE id = ?", (time.time(), self.run_id))
+
+    # ------------------------------ pages ------------------------------
+    def get(self, url: str) -> Optional[sqlite3.Row]:
+        with self.lock:
+            return self.db.execute("SELECT * FROM pages WHERE url = ? AND removed = 0", (url,)).fetchone()
+
+    def known_urls(self) -> set:
+        with self.lock:
+            return {r[0] for r in self.db.execute("SELECT url FROM pages WHERE removed = 0")}
+
+    def conditional_headers(self, row: Optional[sqlite3.Row]) -> Dict[str, str]:
+        headers = {}
+        if row is not None and row["record"]:
+            if row["etag"]:
+                headers["If-None-Match"] = row["etag"]
+            if row["last_modified"]:
+                headers["If-Modified-Since"] = row["last_modified"]
+        return headers
+
+    def is_fresh(self, row: Optional[sqlite3.Row], max_age: float) -> bool:
+        return row is not None and bool(row["record"]) and row["last_crawled"] is not None \
+            and time.time() - row["last_crawled"] < max_age
+
+    def mark_seen(self, urls: Iterable[str]):
+        """URLs present in this run's listing (unchanged pages are never re-recorded)."""
+        with self.lock, self.db:
+            self.db.executemany("UPDATE pages SET seen_run = ? WHERE url = ?", [(self.run_id, u) for u in urls])
+
+    def touch(self, url: str):
+        """Conditional GET said 304: only the crawl time moves."""
+        with self.lock, self.db:
+            self.db.execute("UPDATE pages SET last_crawled = ?, seen_run = ? WHERE url = ?",
+                            (time.time(), self.run_id, url))
+
+    def record(self, url: str, rec: Dict, etag: Optional[str] = None, last_modified: Optional[str] = None) -> str:
+        """Store an extracted record; returns "new", "updated" or "unchanged"."""
+        digest = record_hash(rec)
+        now = time.time()
+        with self.lock, self.db:
+            row = self.db.execute("SELECT content_hash, removed FROM pages WHERE url = ?", (url,)).fetchone()
+            if row is None or row["removed"]:
+                change = "new"
+            elif row["content_hash"] == digest:
+                change = "unchanged"
+            else:
+                change = "updated"
+            if row is None:
+                self.db.execute("INSERT INTO pages (url, first_seen) VALUES (?, ?)", (url, now))
+            self.db.execute(
+                "UPDATE pages SET etag = ?, last_modified = ?, content_hash = ?, record = ?, last_crawled = ?, "
+                "seen_run = ?, removed = 0 WHERE url = ?",
+                (etag, last_modified, digest, json.dumps(rec, ensure_ascii=False), now, self.run_id, url),
+            )
+            if change != "unchanged":
+                self.db.execute("UPDATE pages SET changed_run = ?, change = ? WHERE url = ?", (self.run_id, change, url))
+        return change
+
+    def mark_removed_unseen(self) -> List[str]:
+        """After a full listing scan, pages it no longer lists are removed."""
+        with self.lock, self.db:
+            gone = [r[0] for r in self.db.execute(
+                "SELECT url FROM pages WHERE removed = 0 AND (seen_run IS NULL OR seen_run != ?)", (self.run_id,))]
+            self.db.executemany(
+                "UPDATE pages SET removed = 1, changed_run = ?, change = 'removed' WHERE url = ?",
+                [(self.run_id, u) for u in gone],
+            )
+        return gone
+
+    # ------------------------------ browser fallback ------------------------------
+    def rendered_without_abstract(self, url: str, http_rec: Dict) -> bool:
+        """Whether the browser already rendered ``url`` when it extracted over HTTP to
+        ``http_rec``, and found no abstract either (the stored record is its result)."""
+        with self.lock:
+            row = self.db.execute("SELECT http_hash FROM no_abstract WHERE url = ?", (url,)).fetchone()
+        return row is not None and row[0] == record_hash(http_rec)
+
+    def note_rendered(self, url: str, http_rec: Dict, rec: Dict):
+        """After a browser fallback for an incomplete HTTP extraction ``http_rec``."""
+        with self.lock, self.db:
+            if rec.get("abstract"):
+                self.db.execute("DELETE FROM no_abstract WHERE url = ?", (url,))
+            else:
+                self.db.execute("INSERT OR REPLACE INTO no_abstract (url, http_hash) VALUES (?, ?)",
+                                (url, record_hash(http_rec)))
+
+    # ------------------------------ authors ------------------------------
+    def author_ids(self) -> Dict[str, str]:
+        """Profile-less author spelling -> canonical id assigned by an earlier run."""
+        with self.lock:
+            return {r[0]: r[1] for r in self.db.execute("SELECT name, id FROM author_ids")}
+
+    def keep_author_ids(self, ids: Dict[str, str]):
+        """Remember new spellings' ids; a spelling's first id is never replaced."""
+        with self.lock, self.db:
+            self.db.executemany("INSERT OR IGNORE INTO author_ids (name, id) VALUES (?, ?)", ids.items())
+
+    # ------------------------------ output ------------------------------
+    def records(self) -> List[Dict]:
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT record FROM pages WHERE removed = 0 AND record IS NOT NULL ORDER BY first_seen, rowid"
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def delta(self) -> Dict:
+        """What this run added, changed and removed, for applying to the search index."""
+        out = {"run": self.run_id, "added": [], "updated": [], "removed": []}
+        with self.lock:
+            rows = self.db.execute("SELECT url, change, record FROM pages WHERE changed_run = ?", (self.run_id,)).fetchall()
+        for r in rows:
+            if r["change"] == "removed":
+                out["removed"].append(r["url"])
+            elif r["change"] in ("new", "updated"):
+                out["added" if r["change"] == "new" else "updated"].append(json.loads(r["record"]))
+        return out
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,51 @@
+"""In-process stand-in for the portal: a threaded http.server with canned routes."""
+import threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Tuple, Union
+
+# path (with query) -> body, (status, body), or a callable(path) returning either
+Route = Union[str, Tuple[int, str], Callable[[str], Union[str, Tuple[int, str]]]]
+
+
+class FixtureServer:
+    def __init__(self, routes: Dict[str, Route], delay: float = 0.0):
+        self.routes = routes
+        self.delay = delay  # seconds each response takes, like a real round-trip
+        self.requests: List[Tuple[float, str, str]] = []  # (monotonic arrival, path, Host header)
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests.append((time.monotonic(), self.path, self.headers.get("Host", "")))
+                if server.delay:
+                    time.sleep(server.delay)
+                route = server.routes.get(self.path, (404, "not found"))
+                if callable(route):
+                    route = route(self.path)
+                status, body = route if isinstance(route, tuple) else (200, route)
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FixtureServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,66 @@
+import os, tempfile, unittest
+
+from authors import assigned_ids, canonicalize, normalize_name
+from state import CrawlState
+
+
+def pub(i, *names, profile=None):
+    return {"link": f"https://portal.test/pub/{i}", "title": f"Paper {i}",
+            "authors": [{"name": n, "profile": profile if n == names[0] and profile else ""} for n in names]}
+
+
+def ids(records):
+    return {a["name"]: a["id"] for rec in records for a in rec["authors"]}
+
+
+class CanonicalizeTests(unittest.TestCase):
+    def test_names_resolve_by_first_initial_and_surname(self):
+        records = [pub(1, "M. Kabir Hassan", "Andrikopoulos, P."),
+                   pub(2, "Mohammad Hassan", "Panagiotis Andrikopoulos",
+                       profile="https://portal.test/en/persons/mohammad-hassan")]
+        index = canonicalize(records, workers=1)
+        self.assertEqual(ids(records), {
+            "M. Kabir Hassan": "mohammad-hassan",
+            "Mohammad Hassan": "mohammad-hassan",
+            "Andrikopoulos, P.": "n-panagiotis-andrikopoulos",
+            "Panagiotis Andrikopoulos": "n-panagiotis-andrikopoulos",
+        })
+        self.assertEqual(index["mohammad-hassan"]["publications"], [records[0]["link"], records[1]["link"]])
+
+    def test_hyphenated_surnames_stay_whole(self):
+        self.assertEqual(normalize_name("José María García-López").surname, "garcia-lopez")
+        self.assertEqual(normalize_name("García-López, J. M.").key, "j garcia-lopez")
+        records = [pub(1, "José María García-López"), pub(2, "J. García-López"), pub(3, "Ana López")]
+        canonicalize(records, workers=1)
+        self.assertEqual(ids(records), {"José María García-López": "n-jose-garcia-lopez",
+                                        "J. García-López": "n-jose-garcia-lopez", "Ana López": "n-ana-lopez"})
+
+    def test_ids_stay_put_across_crawls(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "crawl_state.sqlite3")
+
+        first = [pub(1, "M. Hassan"), pub(2, "M. Hassan", "Jane Smith")]
+        state = CrawlState(path)
+        canonicalize(first, workers=1, known=state.author_ids())
+        state.keep_author_ids(assigned_ids(first))
+        state.close()
+        self.assertEqual(ids(first), {"M. Hassan": "n-m-hassan", "Jane Smith": "n-jane-smith"})
+
+        # A full first name under the same key would now pull "M. Hassan" over
+        second = first + [pub(3, "Mohammad Hassan", "J. Smith")]
+        fresh = canonicalize([dict(r, authors=[dict(a) for a in r["authors"]]) for r in second], workers=1)
+        self.assertIn("n-mohammad-hassan", fresh)
+        self.assertNotIn("n-m-hassan", fresh)
+
+        state = CrawlState(path)
+        canonicalize(second, workers=1, known=state.author_ids())
+        state.keep_author_ids(assigned_ids(second))
+        self.assertEqual(ids(second), {"M. Hassan": "n-m-hassan", "Jane Smith": "n-jane-smith",
+                                       "Mohammad Hassan": "n-mohammad-hassan", "J. Smith": "n-jane-smith"})
+        self.assertEqual(state.author_ids()["Mohammad Hassan"], "n-mohammad-hassan")
+        state.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
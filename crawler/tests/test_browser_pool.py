@@ -0,0 +1,53 @@
+import unittest
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from browser_pool import DriverPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.quit_called = False
+
+    def execute_script(self, script):
+        return 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+class DriverPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.started = []
+        self.pool = DriverPool(lambda: self.started.append(FakeDriver()) or self.started[-1], size=1, max_pages=0)
+        self.addCleanup(self.pool.close)
+
+    def use(self, error=None):
+        with self.pool.driver() as driver:
+            if error is not None:
+                raise error
+            return driver
+
+    def test_driver_is_reused(self):
+        self.assertIs(self.use(), self.use())
+        self.assertEqual(len(self.started), 1)
+
+    def test_page_load_timeout_keeps_the_browser(self):
+        first = self.use()
+        with self.assertRaises(TimeoutException):
+            self.use(TimeoutException("page load timed out after 45 s"))
+        self.assertIs(self.use(), first)
+        self.assertFalse(first.quit_called)
+        self.assertEqual(self.pool.crashes, 0)
+
+    def test_lost_session_recycles_the_browser(self):
+        first = self.use()
+        with self.assertRaises(WebDriverException):
+            self.use(WebDriverException("Failed to decode response from marionette"))
+        self.assertTrue(first.quit_called)
+        self.assertIsNot(self.use(), first)
+        self.assertEqual(self.pool.crashes, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
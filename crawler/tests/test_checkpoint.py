@@ -0,0 +1,73 @@
+import json, os, tempfile, unittest
+from unittest import mock
+
+from checkpoint import JsonlWriter, compact, done_links, read_jsonl
+
+
+def rec(i, **fields):
+    return {"title": f"Paper {i}", "link": f"https://portal.test/pub/{i}", "abstract": f"Abstract {i}", **fields}
+
+
+class CheckpointTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "publications.jsonl")
+
+    def write(self, records, append=True, **options):
+        writer = JsonlWriter(self.path, append=append, **options)
+        for r in records:
+            writer.write(r)
+        writer.close()
+        return writer
+
+    def test_records_are_on_disk_as_soon_as_written(self):
+        writer = JsonlWriter(self.path, append=False)
+        writer.write(rec(1))
+        # Not closed: an interrupted crawl keeps what it wrote
+        self.assertEqual(list(read_jsonl(self.path)), [rec(1)])
+        writer.close()
+
+    def test_fsync_every_n_records(self):
+        with mock.patch("checkpoint.os.fsync") as fsync:
+            self.write([rec(i) for i in range(10)], append=False, fsync_every=4, fsync_seconds=3600)
+        self.assertEqual(fsync.call_count, 3)  # after 4 and 8 records, and on close
+
+    def test_resume_after_a_torn_line(self):
+        self.write([rec(1), rec(2)], append=False)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec(3))[:20])  # killed mid-write
+        self.assertEqual(done_links(self.path), {rec(1)["link"], rec(2)["link"]})
+
+        self.write([rec(3)])  # --resume appends
+        self.assertEqual([r["link"] for r in read_jsonl(self.path)], [rec(i)["link"] for i in (1, 2, 3)])
+
+    def test_compact_keeps_listing_order_and_the_latest_record(self):
+        listing = [{"title": f"Paper {i}", "link": rec(i)["link"]} for i in (3, 1, 2, 4)]
+        self.write([rec(1), rec(2), rec(1, abstract="Revised")], append=False)
+        by_link = compact(self.path, listing)
+        self.assertEqual(list(by_link), [rec(i)["link"] for i in (3, 1, 2, 4)])
+        self.assertEqual(by_link[rec(1)["link"]]["abstract"], "Revised")
+        self.assertEqual(by_link[rec(2)["link"]], rec(2))
+        # Listed but never fetched: title and link only
+        self.assertEqual(by_link[rec(4)["link"]], {"title": "Paper 4", "link": rec(4)["link"]})
+
+    def test_compact_prefers_a_known_record_to_a_listing_stub(self):
+        listing = [{"title": f"Paper {i}", "link": rec(i)["link"]} for i in (1, 2, 3)]
+        self.write([rec(1, abstract="This run")], append=False)
+        # Crawled earlier: 1 again, 2 (failed this run) and 5 (not listed this run)
+        known = [rec(1, abstract="Last run"), rec(2), rec(5)]
+        by_link = compact(self.path, listing, known)
+        self.assertEqual(list(by_link), [rec(i)["link"] for i in (1, 2, 3, 5)])
+        self.assertEqual(by_link[rec(1)["link"]]["abstract"], "This run")
+        self.assertEqual(by_link[rec(2)["link"]], rec(2))
+        self.assertEqual(by_link[rec(3)["link"]], {"title": "Paper 3", "link": rec(3)["link"]})
+        self.assertEqual(by_link[rec(5)["link"]], rec(5))
+
+    def test_missing_log(self):
+        self.assertEqual(done_links(self.path), set())
+        self.assertEqual(compact(self.path, []), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""Browser fallback of the http fetch mode for pages with no abstract."""
+import copy, json, os, tempfile, unittest
+from pathlib import Path
+
+from browser_pool import DriverPool
+from crawler import DetailWorker
+from state import CrawlState
+from tests.server import FixtureServer
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+class PayloadDriver:
+    """Stands in for Firefox: every page renders to the saved EXTRACT_JS payload."""
+
+    def __init__(self, payload, html):
+        self.payload = payload
+        self.page_source = html
+        self.visits = []
+
+    def get(self, url):
+        self.visits.append(url)
+
+    def find_element(self, by, value):
+        return self  # the cookie banner and the <h1> are "there" at once
+
+    def execute_script(self, script, *args):
+        return 1
+
+    def execute_async_script(self, script, *args):
+        return copy.deepcopy(self.payload)
+
+    def quit(self):
+        pass
+
+
+class NoAbstractFallbackTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.state_path = os.path.join(tmp.name, "crawl_state.sqlite3")
+        page = FIXTURES / "jsonld_incomplete.html"
+        self.html = page.read_text(encoding="utf-8")
+        self.case = json.loads(page.with_suffix(".json").read_text(encoding="utf-8"))
+        payload = json.loads(page.with_suffix(".payload.json").read_text(encoding="utf-8"))
+        self.driver = PayloadDriver(payload, self.html)
+        self.pool = DriverPool(lambda: self.driver, size=1, max_pages=0)
+        self.addCleanup(self.pool.close)
+        self.routes = {"/pub/1": self.html}
+        server = FixtureServer(self.routes).__enter__()
+        self.addCleanup(server.__exit__)
+        self.link = server.url + "/pub/1"
+
+    def crawl(self):
+        """One run fetching the page; returns its record."""
+        state = CrawlState(self.state_path)
+        worker = DetailWorker(self.pool, "http", state)
+        try:
+            state.begin_run(full_scan=True)
+            rec = worker.fetch({"link": self.link, "title": self.case["title_hint"]})
+            state.finish_run()
+            return rec
+        finally:
+            worker.close()
+            state.close()
+
+    def test_page_the_browser_found_no_abstract_on_is_rendered_once(self):
+        first = self.crawl()
+        self.assertEqual(self.driver.visits, [self.link])
+        self.assertEqual(first["abstract"], "")
+        self.assertEqual(first["authors"], self.case["record"]["authors"])
+        self.assertEqual(self.crawl(), first)
+        self.assertEqual(len(self.driver.visits), 1)
+
+        # A change the HTTP extraction sees renders again
+        self.routes["/pub/1"] = self.html.replace("2021-06-01", "2021-06-02")
+        self.driver.payload["dates"] = [d and d.replace("2021-06-01", "2021-06-02") for d in self.driver.payload["dates"]]
+        self.assertEqual(self.crawl()["published_date"], "2021-06-02")
+        self.assertEqual(len(self.driver.visits), 2)
+        self.crawl()
+        self.assertEqual(len(self.driver.visits), 2)
+
+    def test_page_the_browser_found_an_abstract_on_is_rendered_every_time(self):
+        abstract = "An abstract that only the rendered page shows, long enough to count as one."
+        self.driver.payload["abstracts"] = [abstract] * len(self.driver.payload["abstracts"])
+        for visits in (1, 2):
+            self.assertEqual(self.crawl()["abstract"], abstract)
+            self.assertEqual(len(self.driver.visits), visits)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+"""Acceptance test for the crawl engine against a local stand-in for the portal.
+
+Listing and detail pages are served by an in-process http.server that takes
+DELAY seconds per response, so one worker alone could fetch at most 1 / DELAY
+pages a second. The crawl must approach the per-host rate limit (throughput)
+without ever exceeding it (politeness), per host.
+
+Politeness is checked on the rate limiter's grants, one per request, which no
+two may share a 1 / RATE interval; when requests reach the server also depends
+on thread scheduling, so there only the average rate is checked.
+"""
+import asyncio, unittest
+from urllib.parse import urlsplit
+
+import requests
+
+from engine import CrawlEngine, HostRateLimiter
+from http_detail import extract_detail_from_html, fetch_page
+from listing import ListingCrawler
+from tests.server import FixtureServer
+from tests.test_listing import PER_PAGE, flaky, listing_html
+
+RATE = 20.0   # requests per second per host
+DELAY = 0.1   # seconds the server takes per response
+
+
+def detail_html(path: str) -> str:
+    slug = path.rsplit("/", 1)[-1]
+    return (f"<html><body><h1>Paper {slug}</h1>"
+            f'<p class="relations persons"><a href="/en/persons/author-{slug}">Author {slug}</a></p>'
+            f'<span class="date">1 Jan 2024</span>'
+            f'<section id="abstract"><div class="textblock">Findings of paper {slug}, in some detail.</div></section>'
+            f"</body></html>")
+
+
+def routes(pages: int):
+    out = {f"/list/?page={p}": listing_html(p, pages) for p in range(2 * pages + 2)}
+    out.update({f"/pub/{p}-{i}": detail_html(f"/pub/{p}-{i}") for p in range(pages) for i in range(PER_PAGE)})
+    return out
+
+
+def fetch_detail(session: requests.Session, it):
+    rec, complete = extract_detail_from_html(fetch_page(session, it["link"]).html, it["link"], it.get("title", ""))
+    if not complete:
+        raise ValueError("incomplete page")
+    return rec
+
+
+class RecordingLimiter(HostRateLimiter):
+    """Notes when each request was let through, per host."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        super().__init__(rate, burst)
+        self.grants = {}
+
+    async def acquire(self, url: str):
+        await super().acquire(url)
+        # The bucket's own clock reading when it gave out this token
+        self.grants.setdefault(urlsplit(url).hostname, []).append(self._buckets[urlsplit(url).netloc].updated)
+
+
+def make_engine(**options) -> CrawlEngine:
+    engine = CrawlEngine(fetch=fetch_detail, make_state=requests.Session, close_state=lambda s: s.close(),
+                         backoff_base=0.01, **{"concurrency": 8, "rate_per_host": RATE, **options})
+    engine.limiter = RecordingLimiter(engine.limiter.rate, engine.limiter.burst)
+    return engine
+
+
+class CrawlEngineTests(unittest.TestCase):
+    def assertPolite(self, grants, arrivals, rate, burst=1):
+        """No two grants closer than 1 / rate (beyond the burst); requests reach the server
+        no faster than rate allows on average, and none without a grant."""
+        gaps = [b - a for a, b in zip(grants, grants[1:])]
+        self.assertGreaterEqual(sorted(gaps)[burst - 1], 0.999 / rate)
+        self.assertEqual(len(arrivals), len(grants))
+        arrivals = sorted(arrivals)
+        self.assertGreaterEqual(arrivals[-1] - arrivals[0], (len(arrivals) - burst) / rate * 0.95)
+
+    def test_listing_streams_into_workers_at_the_host_rate(self):
+        pages = 10
+        with FixtureServer(routes(pages), delay=DELAY) as server:
+            engine = make_engine()
+            session = requests.Session()
+
+            async def crawl():
+                engine.start()
+                listing = ListingCrawler(session, server.url + "/list/", 50,
+                                         lambda idx, rows: [engine.submit(r) for r in rows],
+                                         concurrency=4, limiter=engine.limiter)
+                rows = await listing.run()
+                await engine.join()
+                return listing, rows
+
+            listing, rows = asyncio.run(crawl())
+            session.close()
+            arrivals = [t for t, _, _ in server.requests]
+
+        self.assertTrue(listing.complete)
+        self.assertEqual(len(rows), pages * PER_PAGE)
+        self.assertEqual(engine.stats.ok, pages * PER_PAGE)
+        self.assertEqual(sorted(r["title"] for r in engine.results), sorted(f"Paper {p}-{i}" for p in range(pages)
+                                                                             for i in range(PER_PAGE)))
+        # Listing and detail requests share the host's bucket
+        self.assertPolite(engine.limiter.grants["127.0.0.1"], arrivals, RATE)
+        throughput = len(arrivals) / (max(arrivals) - min(arrivals))
+        self.assertGreater(throughput, 0.75 * RATE)
+        self.assertGreater(throughput, 1.5 / DELAY)  # more than one worker could manage
+
+    def test_rate_limit_is_per_host(self):
+        with FixtureServer(routes(4), delay=DELAY) as server:
+            port = urlsplit(server.url).port
+            items = [{"link": f"http://{host}:{port}/pub/{p}-{i}"}
+                     for host in ("127.0.0.1", "localhost") for p in range(4) for i in range(PER_PAGE)]
+            engine = make_engine(rate_per_host=RATE / 2, concurrency=8)
+            asyncio.run(engine.run(items))
+            by_host = {}
+            for t, _, host in server.requests:
+                by_host.setdefault(host.split(":")[0], []).append(t)
+
+        self.assertEqual(engine.stats.ok, len(items))
+        self.assertEqual(set(by_host), {"127.0.0.1", "localhost"})
+        for host, arrivals in by_host.items():
+            self.assertPolite(engine.limiter.grants[host], arrivals, RATE / 2)
+        # Both hosts were crawled side by side, not one after the other
+        self.assertLess(engine.stats.elapsed, 0.75 * len(items) / (RATE / 2))
+
+    def test_failed_pages_are_retried_and_do_not_stall_the_rest(self):
+        pages = 4
+        table = routes(pages)
+        table["/pub/1-1"] = flaky(table["/pub/1-1"], 2)
+        table["/pub/2-2"] = (503, "gone")
+        with FixtureServer(table, delay=DELAY) as server:
+            items = [{"link": f"{server.url}/pub/{p}-{i}"} for p in range(pages) for i in range(PER_PAGE)]
+            engine = make_engine(max_retries=2)
+            asyncio.run(engine.run(items))
+            attempts = {path: sum(p == path for _, p, _ in server.requests) for path in ("/pub/1-1", "/pub/2-2")}
+            arrivals = [t for t, _, _ in server.requests]
+
+        self.assertEqual(engine.stats.ok, len(items) - 1)
+        self.assertEqual(engine.stats.failed, 1)
+        self.assertEqual([f["link"] for f in engine.failures], [f"{server.url}/pub/2-2"])
+        self.assertEqual(attempts, {"/pub/1-1": 3, "/pub/2-2": 3})
+        self.assertEqual(engine.stats.retries, 4)
+        self.assertPolite(engine.limiter.grants["127.0.0.1"], arrivals, RATE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""Detail extraction against saved portal pages.
+
+Each fixture is a detail page (``<name>.html``), what EXTRACT_JS returns for
+it in Firefox (``<name>.payload.json``) and the expected record
+(``<name>.json``). The HTTP extractor and the Selenium payload path must both
+produce that record, field by field, through the same fallbacks; with Firefox
+and geckodriver on PATH, EXTRACT_JS itself is run on the pages and must
+return the saved payloads.
+"""
+import json, re, shutil, tempfile, unittest
+from pathlib import Path
+
+from dom_extract import EXTRACT_JS, SELECTOR_ARGS, record_from_payload
+from http_detail import extract_detail_from_html
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+FIELDS = ("title", "link", "authors", "published_date", "abstract")
+
+
+def load_cases():
+    cases = []
+    for html in sorted(FIXTURES.glob("*.html")):
+        expected = json.loads(html.with_suffix(".json").read_text(encoding="utf-8"))
+        payload = json.loads(html.with_suffix(".payload.json").read_text(encoding="utf-8"))
+        cases.append((html.stem, html.read_text(encoding="utf-8"), payload, expected))
+    return cases
+
+
+class DetailExtractionTests(unittest.TestCase):
+    cases = load_cases()
+
+    def assertRecord(self, name, rec, expected):
+        self.assertEqual(set(rec), set(FIELDS), name)
+        for field in FIELDS:
+            with self.subTest(page=name, field=field):
+                self.assertEqual(rec[field], expected["record"][field])
+
+    def test_fixtures_cover_every_fallback(self):
+        used = {(field, case[3]["sources"][field]) for case in self.cases for field in ("authors", "date", "abstract")}
+        for source in ("subtitle", "meta", "jsonld"):
+            self.assertIn(("authors", source), used)
+        self.assertIn(("abstract", "heading"), used)
+        self.assertIn(("abstract", "none"), used)
+
+    def test_http_extractor(self):
+        for name, html, _, expected in self.cases:
+            sources = {}
+            rec, complete = extract_detail_from_html(html, expected["link"], expected["title_hint"], sources)
+            self.assertRecord(name, rec, expected)
+            self.assertEqual(complete, expected["complete"], name)
+            self.assertEqual(sources, expected["sources"], name)
+
+    def test_browser_payload(self):
+        for name, _, payload, expected in self.cases:
+            sources = {}
+            rec = record_from_payload(payload, expected["link"], expected["title_hint"], sources)
+            self.assertRecord(name, rec, expected)
+            self.assertEqual(sources, expected["sources"], name)
+
+
+@unittest.skipUnless(shutil.which("firefox") and shutil.which("geckodriver"), "needs Firefox and geckodriver on PATH")
+class ExtractScriptTests(unittest.TestCase):
+    cases = load_cases()
+
+    @classmethod
+    def setUpClass(cls):
+        from selenium import webdriver
+        from selenium.webdriver.firefox.service import Service as FirefoxService
+        from crawler import build_firefox_options
+
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.driver = webdriver.Firefox(service=FirefoxService(shutil.which("geckodriver")),
+                                       options=build_firefox_options(headless=True))
+        cls.driver.set_script_timeout(10)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.driver.quit()
+        cls.tmp.cleanup()
+
+    def run_script(self, name, html, link):
+        # Served from disk, but with relative links resolving against the portal like the live page
+        page = Path(self.tmp.name) / f"{name}.html"
+        page.write_text(re.sub(r"<head(\s[^>]*)?>", lambda m: f'{m.group(0)}<base href="{link}">', html, count=1),
+                        encoding="utf-8")
+        self.driver.get(page.as_uri())
+        return self.driver.execute_async_script(EXTRACT_JS, SELECTOR_ARGS)
+
+    def test_script_returns_the_saved_payloads(self):
+        for name, html, saved, expected in self.cases:
+            payload = self.run_script(name, html, expected["link"])
+            self.assertEqual(set(payload["timings_ms"]), set(saved["timings_ms"]), name)
+            for key in saved:
+                if key != "timings_ms":
+                    with self.subTest(page=name, key=key):
+                        self.assertEqual(payload[key], saved[key])
+            sources = {}
+            rec = record_from_payload(payload, expected["link"], expected["title_hint"], sources)
+            self.assertEqual(rec, expected["record"], name)
+            self.assertEqual(sources, expected["sources"], name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import asyncio, unittest
+
+import requests
+
+from listing import ListingCrawler
+from tests.server import FixtureServer
+
+PER_PAGE = 3
+
+
+def listing_html(page: int, pages: int) -> str:
+    if page >= pages:
+        return "<html><body><p>No results</p></body></html>"
+    cards = "".join(
+        f'<div class="result-container"><h3 class="title"><a href="/pub/{page}-{i}">Paper {page}-{i}</a></h3></div>'
+        for i in range(PER_PAGE)
+    )
+    nav = "".join(f'<a href="/list/?page={p}">{p + 1}</a>' for p in range(min(pages, 2)))
+    return f"<html><body>{cards}<nav>{nav}</nav></body></html>"
+
+
+def flaky(body: str, failures: int):
+    """Route that answers 503 ``failures`` times before serving ``body``."""
+    left = [failures]
+
+    def route(path):
+        if left[0]:
+            left[0] -= 1
+            return 503, "busy"
+        return body
+    return route
+
+
+class ListingCrawlerTests(unittest.TestCase):
+    pages = 6
+
+    def routes(self, **overrides):
+        routes = {f"/list/?page={p}": listing_html(p, self.pages) for p in range(16)}
+        routes.update({f"/list/?page={p}": route for p, route in overrides.items()})
+        return routes
+
+    def scan(self, server, max_pages=50, max_retries=2):
+        session = requests.Session()  # no urllib3 retries: the crawler's own retry is under test
+        try:
+            crawler = ListingCrawler(session, server.url + "/list/", max_pages, lambda idx, rows: None,
+                                     concurrency=3, max_retries=max_retries, backoff_base=0.01)
+            rows = asyncio.run(crawler.run())
+        finally:
+            session.close()
+        return crawler, rows
+
+    def test_full_scan_reaches_the_end(self):
+        with FixtureServer(self.routes()) as server:
+            crawler, rows = self.scan(server)
+        self.assertEqual(len(rows), self.pages * PER_PAGE)
+        self.assertTrue(crawler.complete)
+        self.assertEqual(crawler.failed, set())
+
+    def test_transient_error_is_retried(self):
+        with FixtureServer(self.routes(**{"3": flaky(listing_html(3, self.pages), 2)})) as server:
+            crawler, rows = self.scan(server)
+            attempts = sum(path == "/list/?page=3" for _, path, _ in server.requests)
+        self.assertEqual(attempts, 3)
+        self.assertEqual(len(rows), self.pages * PER_PAGE)
+        self.assertTrue(crawler.complete)
+
+    def test_failed_page_is_not_an_empty_page(self):
+        # Page 1 is the last page the pagination advertises; if its failure read
+        # as "empty", the scan would end there and call itself complete
+        with FixtureServer(self.routes(**{"1": (503, "down")})) as server:
+            crawler, rows = self.scan(server)
+        self.assertEqual(crawler.failed, {1})
+        self.assertFalse(crawler.complete)
+        self.assertNotIn("/pub/1-0", {r["link"].removeprefix(server.url) for r in rows})
+
+    def test_page_cap_is_incomplete(self):
+        with FixtureServer(self.routes()) as server:
+            crawler, rows = self.scan(server, max_pages=4)
+        self.assertEqual(len(rows), 4 * PER_PAGE)
+        self.assertFalse(crawler.complete)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""Metrics and the worker profiler over one small crawl against the local fixture server."""
+import asyncio, contextlib, io, os, pstats, tempfile, unittest
+from collections import Counter
+
+import requests
+
+from checkpoint import read_jsonl
+from crawler import DetailWorker
+from engine import CrawlEngine
+from listing import ListingCrawler
+from metrics import CrawlMetrics, WorkerProfiler
+from tests.server import FixtureServer
+from tests.test_engine import detail_html, routes
+from tests.test_listing import PER_PAGE, flaky, listing_html
+
+PAGES = 3
+
+
+class CrawlMetricsTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.events_path = os.path.join(tmp.name, "crawl_metrics.jsonl")
+        self.profile_path = os.path.join(tmp.name, "crawl_profile.prof")
+
+    def crawl(self, metrics, profiler):
+        table = routes(PAGES)
+        table["/list/?page=1"] = flaky(table["/list/?page=1"], 1)
+        with FixtureServer(table, delay=0.01) as server:
+            engine = CrawlEngine(
+                fetch=lambda worker, it: worker.fetch(it),
+                # http mode with complete pages never asks for a browser
+                make_state=lambda: DetailWorker(None, "http", metrics=metrics, profiler=profiler),
+                close_state=lambda worker: worker.close(),
+                concurrency=4, rate_per_host=0, backoff_base=0.01,
+                on_error=lambda it, attempt, e, will_retry: metrics.retry(it["link"], attempt, str(e), will_retry),
+            )
+            session = requests.Session()
+
+            async def run():
+                with metrics.stage("listing+details"):
+                    engine.start()
+                    listing = ListingCrawler(session, server.url + "/list/", 10,
+                                             lambda idx, rows: [engine.submit(r) for r in rows],
+                                             metrics=metrics, backoff_base=0.01)
+                    await listing.run()
+                    await engine.join()
+                return listing
+
+            listing = asyncio.run(run())
+            session.close()
+        return engine, listing
+
+    def test_one_crawl_records_counters_and_timings(self):
+        metrics = CrawlMetrics(self.events_path)
+        profiler = WorkerProfiler(2, self.profile_path)
+        engine, listing = self.crawl(metrics, profiler)
+        metrics.close()
+        details = PAGES * PER_PAGE
+        self.assertEqual(engine.stats.ok, details)
+
+        self.assertEqual(metrics.listing_pages, len(listing.pages))
+        self.assertEqual(metrics.listing_bytes, sum(len(listing_html(p, PAGES).encode()) for p in listing.pages))
+        self.assertEqual(list(metrics.page_ms), ["http"])
+        self.assertEqual(len(metrics.page_ms["http"]), details)
+        self.assertTrue(all(ms > 0 for ms in metrics.page_ms["http"]))
+        self.assertEqual(metrics.page_bytes, sum(len(detail_html(f"/pub/{p}-{i}").encode())
+                                                 for p in range(PAGES) for i in range(PER_PAGE)))
+        for field in ("authors", "date", "abstract"):
+            self.assertEqual(sum(metrics.sources[field].values()), details, field)
+        self.assertEqual((metrics.retries, metrics.failures), (1, 0))  # the flaky listing page
+        self.assertGreater(metrics.stages["listing+details"], max(metrics.page_ms["http"]) / 1000)
+
+        events = list(read_jsonl(self.events_path))
+        self.assertEqual(Counter(e["event"] for e in events),
+                         {"page": details, "listing_page": metrics.listing_pages, "retry": 1, "stage": 1})
+        self.assertEqual(sorted(e["url"] for e in events if e["event"] == "page"),
+                         sorted(r["link"] for rows in listing.pages.values() for r in rows))
+
+        # Two of the four workers are sampled; fetches overlapping a profiled one run unprofiled
+        self.assertEqual(profiler.claimed, 2)
+        self.assertGreater(profiler.calls, 0)
+        self.assertLessEqual(profiler.calls + profiler.skipped, details)
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            profiler.dump()
+        self.assertIn(f"{profiler.calls} fetches from 2 workers profiled", out.getvalue())
+        functions = {name for _, _, name in pstats.Stats(self.profile_path).stats}
+        self.assertIn("_fetch", functions)
+        self.assertIn("extract_detail_from_html", functions)
+
+    def test_summary(self):
+        metrics = CrawlMetrics()
+        self.crawl(metrics, None)
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            metrics.print_summary()
+        report = out.getvalue()
+        self.assertIn(f"listing pages: {metrics.listing_pages}", report)
+        self.assertRegex(report, rf"\[METRICS\] http\s+{PAGES * PER_PAGE}\s")
+        self.assertIn("retries: 1; gave up: 0", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
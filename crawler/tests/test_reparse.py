@@ -0,0 +1,55 @@
+"""--reparse-only: records re-extracted from the page cache match a live parse of the same HTML."""
+import json, os, tempfile, unittest
+from pathlib import Path
+
+from http_detail import extract_detail_from_html
+from page_cache import PageCache
+from reparse import reparse_all
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+class ReparseTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache = PageCache(os.path.join(tmp.name, "page_cache"))
+        self.addCleanup(self.cache.close)
+        self.live = {}
+        self.titles = {}
+        for page in sorted(FIXTURES.glob("*.html")):
+            case = json.loads(page.with_suffix(".json").read_text(encoding="utf-8"))
+            html = page.read_text(encoding="utf-8")
+            sources = {}
+            rec, _ = extract_detail_from_html(html, case["link"], case["title_hint"], sources)
+            self.live[case["link"]] = (rec, sources)
+            self.titles[case["link"]] = case["title_hint"]
+            self.cache.put(case["link"], html)
+
+    def tasks(self):
+        return [(url, path, self.titles.get(url, "")) for url, path in self.cache.entries()]
+
+    def test_reparse_matches_the_live_parse(self):
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                reparsed = {url: (rec, sources) for url, rec, sources in reparse_all(self.tasks(), workers)}
+                self.assertEqual(reparsed, self.live)
+
+    def test_pages_sharing_content_reparse_alike(self):
+        link, (rec, sources) = next(iter(self.live.items()))
+        copy = link + "?copy"
+        self.cache.put(copy, self.cache.get(link))
+        self.titles[copy] = self.titles[link]
+        reparsed = {url: (rec, sources) for url, rec, sources in reparse_all(self.tasks(), 1)}
+        self.assertEqual(reparsed[copy], (dict(rec, link=copy), sources))
+
+    def test_evicted_page_is_missing(self):
+        url, path = next(self.cache.entries())
+        os.remove(path)
+        reparsed = {u: rec for u, rec, _ in reparse_all(self.tasks(), 1)}
+        self.assertIsNone(reparsed[url])
+        self.assertEqual(len(reparsed), len(self.live))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import os, tempfile, unittest
+
+from state import CrawlState
+
+
+def rec(i, **fields):
+    return {"title": f"Paper {i}", "link": url(i), "abstract": f"Abstract {i}", **fields}
+
+
+def url(i):
+    return f"https://portal.test/pub/{i}"
+
+
+class CrawlStateTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "crawl_state.sqlite3")
+        self.state = None
+
+    def run_crawl(self, records, finish=True, full_scan=True):
+        """One run over ``records``; returns its delta and the change reported per link."""
+        if self.state is not None:
+            self.state.close()
+        self.state = CrawlState(self.path)
+        self.addCleanup(self.state.close)
+        self.state.begin_run(full_scan)
+        changes = {r["link"]: self.state.record(r["link"], r) for r in records}
+        if not finish:
+            return None, changes
+        self.state.mark_seen(r["link"] for r in records)
+        delta = self.state.delta()
+        self.state.finish_run()
+        return delta, changes
+
+    def test_delta_holds_only_what_the_run_changed(self):
+        delta, changes = self.run_crawl([rec(1), rec(2), rec(3)])
+        self.assertEqual(set(changes.values()), {"new"})
+        self.assertEqual([r["link"] for r in delta["added"]], [url(1), url(2), url(3)])
+
+        delta, changes = self.run_crawl([rec(1), rec(2, abstract="Revised"), rec(3), rec(4)])
+        self.assertEqual(changes, {url(1): "unchanged", url(2): "updated", url(3): "unchanged", url(4): "new"})
+        self.assertEqual(delta["run"], 2)
+        self.assertEqual([r["link"] for r in delta["added"]], [url(4)])
+        self.assertEqual(delta["updated"], [rec(2, abstract="Revised")])
+        self.assertEqual(delta["removed"], [])
+
+    def test_not_modified_and_unchanged_pages_stay_out_of_the_delta(self):
+        self.run_crawl([rec(1), rec(2)])
+        self.state = CrawlState(self.path)
+        self.addCleanup(self.state.close)
+        self.state.begin_run(full_scan=True)
+        row = self.state.get(url(1))
+        self.assertEqual(self.state.conditional_headers(row), {})
+        # Same extracted fields: stored with its validators, but not a change
+        self.assertEqual(self.state.record(url(1), rec(1), etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT"),
+                         "unchanged")
+        self.assertEqual(self.state.conditional_headers(self.state.get(url(1))),
+                         {"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"})
+        before = self.state.get(url(2))["last_crawled"]
+        self.state.touch(url(2))  # 304
+        self.assertGreaterEqual(self.state.get(url(2))["last_crawled"], before)
+        self.assertTrue(self.state.is_fresh(self.state.get(url(2)), max_age=60))
+
+        delta = self.state.delta()
+        self.assertEqual((delta["added"], delta["updated"], delta["removed"]), ([], [], []))
+        # Both count as seen, so a full scan keeps them
+        self.assertEqual(self.state.mark_removed_unseen(), [])
+
+    def test_unlisted_pages_are_tombstoned_and_can_return(self):
+        self.run_crawl([rec(1), rec(2), rec(3)])
+        self.state = CrawlState(self.path)
+        self.addCleanup(self.state.close)
+        self.state.begin_run(full_scan=True)
+        self.state.mark_seen([url(1), url(3)])
+        self.assertEqual(self.state.mark_removed_unseen(), [url(2)])
+        self.assertEqual(self.state.delta()["removed"], [url(2)])
+        self.assertIsNone(self.state.get(url(2)))
+        self.assertEqual(self.state.known_urls(), {url(1), url(3)})
+        self.assertEqual([r["link"] for r in self.state.records()], [url(1), url(3)])
+        self.state.finish_run()
+
+        delta, changes = self.run_crawl([rec(1), rec(2), rec(3)])
+        self.assertEqual(changes[url(2)], "new")
+        self.assertEqual([r["link"] for r in delta["added"]], [url(2)])
+        self.assertEqual([r["link"] for r in self.state.records()], [url(1), url(2), url(3)])
+
+    def test_an_interrupted_run_hands_its_changes_to_the_next(self):
+        self.run_crawl([rec(1), rec(2)])
+        # Killed after recording 3 and a new abstract for 1; no delta was written
+        _, changes = self.run_crawl([rec(3), rec(1, abstract="Revised")], finish=False)
+        self.assertEqual(changes, {url(3): "new", url(1): "updated"})
+
+        # The resumed run only re-fetches 4; 3 and 1 must still reach a delta
+        delta, _ = self.run_crawl([rec(4)])
+        self.assertEqual(sorted(r["link"] for r in delta["added"]), [url(3), url(4)])
+        self.assertEqual([r["abstract"] for r in delta["updated"]], ["Revised"])
+
+        # ...and only that one
+        delta, _ = self.run_crawl([rec(4)])
+        self.assertEqual((delta["added"], delta["updated"], delta["removed"]), ([], [], []))
+
+
+if __name__ == "__main__":
+    unittest.main()